@@ -9,11 +9,68 @@ from .files import (
     get_static_file_path,
 )
 from .schemas import (
+    VerseRange,
+    Passage,
     ScriptureSlideRequest,
     HymnRequest,
     CallToWorshipRequest,
+    ImageUploadRequest,
     BulletinRequest,
     ParseRequest,
     ParsedElement,
     ParseResponse,
-)
\ No newline at end of file
+    ServiceItem,
+    ServiceRequest,
+    BundleRequest,
+)
+from .cache import ByteCache
+from .images import (
+    StoredImage,
+    ImageStore,
+    ImageProfile,
+    BACKGROUND_PROFILE,
+    UnknownImageError,
+    image_store,
+)
+from .workers import (
+    GenerationPool,
+    JobTiming,
+    PoolSaturatedError,
+    generation_pool,
+)
+from .decks import (
+    DeckCache,
+    deck_key,
+    deck_cache,
+)
+from .bible import (
+    BIBLE_VERSIONS,
+    BibleStore,
+    UnknownPassageError,
+    bible_store,
+)
+from .search import (
+    BibleSearch,
+    BibleSearchIndex,
+    HymnSearch,
+    bible_search,
+    hymn_search,
+)
+from .assets import (
+    AssetRegistry,
+    asset_registry,
+)
+from .hymns import (
+    HYMNALS,
+    HymnStore,
+    UnknownHymnError,
+    hymn_store,
+)
+from .jobs import (
+    Job,
+    JobProgress,
+    JobStore,
+    JobCancelledError,
+    UnknownJobError,
+    job_store,
+)
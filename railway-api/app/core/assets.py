@@ -0,0 +1,90 @@
+"""
+Registry of the static images used by the slide builders
+
+The corner placeholder images and the gallery backgrounds are resolved,
+validated, loaded and hashed once (at startup, or on first use outside the
+app). Builders get the in-memory StoredImage instead of building a path and
+checking it exists on every slide, and a missing or unreadable asset is
+reported once rather than skipped silently.
+"""
+import io
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from app.core import config
+from app.core.images import ImageStore, StoredImage, image_store
+
+# Corner placeholder image for each slide kind, relative to PUBLIC_DIR
+PLACEHOLDERS = {
+    "hymn": "images/placeholders/hymn-placeholder.jpg",
+    "scripture": "images/placeholders/scripture-placeholder.jpg",
+    "call_to_worship": "images/placeholders/flower-placholder.jpg",
+}
+
+
+class AssetRegistry:
+    """Placeholder images by name, plus a warmed store of gallery backgrounds"""
+
+    def __init__(self, public_dir: Path, placeholders: Dict[str, str],
+                 store: ImageStore = image_store):
+        self.public_dir = Path(public_dir)
+        self.placeholders = placeholders
+        self.store = store
+        self._images: Dict[str, StoredImage] = {}
+        self._filenames: Dict[str, str] = {}
+        self.missing: List[str] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, backgrounds: bool = False) -> None:
+        """Load and validate the placeholders, reporting any that fail.
+
+        With ``backgrounds`` every gallery background is also read into the
+        image store, so the first request for each one skips the disk.
+        """
+        with self._lock:
+            if not self._loaded:
+                for name, relative_path in self.placeholders.items():
+                    path = self.public_dir / relative_path
+                    image = self._load_file(path)
+                    if image is None:
+                        self.missing.append(f"placeholder '{name}' ({relative_path})")
+                        continue
+                    self._images[name] = image
+                    self._filenames[name] = path.name
+                self._loaded = True
+
+            if backgrounds:
+                for background_id in self.store.background_ids():
+                    try:
+                        self.store.from_background_id(background_id)
+                    except OSError as e:
+                        print(f"Error loading background '{background_id}': {e}")
+                        self.missing.append(f"background '{background_id}'")
+
+    def _load_file(self, path: Path) -> Optional[StoredImage]:
+        try:
+            data = path.read_bytes()
+            with Image.open(io.BytesIO(data)) as img:
+                img.verify()
+        except Exception as e:
+            print(f"Missing or unreadable asset {path}: {e}")
+            return None
+        return self.store.put(data)
+
+    def placeholder(self, name: str) -> Optional[StoredImage]:
+        """Placeholder image for a slide kind, or None when it is missing"""
+        if not self._loaded:
+            self.load()
+        return self._images.get(name)
+
+    def filename(self, name: str) -> Optional[str]:
+        """Original file name of a placeholder (used as the picture description)"""
+        return self._filenames.get(name)
+
+
+# Process-wide registry shared by the slide builders
+asset_registry = AssetRegistry(config.PUBLIC_DIR, PLACEHOLDERS)
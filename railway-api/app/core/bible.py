@@ -0,0 +1,252 @@
+"""
+Server-side Bible text store
+
+Serves verse text for the translations under ``public/data/bibles/<version>/``
+so scripture requests can send a reference (book, chapter, verse ranges,
+versions) instead of the verse text.
+
+A translation is read from its packed file in config.BIBLE_PACK_DIR when one
+exists (see ``python -m scripts.pack_bibles``): the file is memory-mapped and
+only the requested verses are decoded. Otherwise the chapter JSON files are
+loaded into an in-memory index. Either way a translation is opened on first
+use, or at startup when config.BIBLE_PRELOAD is set.
+"""
+import json
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core import config
+
+# Translations shipped in public/data/bibles
+BIBLE_VERSIONS = ("nrsv", "nrsvue", "tmb")
+
+VerseRange = Tuple[int, Optional[int]]
+
+# Packed file layout (all integers little-endian):
+#   header   magic, format, reserved, meta length, row count, text length
+#   meta     UTF-8 JSON: {"version", "books": [[code, name, [[chapter, first_row, rows], ...]], ...]}
+#   rows     one (verse, text offset, text length) row per verse, in book/chapter/verse order
+#   text     UTF-8 verse text, concatenated
+PACK_MAGIC = b"BIBLPACK"
+PACK_FORMAT = 1
+PACK_SUFFIX = ".bible"
+_HEADER = struct.Struct("<8sHHIII")
+_ROW = struct.Struct("<HII")
+
+
+class UnknownPassageError(LookupError):
+    """Raised for a translation, book or chapter the store does not hold"""
+
+
+class BibleVersion:
+    """All chapters of one translation, loaded from the chapter JSON files"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.book_names: Dict[str, str] = {}
+        self.chapters: Dict[Tuple[str, int], Dict[int, str]] = {}
+
+    def load(self, directory: Path) -> "BibleVersion":
+        for path in sorted(directory.glob("*_chapter_*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            book = data["book"]
+            self.book_names.setdefault(book, data.get("book_name", book))
+            self.chapters[(book, int(data["chapter"]))] = {
+                int(v["verse"]): v["text"] for v in data.get("verses", [])
+            }
+        return self
+
+    def verse_numbers(self, book: str, chapter: int) -> Optional[List[int]]:
+        verses = self.chapters.get((book, chapter))
+        return sorted(verses) if verses is not None else None
+
+    def texts(self, book: str, chapter: int, numbers: Iterable[int]) -> List[Tuple[int, str]]:
+        verses = self.chapters.get((book, chapter), {})
+        return [(n, verses[n]) for n in numbers if n in verses]
+
+    def index(self) -> Iterator[Tuple[str, str, int, List[int]]]:
+        """(book, book name, chapter, verse numbers) in book and chapter order"""
+        for (book, chapter) in sorted(self.chapters):
+            yield book, self.book_names[book], chapter, sorted(self.chapters[(book, chapter)])
+
+
+class PackedBibleVersion:
+    """One translation read from a memory-mapped packed file"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, _, meta_len, rows, text_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != PACK_MAGIC or fmt != PACK_FORMAT:
+            self._mm.close()
+            raise ValueError(f"{path} is not a format {PACK_FORMAT} Bible pack")
+
+        meta = json.loads(self._mm[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+        self.version = meta["version"]
+        self._rows_start = _HEADER.size + meta_len
+        self._text_start = self._rows_start + rows * _ROW.size
+        self.book_names: Dict[str, str] = {}
+        self._chapters: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        for book, name, chapters in meta["books"]:
+            self.book_names[book] = name
+            for chapter, first, count in chapters:
+                self._chapters[(book, chapter)] = (first, count)
+
+    def _rows(self, book: str, chapter: int):
+        span = self._chapters.get((book, chapter))
+        if span is None:
+            return None
+        first, count = span
+        start = self._rows_start + first * _ROW.size
+        return _ROW.iter_unpack(self._mm[start:start + count * _ROW.size])
+
+    def verse_numbers(self, book: str, chapter: int) -> Optional[List[int]]:
+        rows = self._rows(book, chapter)
+        return [verse for verse, _, _ in rows] if rows is not None else None
+
+    def texts(self, book: str, chapter: int, numbers: Iterable[int]) -> List[Tuple[int, str]]:
+        rows = self._rows(book, chapter)
+        if rows is None:
+            return []
+        spans = {verse: (offset, length) for verse, offset, length in rows}
+        texts = []
+        for n in numbers:
+            span = spans.get(n)
+            if span is not None:
+                start = self._text_start + span[0]
+                texts.append((n, self._mm[start:start + span[1]].decode("utf-8")))
+        return texts
+
+    def index(self) -> Iterator[Tuple[str, str, int, List[int]]]:
+        """(book, book name, chapter, verse numbers) in book and chapter order"""
+        for (book, chapter) in self._chapters:
+            yield book, self.book_names[book], chapter, self.verse_numbers(book, chapter)
+
+
+def write_pack(source, path: Path) -> int:
+    """Write ``source`` (a loaded BibleVersion) to a packed file; returns its size"""
+    books: Dict[str, list] = {}
+    rows = bytearray()
+    text = bytearray()
+    row_count = 0
+    for book, name, chapter, numbers in source.index():
+        chapter_rows = books.setdefault(book, [book, name, []])[2]
+        chapter_rows.append([chapter, row_count, len(numbers)])
+        for verse, verse_text in source.texts(book, chapter, numbers):
+            encoded = verse_text.encode("utf-8")
+            rows += _ROW.pack(verse, len(text), len(encoded))
+            text += encoded
+            row_count += 1
+
+    meta = json.dumps(
+        {"version": source.version, "books": list(books.values())},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+    header = _HEADER.pack(PACK_MAGIC, PACK_FORMAT, 0, len(meta), row_count, len(text))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(meta)
+        f.write(rows)
+        f.write(text)
+    tmp_path.replace(path)
+    return len(header) + len(meta) + len(rows) + len(text)
+
+
+class BibleStore:
+    """Verse lookup across the shipped translations"""
+
+    def __init__(self, bibles_dir: Path = config.BIBLES_DIR,
+                 pack_dir: Optional[Path] = config.BIBLE_PACK_DIR,
+                 versions: Sequence[str] = BIBLE_VERSIONS):
+        self.bibles_dir = Path(bibles_dir)
+        self.pack_dir = Path(pack_dir) if pack_dir else None
+        self.versions = tuple(versions)
+        self._loaded: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def pack_path(self, version: str) -> Optional[Path]:
+        """Location of the packed file for ``version`` (None without a pack dir)"""
+        if self.pack_dir is None:
+            return None
+        return self.pack_dir / f"{version}{PACK_SUFFIX}"
+
+    def version(self, version: str):
+        """Index for ``version``, opening it on first use"""
+        version = version.lower()
+        loaded = self._loaded.get(version)
+        if loaded is not None:
+            return loaded
+        if version not in self.versions:
+            raise UnknownPassageError(f"Unknown Bible version {version}")
+        with self._lock:
+            loaded = self._loaded.get(version)
+            if loaded is None:
+                loaded = self._open(version)
+                self._loaded[version] = loaded
+        return loaded
+
+    def _open(self, version: str):
+        path = self.pack_path(version)
+        if path is not None and path.exists():
+            try:
+                return PackedBibleVersion(path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening Bible pack {path}, falling back to JSON: {e}")
+        return BibleVersion(version).load(self.bibles_dir / version)
+
+    def preload(self) -> None:
+        """Open every translation up front"""
+        for version in self.versions:
+            self.version(version)
+
+    def book_name(self, version: str, book: str) -> str:
+        return self.version(version).book_names.get(book.upper(), book)
+
+    def verse_numbers(self, version: str, book: str, chapter: int) -> List[int]:
+        """Verse numbers present in one chapter"""
+        numbers = self.version(version).verse_numbers(book.upper(), int(chapter))
+        if numbers is None:
+            raise UnknownPassageError(f"{book} {chapter} not found in {version}")
+        return numbers
+
+    def verses(self, version: str, book: str, chapter: int,
+               ranges: Optional[Iterable[VerseRange]] = None) -> List[Dict[str, object]]:
+        """Verses of a chapter within ``ranges`` as ``{"verse", "text"}`` dicts.
+
+        Each range is ``(start, end)``; ``end`` None means a single verse. With
+        no ranges the whole chapter is returned. Verse numbers missing from
+        the translation are skipped.
+        """
+        numbers = self.verse_numbers(version, book, chapter)
+        if ranges:
+            # Select from the verses that exist, so a huge range costs nothing extra
+            present, numbers = numbers, []
+            for start, end in ranges:
+                end = end if end is not None else start
+                numbers.extend(n for n in present if start <= n <= end)
+        texts = self.version(version).texts(book.upper(), int(chapter), numbers)
+        return [{"verse": n, "text": text} for n, text in texts]
+
+    def export_index(self, version: str) -> List[Dict[str, object]]:
+        """Books, chapters and verse numbers of ``version`` for the Next.js routes.
+
+        A chapter whose verses run 1..n is listed as the count ``n``;
+        otherwise its verse numbers are listed explicitly.
+        """
+        books: Dict[str, Dict[str, object]] = {}
+        for book, name, chapter, numbers in self.version(version).index():
+            entry = books.setdefault(book, {"code": book, "name": name, "chapters": {}})
+            contiguous = numbers == list(range(1, len(numbers) + 1))
+            entry["chapters"][str(chapter)] = len(numbers) if contiguous else numbers
+        return list(books.values())
+
+
+# Process-wide Bible store
+bible_store = BibleStore()
@@ -0,0 +1,121 @@
+"""
+Size-bounded LRU cache for byte blobs with an optional on-disk tier
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ByteCache:
+    """Thread-safe LRU of ``bytes`` values bounded by total size.
+
+    Entries evicted from memory stay available on disk when ``disk_dir`` is
+    set; a disk hit is promoted back into memory. Keys must be safe to use as
+    file names (hex digests in practice).
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, suffix: str = ".bin"):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.suffix = suffix
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def disk_path(self, key: str) -> Optional[Path]:
+        """Path of the on-disk copy for ``key`` (None without a disk tier)"""
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for ``key`` or None, counting hits and misses"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        path = self.disk_path(key)
+        if path is not None and path.exists():
+            try:
+                value = path.read_bytes()
+            except OSError:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        path = self.disk_path(key)
+        return path is not None and path.exists()
+
+    def put(self, key: str, value: bytes) -> None:
+        """Store ``value`` in memory and, when configured, on disk"""
+        self._remember(key, value)
+        path = self.disk_path(key)
+        if path is not None and not path.exists():
+            # Write to a sibling temp file first so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, prefix=".tmp_")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(value)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing cache entry {key}: {e}")
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
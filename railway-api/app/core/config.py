@@ -7,6 +7,9 @@ from pathlib import Path
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
+# Hymn, Bible and background data shared with the Next.js app; the image
+# ships public/data and public/images (see .dockerignore)
+PUBLIC_DIR = Path(os.environ.get("PUBLIC_DIR", BASE_DIR.parent / "public"))
 
 # API settings
 API_PREFIX = "/api"
@@ -23,4 +26,57 @@ ALLOWED_ORIGINS = [
 
 # File paths
 HYMNS_DATA_DIR = DATA_DIR / "hymns"
-TEMPLATES_DIR = DATA_DIR / "templates"
+HYMNS_DIR = PUBLIC_DIR / "data" / "hymns"
+# Static liturgy decks (doxology, benediction, ...) shipped with the app
+TEMPLATES_DIR = BASE_DIR / "app" / "templates"
+BACKGROUNDS_MANIFEST = PUBLIC_DIR / "data" / "backgrounds.json"
+BIBLES_DIR = PUBLIC_DIR / "data" / "bibles"
+# Packed Bible files written by `python -m scripts.pack_bibles`
+BIBLE_PACK_DIR = Path(os.environ.get("BIBLE_PACK_DIR", DATA_DIR / "bibles"))
+
+# Background image store (decoded images keyed by content hash)
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR") or None
+# Largest background accepted as a multipart file upload
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 25 * 1024 * 1024))
+
+# Background normalisation (slides are 13.33x7.5in, i.e. 16:9)
+BACKGROUND_MAX_WIDTH = int(os.environ.get("BACKGROUND_MAX_WIDTH", 1920))
+BACKGROUND_MAX_HEIGHT = int(os.environ.get("BACKGROUND_MAX_HEIGHT", 1080))
+BACKGROUND_FORMAT = os.environ.get("BACKGROUND_FORMAT", "JPEG")  # JPEG, PNG or "original"
+BACKGROUND_QUALITY = int(os.environ.get("BACKGROUND_QUALITY", 85))
+# Deck saving: "fast" stores JPEG/PNG media uncompressed and deflates XML at
+# SAVE_XML_LEVEL (0-9); "standard" uses python-pptx's writer (everything at 6)
+SAVE_MODE = os.environ.get("SAVE_MODE", "fast").lower()
+SAVE_XML_LEVEL = int(os.environ.get("SAVE_XML_LEVEL", 6))
+SAVE_STORE_MEDIA = os.environ.get("SAVE_STORE_MEDIA", "true").lower() in ("1", "true", "yes")
+# Merge the background and corner placeholder into one picture per content slide
+COMPOSITE_PLACEHOLDERS = os.environ.get("COMPOSITE_PLACEHOLDERS", "").lower() in ("1", "true", "yes")
+
+# Slide generation worker pool ("thread" or "process")
+GENERATION_EXECUTOR = os.environ.get("GENERATION_EXECUTOR", "thread")
+GENERATION_WORKERS = int(os.environ.get("GENERATION_WORKERS", 4))
+# Jobs allowed to wait for a worker before requests are rejected with 429
+GENERATION_QUEUE_LIMIT = int(os.environ.get("GENERATION_QUEUE_LIMIT", 16))
+
+# Generated deck cache (keyed by a hash of the normalised request)
+DECK_CACHE_MAX_BYTES = int(os.environ.get("DECK_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+DECK_CACHE_DIR = os.environ.get("DECK_CACHE_DIR") or None
+
+# Load every Bible translation at startup instead of on first use
+BIBLE_PRELOAD = os.environ.get("BIBLE_PRELOAD", "").lower() in ("1", "true", "yes")
+
+# Text fitting: a TrueType file with Arial Narrow Bold metrics (ARIALNB.TTF or
+# LiberationSansNarrow-Bold.ttf). Common system locations are tried when unset,
+# then built-in metrics are used.
+TEXT_FIT_FONT = os.environ.get("TEXT_FIT_FONT") or None
+
+# Background generation jobs (/api/jobs): finished decks are kept for
+# JOB_TTL_SECONDS; a build is cancelled after JOB_DEADLINE_SECONDS, or once
+# nobody has polled or streamed its progress for JOB_ABANDON_SECONDS
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", 600))
+JOB_DEADLINE_SECONDS = int(os.environ.get("JOB_DEADLINE_SECONDS", 300))
+JOB_ABANDON_SECONDS = int(os.environ.get("JOB_ABANDON_SECONDS", 30))
+
+# Most decks one /api/generate-bundle request can ask for
+BUNDLE_MAX_ITEMS = int(os.environ.get("BUNDLE_MAX_ITEMS", 40))
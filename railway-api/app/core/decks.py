@@ -0,0 +1,80 @@
+"""
+Result cache for generated decks
+
+Generation is deterministic: the same normalised request and background
+always produce the same slides. Decks are cached under a SHA-256 of a
+canonical JSON encoding of the request, and that key doubles as the ETag.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from app.core import config
+from app.core.cache import ByteCache
+from app.core.textfit import text_fitter
+
+# Bump in any change to the generated deck bytes (slide content or how the
+# package is written) so stale decks in the disk tier are ignored.
+# 3: fast package writer (stored media, SAVE_XML_LEVEL deflate)
+DECK_FORMAT_VERSION = 3
+
+
+def deck_key(kind: str, params: Any, background=None) -> str:
+    """Canonical hash of a generate request.
+
+    ``params`` is the normalised request (plain JSON types); ``background`` is
+    the resolved StoredImage, identified by its content digest.
+    """
+    payload = {
+        "version": DECK_FORMAT_VERSION,
+        "kind": kind,
+        "params": params,
+        "background": background.digest if background is not None else None,
+        # Output options that change the generated slides
+        "composite": config.COMPOSITE_PLACEHOLDERS,
+        "save": [config.SAVE_MODE, config.SAVE_XML_LEVEL, config.SAVE_STORE_MEDIA],
+        # Font sizes and slide splits depend on the text-fit font
+        "metrics": text_fitter.metrics.digest,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str, exists: bool = False) -> bool:
+    """True when an If-None-Match header value covers ``etag``
+
+    ``*`` only matches when the deck ``exists`` (is in the deck cache), so a
+    wildcard cannot turn a deck that was never generated into a 304.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if (candidate == "*" and exists) or candidate == etag:
+            return True
+    return False
+
+
+class DeckCache:
+    """Generated .pptx bytes keyed by ``deck_key``"""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self._cache = ByteCache(max_bytes, disk_dir, suffix=".pptx")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def put(self, key: str, data: bytes) -> None:
+        self._cache.put(key, data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._cache
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+# Process-wide deck cache shared by all generate endpoints
+deck_cache = DeckCache(config.DECK_CACHE_MAX_BYTES, config.DECK_CACHE_DIR)
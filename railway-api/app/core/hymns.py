@@ -0,0 +1,56 @@
+"""
+Hymn lookup by hymnal and number
+
+Each hymn is one JSON file, ``<hymnal>/<number>.json`` under config.HYMNS_DIR,
+already in the hymn_data shape create_hymn_slides expects (title, hymnal,
+hymn_number, lyrics, author, ...). Numbers may carry a letter suffix for
+alternate settings, e.g. ``112b``.
+"""
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from app.core import config
+from app.core.files import load_json_file
+
+HYMNALS = ("umh", "thb", "fws")
+
+_NUMBER = re.compile(r"[0-9]+[a-z]?")
+
+
+class UnknownHymnError(LookupError):
+    """Raised for a hymnal or hymn number that is not in the data directory"""
+
+
+class HymnStore:
+    """Hymn JSON files, loaded on first use and kept in memory"""
+
+    def __init__(self, hymns_dir: Path, hymnals: Tuple[str, ...] = HYMNALS):
+        self.hymns_dir = Path(hymns_dir)
+        self.hymnals = hymnals
+        self._hymns: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, hymnal: str, number) -> Dict[str, Any]:
+        """Hymn data for ``hymnal`` and ``number``; raises UnknownHymnError"""
+        hymnal = str(hymnal).lower()
+        number = str(number).strip().lower()
+        if hymnal not in self.hymnals:
+            raise UnknownHymnError(f"Unknown hymnal '{hymnal}'")
+        if not _NUMBER.fullmatch(number):
+            raise UnknownHymnError(f"Invalid hymn number '{number}'")
+
+        key = (hymnal, number)
+        hymn = self._hymns.get(key)
+        if hymn is None:
+            hymn = load_json_file(self.hymns_dir / hymnal / f"{number}.json")
+            if hymn is None:
+                raise UnknownHymnError(f"Hymn {hymnal.upper()} {number} not found")
+            with self._lock:
+                self._hymns[key] = hymn
+        return hymn
+
+
+# Process-wide hymn store
+hymn_store = HymnStore(config.HYMNS_DIR)
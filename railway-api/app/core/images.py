@@ -0,0 +1,351 @@
+"""
+Content-addressed store for background images
+
+Images are keyed by the SHA-256 of their decoded bytes. Requests can refer to
+an image three ways:
+
+* base64 data, with or without a ``data:image/...;base64,`` prefix (or the
+  raw bytes, as a multipart file part; see routers/slides/uploads.py)
+* ``sha256:<hex digest>`` of an image the server has already seen
+* the ``id`` of an entry in ``public/data/backgrounds.json``
+
+Backgrounds are normalised to an ImageProfile (size and encoding) before they
+go into a deck; the result is cached by source hash and profile.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+from app.core import config
+from app.core.cache import ByteCache
+
+HASH_PREFIX = "sha256:"
+
+_EXIF_ORIENTATION = 0x0112
+
+
+class UnknownImageError(LookupError):
+    """Raised when a request references an image the store does not hold"""
+
+
+class StoredImage:
+    """Decoded image bytes plus their content digest"""
+
+    __slots__ = ("digest", "data")
+
+    def __init__(self, digest: str, data: bytes):
+        self.digest = digest
+        self.data = data
+
+    @property
+    def reference(self) -> str:
+        """Reference string clients can send instead of the image itself"""
+        return f"{HASH_PREFIX}{self.digest}"
+
+    @property
+    def ext(self) -> str:
+        """File extension guessed from the image signature"""
+        if self.data.startswith(b"\x89PNG"):
+            return "png"
+        if self.data.startswith(b"\xff\xd8"):
+            return "jpg"
+        if self.data.startswith(b"GIF8"):
+            return "gif"
+        return "bin"
+
+    def stream(self) -> io.BytesIO:
+        """Fresh file-like view of the image for python-pptx"""
+        return io.BytesIO(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"StoredImage({self.digest[:12]}, {len(self.data)} bytes)"
+
+
+class ImageProfile:
+    """Target resolution and encoding for normalised images"""
+
+    __slots__ = ("width", "height", "format", "quality")
+
+    def __init__(self, width: int, height: int, format: str = "JPEG", quality: int = 85):
+        self.width = width
+        self.height = height
+        self.format = format.upper()
+        self.quality = quality
+
+    @property
+    def enabled(self) -> bool:
+        return self.format != "ORIGINAL"
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used in cache keys"""
+        return f"{self.width}x{self.height}-{self.format.lower()}-q{self.quality}"
+
+
+# Profile applied to slide backgrounds (1920x1080 covers a 13.33x7.5in slide)
+BACKGROUND_PROFILE = ImageProfile(
+    config.BACKGROUND_MAX_WIDTH,
+    config.BACKGROUND_MAX_HEIGHT,
+    config.BACKGROUND_FORMAT,
+    config.BACKGROUND_QUALITY,
+)
+
+
+def encode_image(data: bytes, profile: ImageProfile) -> bytes:
+    """Downscale and re-encode image bytes to fit ``profile``.
+
+    Images larger than the profile are resized to exactly the profile size;
+    backgrounds are stretched to the full slide anyway, so this matches what
+    is displayed. Smaller images are never upscaled. The original bytes are
+    returned when they are already in the target format and size, or when
+    re-encoding would not make them smaller.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source_format = source.format
+        rotated = source.getexif().get(_EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+        width, height = (source.height, source.width) if rotated else source.size
+        oversized = width > profile.width or height > profile.height
+        if not oversized and source_format == profile.format:
+            # Checked before exif_transpose, which would decode the pixels
+            return data
+
+        img = ImageOps.exif_transpose(source)
+
+        if oversized:
+            img = img.resize((profile.width, profile.height), Image.LANCZOS)
+
+        if profile.format == "JPEG" and img.mode != "RGB":
+            # Flatten any transparency onto white, the same as the slide fallback
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel("A"))
+
+        out = io.BytesIO()
+        if profile.format == "JPEG":
+            img.save(out, "JPEG", quality=profile.quality, optimize=True)
+        else:
+            img.save(out, profile.format, optimize=True)
+
+    encoded = out.getvalue()
+    return encoded if len(encoded) < len(data) else data
+
+
+def composite_image(background: bytes, overlay: bytes, box, profile: ImageProfile) -> bytes:
+    """Paste ``overlay`` onto ``background`` and encode the result for ``profile``.
+
+    The background is stretched to the profile size (or kept at its own size
+    when the profile is disabled), as it is when stretched over a slide.
+    ``box`` is the overlay's (left, top, width, height) as fractions of the
+    slide, and the overlay is stretched to fill it.
+    """
+    with Image.open(io.BytesIO(background)) as bg, Image.open(io.BytesIO(overlay)) as ov:
+        base = ImageOps.exif_transpose(bg).convert("RGBA")
+        size = (profile.width, profile.height) if profile.enabled else base.size
+        if base.size != size:
+            base = base.resize(size, Image.LANCZOS)
+        left, top, width, height = (
+            round(box[0] * size[0]), round(box[1] * size[1]),
+            round(box[2] * size[0]), round(box[3] * size[1]),
+        )
+        layer = ImageOps.exif_transpose(ov).convert("RGBA").resize((width, height), Image.LANCZOS)
+        base.alpha_composite(layer, (left, top))
+
+    out = io.BytesIO()
+    if not profile.enabled or profile.format == "PNG":
+        base.save(out, "PNG", optimize=True)
+    else:
+        # Flatten onto white, the same as the slide fallback
+        flat = Image.new("RGB", base.size, (255, 255, 255))
+        flat.paste(base, mask=base.getchannel("A"))
+        flat.save(out, profile.format, quality=profile.quality, optimize=True)
+    return out.getvalue()
+
+
+class ImageStore:
+    """LRU of decoded images keyed by content hash, with an optional disk tier"""
+
+    # Remember this many base64 payloads so a repeat upload skips the decode
+    ENCODED_INDEX_SIZE = 256
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self._cache = ByteCache(max_bytes, disk_dir)
+        self._encoded: "OrderedDict[str, str]" = OrderedDict()
+        self._manifest: Optional[Dict[str, str]] = None
+        self._background_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.normalizations = 0
+        self.composites = 0
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> StoredImage:
+        """Store raw image bytes and return the stored image
+
+        ``digest`` is the hex SHA-256 of ``data`` when the caller already has it.
+        """
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+        if digest not in self._cache:
+            self._cache.put(digest, data)
+        return StoredImage(digest, data)
+
+    def get(self, digest: str) -> Optional[StoredImage]:
+        """Look up an image by hex digest"""
+        data = self._cache.get(digest)
+        return StoredImage(digest, data) if data is not None else None
+
+    def from_base64(self, encoded: str) -> StoredImage:
+        """Decode base64 image data, reusing the previous decode when possible
+
+        Raises UnknownImageError when ``encoded`` is not base64 image data.
+        Outside a data URL the base64 must be strict (line breaks aside), so
+        an unknown background id is not decoded as garbage.
+        """
+        data_url = encoded.startswith('data:')
+        # Remove data URL prefix if present (data:image/jpeg;base64,...)
+        if ',' in encoded:
+            encoded = encoded.split(',', 1)[1]
+
+        encoded_key = hashlib.sha256(encoded.encode('ascii', 'ignore')).hexdigest()
+        with self._lock:
+            digest = self._encoded.get(encoded_key)
+            if digest is not None:
+                self._encoded.move_to_end(encoded_key)
+        if digest is not None:
+            image = self.get(digest)
+            if image is not None:
+                return image
+
+        try:
+            data = base64.b64decode(encoded if data_url else encoded.replace('\n', '').replace('\r', ''),
+                                    validate=not data_url)
+            # Only reads the header; anything PIL cannot identify is rejected here
+            Image.open(io.BytesIO(data)).close()
+        except (binascii.Error, ValueError, OSError):
+            raise UnknownImageError("Background image is not a background id, content hash or base64 image")
+        image = self.put(data)
+        with self._lock:
+            self.decodes += 1
+            self._encoded[encoded_key] = image.digest
+            while len(self._encoded) > self.ENCODED_INDEX_SIZE:
+                self._encoded.popitem(last=False)
+        return image
+
+    def from_background_id(self, background_id: str) -> Optional[StoredImage]:
+        """Load an image listed in backgrounds.json by its id"""
+        manifest = self._load_background_manifest()
+        if background_id not in manifest:
+            return None
+
+        with self._lock:
+            digest = self._background_ids.get(background_id)
+        if digest is not None:
+            image = self.get(digest)
+            if image is not None:
+                return image
+
+        path = config.PUBLIC_DIR / manifest[background_id].lstrip('/')
+        image = self.put(path.read_bytes())
+        with self._lock:
+            self._background_ids[background_id] = image.digest
+        return image
+
+    def background_ids(self):
+        """Ids of the gallery backgrounds listed in backgrounds.json"""
+        return list(self._load_background_manifest())
+
+    def resolve(self, reference: Optional[str]) -> Optional[StoredImage]:
+        """Resolve any supported image reference to a stored image.
+
+        Returns None when no image was given. Raises UnknownImageError for a
+        hash the store does not hold, so the client can fall back to sending
+        the image data, and for anything that is neither a known background
+        id nor base64 image data.
+        """
+        if not reference:
+            return None
+        if isinstance(reference, StoredImage):
+            return reference
+
+        if reference.startswith(HASH_PREFIX):
+            image = self.get(reference[len(HASH_PREFIX):])
+            if image is None:
+                raise UnknownImageError(f"Unknown background image {reference}")
+            return image
+
+        if len(reference) <= 64:
+            image = self.from_background_id(reference)
+            if image is not None:
+                return image
+
+        return self.from_base64(reference)
+
+    def normalize(self, image: Optional[StoredImage],
+                  profile: ImageProfile = BACKGROUND_PROFILE) -> Optional[StoredImage]:
+        """Return ``image`` re-encoded for ``profile``, cached by source hash and profile"""
+        if image is None or not profile.enabled:
+            return image
+
+        def encode():
+            with self._lock:
+                self.normalizations += 1
+            return encode_image(image.data, profile)
+
+        return self._derived(f"{image.digest}-{profile.key}", encode)
+
+    def composite(self, background: StoredImage, overlay: StoredImage, box,
+                  profile: ImageProfile = BACKGROUND_PROFILE) -> StoredImage:
+        """``overlay`` pasted into ``box`` of ``background``, cached by both hashes, box and profile"""
+        def compose():
+            with self._lock:
+                self.composites += 1
+            return composite_image(background.data, overlay.data, box, profile)
+
+        box_key = "-".join(f"{v:.4f}" for v in box)
+        return self._derived(f"{background.digest}-{overlay.digest}-{box_key}-{profile.key}", compose)
+
+    def _derived(self, derived_key: str, make) -> StoredImage:
+        # A derived entry maps its inputs to the digest of the result, so the
+        # image bytes themselves are stored (and shared) only once
+        target = self._cache.get(derived_key)
+        if target is not None:
+            image = self.get(target.decode('ascii'))
+            if image is not None:
+                return image
+
+        image = self.put(make())
+        self._cache.put(derived_key, image.digest.encode('ascii'))
+        return image
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters plus the number of decodes, re-encodes and composites performed"""
+        stats = self._cache.stats()
+        stats["decodes"] = self.decodes
+        stats["normalizations"] = self.normalizations
+        stats["composites"] = self.composites
+        return stats
+
+    def _load_background_manifest(self) -> Dict[str, str]:
+        if self._manifest is None:
+            manifest = {}
+            try:
+                with open(config.BACKGROUNDS_MANIFEST, 'r', encoding='utf-8') as f:
+                    for entry in json.load(f):
+                        manifest[entry['id']] = entry['path']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading background manifest: {e}")
+            self._manifest = manifest
+        return self._manifest
+
+
+# Process-wide image store shared by all slide endpoints
+image_store = ImageStore(config.IMAGE_CACHE_MAX_BYTES, config.IMAGE_CACHE_DIR)
@@ -0,0 +1,279 @@
+"""
+Background generation jobs: progress, cancellation and retained results
+
+A job renders one or more decks on the generation pool while the client
+polls it or streams its progress. Deck builders report their slide total
+and each slide built through ``slides_total`` and ``slide_built`` (no-ops
+outside a job, like ``metrics.stage``); ``slide_built`` is also where a
+cancelled build stops, by raising JobCancelledError. The progress state is
+a plain list for a thread pool and a multiprocessing manager list for a
+process pool, so the same object works on both sides of the worker.
+"""
+import asyncio
+import contextvars
+import multiprocessing
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from app.core import config
+from app.core.workers import generation_pool
+
+# Progress state slots
+_BUILT, _TOTAL, _CANCELLED = 0, 1, 2
+
+# Job states; the last four are final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelledError(RuntimeError):
+    """Raised inside a deck builder when its job has been cancelled"""
+
+
+class UnknownJobError(LookupError):
+    """Raised for a job id that does not exist or has expired"""
+
+
+class JobProgress:
+    """Slides built and expected for one deck of a job, plus its cancel flag"""
+
+    def __init__(self, state=None):
+        self._state = state if state is not None else [0, 0, False]
+
+    @property
+    def built(self) -> int:
+        return self._state[_BUILT]
+
+    @property
+    def total(self) -> int:
+        return self._state[_TOTAL]
+
+    @property
+    def cancelled(self) -> bool:
+        return self._state[_CANCELLED]
+
+    def set_total(self, total: int) -> None:
+        self._state[_TOTAL] = total
+
+    def advance(self) -> None:
+        self._state[_BUILT] = self._state[_BUILT] + 1
+
+    def finish(self, slides: Optional[int]) -> None:
+        """Mark the deck complete (``slides`` may be None when it is unknown)"""
+        if slides is None:
+            slides = max(self.built, self.total)
+        self._state[_BUILT] = slides
+        self._state[_TOTAL] = slides
+
+    def cancel(self) -> None:
+        self._state[_CANCELLED] = True
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise JobCancelledError("Job was cancelled")
+
+
+_current_progress: contextvars.ContextVar[Optional[JobProgress]] = contextvars.ContextVar(
+    "job_progress", default=None
+)
+
+
+@contextmanager
+def track_progress(progress: Optional[JobProgress]):
+    """Report the ``slides_total``/``slide_built`` calls inside the block to ``progress``"""
+    if progress is None:
+        yield
+        return
+    progress.check()
+    token = _current_progress.set(progress)
+    try:
+        yield
+    finally:
+        _current_progress.reset(token)
+
+
+def slides_total(total: int) -> None:
+    """Record how many slides the deck being built will have"""
+    progress = _current_progress.get()
+    if progress is not None:
+        progress.set_total(total)
+
+
+def slide_built() -> None:
+    """Count a finished slide; raises JobCancelledError if the job was cancelled"""
+    progress = _current_progress.get()
+    if progress is not None:
+        progress.check()
+        progress.advance()
+
+
+class Job:
+    """One submitted generation job and, once done, its deck"""
+
+    def __init__(self, kind: str, labels: List[str], filename: str, progress: List[JobProgress]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.labels = labels
+        self.filename = filename
+        self.progress = progress
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.data: Optional[bytes] = None
+        self.key: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.deadline = self.created + config.JOB_DEADLINE_SECONDS
+        self.last_seen = self.created
+        self.watchers = 0
+        # Keeps the runner task referenced until it finishes
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def touch(self) -> None:
+        self.last_seen = time.time()
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        if self.done:
+            self.finished = time.time()
+
+    def cancel(self, reason: str) -> bool:
+        """Stop the build; returns False when the job had already finished
+
+        Builders stop at their next slide. The runner task is left to unwind
+        on its own, so the pool's pending count stays accurate.
+        """
+        if self.done:
+            return False
+        for progress in self.progress:
+            progress.cancel()
+        self.set_status(CANCELLED, reason)
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-ready status, including slides built and expected so far"""
+        built = total = 0
+        for progress in self.progress:
+            built += progress.built
+            total += progress.total
+        status = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "sections": self.labels,
+            "built": built,
+            "total": total,
+            "created": self.created,
+        }
+        if self.error:
+            status["error"] = self.error
+        if self.finished is not None:
+            status["finished"] = self.finished
+            status["expires"] = self.finished + config.JOB_TTL_SECONDS
+        if self.status == DONE:
+            status["size"] = len(self.data)
+        return status
+
+
+class JobStore:
+    """Jobs by id; finished jobs are dropped ``ttl`` seconds after they end"""
+
+    def __init__(self, ttl: float, abandon_after: float, process_pool: bool = False):
+        self.ttl = ttl
+        self.abandon_after = abandon_after
+        self.process_pool = process_pool
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._manager = None
+        self.submitted = 0
+        self.cancelled = 0
+        self.expired = 0
+
+    def new_progress(self) -> JobProgress:
+        """Progress state that the pool's workers can update"""
+        if not self.process_pool:
+            return JobProgress()
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return JobProgress(self._manager.list([0, 0, False]))
+
+    def add(self, job: Job) -> Job:
+        self.purge()
+        with self._lock:
+            self._jobs[job.id] = job
+            self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Job:
+        self.purge()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise UnknownJobError(f"Job '{job_id}' not found")
+        return job
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def purge(self) -> None:
+        """Drop expired results and stop jobs past their deadline or abandoned"""
+        now = time.time()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.done:
+                if now - job.finished > self.ttl:
+                    self.remove(job.id)
+                    with self._lock:
+                        self.expired += 1
+            elif now > job.deadline:
+                self._cancel(job, "Deadline exceeded")
+            elif not job.watchers and now - job.last_seen > self.abandon_after:
+                self._cancel(job, "Client went away")
+
+    def _cancel(self, job: Job, reason: str) -> None:
+        if job.cancel(reason):
+            with self._lock:
+                self.cancelled += 1
+
+    def cancel(self, job_id: str, reason: str = "Cancelled by client") -> Job:
+        job = self.get(job_id)
+        self._cancel(job, reason)
+        return job
+
+    async def watchdog(self, interval: float = 1.0) -> None:
+        """Run ``purge`` periodically (started with the app)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.purge()
+
+    def shutdown(self) -> None:
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            counts = {"submitted": self.submitted, "cancelled": self.cancelled, "expired": self.expired}
+        counts["active"] = sum(not job.done for job in jobs)
+        counts["retained"] = sum(job.done for job in jobs)
+        counts["retained_bytes"] = sum(len(job.data) for job in jobs if job.data)
+        return counts
+
+
+# Process-wide job store shared by the job endpoints
+job_store = JobStore(
+    config.JOB_TTL_SECONDS,
+    config.JOB_ABANDON_SECONDS,
+    process_pool=generation_pool.kind == "process",
+)
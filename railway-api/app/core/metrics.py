@@ -0,0 +1,206 @@
+"""
+Prometheus metrics for slide generation
+
+Deck builders wrap their stages (presentation setup, background, slide
+building, save) in ``stage(name)``; the fast writer also records the saved
+size and write time of each part type. The spans are collected per job by a
+StageTimer and handed back with the deck bytes, so they are recorded in the
+API process even when generation runs on a process pool. Histograms of
+stage and job times, slide counts and request/response sizes are served in
+the Prometheus text format by ``/api/metrics``.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 5e7)
+SLIDES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label set"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> ([count per bucket, +Inf last], sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            label_text = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms plus gauges and counters read from existing ``stats()`` methods at scrape time"""
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._stats: List[Tuple[str, Callable[[], Dict], Tuple[str, ...]]] = []
+
+    def histogram(self, name, help, labels=(), buckets=SECONDS_BUCKETS) -> Histogram:
+        histogram = Histogram(name, help, labels, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_stats(self, prefix: str, stats: Callable[[], Dict], counters: Tuple[str, ...] = ()) -> None:
+        """Expose the numeric values of ``stats()`` as gauges named ``<prefix>_<key>``
+
+        Keys listed in ``counters`` only ever increase and are exported as
+        counters named ``<prefix>_<key>_total``, so rate() handles restarts.
+        """
+        self._stats.append((prefix, stats, tuple(counters)))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for prefix, stats, counters in self._stats:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if key in counters:
+                        lines.append(f"# TYPE {prefix}_{key}_total counter")
+                        lines.append(f"{prefix}_{key}_total {_number(value)}")
+                    else:
+                        lines.append(f"# TYPE {prefix}_{key} gauge")
+                        lines.append(f"{prefix}_{key} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Stage timing inside deck builders
+
+class StageTimer:
+    """Durations of the named stages of one generation job, plus its slide count
+    and the saved size and write time of each part type"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.slides: Optional[int] = None
+        self.parts: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+_current_timer: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar(
+    "stage_timer", default=None
+)
+
+
+@contextmanager
+def collect_stages():
+    """Collect the ``stage`` spans run inside the block into a new StageTimer"""
+    timer = StageTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage of deck generation (a no-op outside ``collect_stages``)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+def count_slides(count: int) -> None:
+    """Record the slide count of the deck being generated"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.slides = count
+
+
+def record_parts(parts: Dict[str, Dict[str, float]]) -> None:
+    """Record the per-part-type save stats (package.PartStats.as_dict) of the deck"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.parts = parts
+
+
+# Process-wide registry and the generation metrics
+registry = MetricsRegistry()
+
+deck_stage_seconds = registry.histogram(
+    "deck_stage_seconds", "Time spent in each stage of deck generation", ("deck", "stage"))
+deck_generation_seconds = registry.histogram(
+    "deck_generation_seconds", "Worker run time of a deck generation job", ("deck",))
+deck_queue_seconds = registry.histogram(
+    "deck_queue_seconds", "Time a deck generation job waited for a worker", ("deck",))
+deck_slides = registry.histogram(
+    "deck_slides", "Slides per generated deck", ("deck",), SLIDES_BUCKETS)
+deck_part_bytes = registry.histogram(
+    "deck_part_bytes", "Saved size of each part type in a generated deck", ("deck", "part"), BYTES_BUCKETS)
+deck_part_save_seconds = registry.histogram(
+    "deck_part_save_seconds", "Time spent compressing and writing each part type", ("deck", "part"))
+background_resolve_seconds = registry.histogram(
+    "background_resolve_seconds", "Time to decode or look up and normalise a request background")
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "Time to produce the response",
+    ("route", "status"))
+http_request_bytes = registry.histogram(
+    "http_request_bytes", "Request body size", ("route",), BYTES_BUCKETS)
+http_response_bytes = registry.histogram(
+    "http_response_bytes", "Response body size", ("route",), BYTES_BUCKETS)
+
+
+def observe_generation(deck: str, timing, timer: Optional[StageTimer] = None) -> None:
+    """Record a finished generation job (a workers.JobTiming) and its stages"""
+    deck_generation_seconds.observe(timing.run, deck=deck)
+    deck_queue_seconds.observe(timing.queued, deck=deck)
+    if timer is not None:
+        for name, seconds in timer.stages.items():
+            deck_stage_seconds.observe(seconds, deck=deck, stage=name)
+        if timer.slides is not None:
+            deck_slides.observe(timer.slides, deck=deck)
+        for part, stats in timer.parts.items():
+            deck_part_bytes.observe(stats["stored"], deck=deck, part=part)
+            deck_part_save_seconds.observe(stats["seconds"], deck=deck, part=part)
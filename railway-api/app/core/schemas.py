@@ -1,15 +1,36 @@
 """
 Domain models and Pydantic schemas
 """
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Union
+
+# Upper bounds on chapter and verse numbers (Psalms has 150 chapters; Psalm 119 has 176 verses)
+MAX_CHAPTER = 150
+MAX_VERSE = 200
 
 
 # Scripture schemas
+class VerseRange(BaseModel):
+    start: int = Field(ge=1, le=MAX_VERSE)
+    end: Optional[int] = Field(None, ge=1, le=MAX_VERSE)  # Inclusive; omitted for a single verse
+
+
+class Passage(BaseModel):
+    book: str  # "LUK"
+    chapter: int = Field(ge=1, le=MAX_CHAPTER)
+    start_verse: Optional[int] = Field(None, ge=1, le=MAX_VERSE)  # From verse 1 when omitted
+    end_chapter: Optional[int] = Field(None, ge=1, le=MAX_CHAPTER)  # Same chapter when omitted; may span chapters
+    end_verse: Optional[int] = Field(None, ge=1, le=MAX_VERSE)  # To the end of end_chapter when omitted
+
+
 class ScriptureSlideRequest(BaseModel):
-    reference: Dict[str, Any]  # {"book": "PS", "chapter": 23}
-    verses: List[Dict[str, Any]]  # [{"verse": 1, "text": "..."}]
+    reference: Optional[Dict[str, Any]] = None  # {"book": "PS", "chapter": 23}
+    verses: Optional[List[Dict[str, Any]]] = None  # [{"verse": 1, "text": "..."}]
     verses_alt: Optional[List[Dict[str, Any]]] = None  # Optional alternate translation
+    # Alternatively, look the text up server-side (used when verses is omitted)
+    verse_ranges: Optional[List[VerseRange]] = None  # Whole chapter when omitted
+    passages: Optional[List[Passage]] = None  # Several passages in one deck, instead of reference
+    versions: Optional[List[str]] = None  # ["nrsvue"] or ["nrsvue", "tmb"] for combined mode
     background_image: Optional[str] = None  # Base64 encoded image
 
 
@@ -34,6 +55,11 @@ class CallToWorshipRequest(BaseModel):
     background_image: Optional[str] = None
 
 
+# Image store schemas
+class ImageUploadRequest(BaseModel):
+    image: str  # Base64 encoded image, optionally as a data URL
+
+
 # Bulletin schemas
 class BulletinRequest(BaseModel):
     content: str
@@ -90,4 +116,35 @@ class PrayerOfDedicationRequest(BaseModel):
 
 # Gloria Patri slide schema
 class GloriaPatriRequest(BaseModel):
-    background_image: Optional[str] = None  # Base64 encoded image
\ No newline at end of file
+    background_image: Optional[str] = None  # Base64 encoded image
+
+# Whole-service schemas
+class ServiceItem(BaseModel):
+    type: str  # "hymn", "scripture", "call_to_worship" or "liturgy"
+    # hymn
+    hymnal: Optional[str] = None  # "umh", "thb", "fws"
+    number: Optional[Union[int, str]] = None  # 57 or "112b"
+    # scripture (as in ScriptureSlideRequest)
+    reference: Optional[Dict[str, Any]] = None
+    verse_ranges: Optional[List[VerseRange]] = None
+    passages: Optional[List[Passage]] = None
+    versions: Optional[List[str]] = None
+    # call to worship
+    pairs: Optional[List[Dict[str, str]]] = None  # [{"Leader": "...", "People": "..."}]
+    # liturgy: a template name such as "doxology" or "benediction"
+    name: Optional[str] = None
+    background_image: Optional[str] = None  # Overrides the service background
+
+
+class ServiceRequest(BaseModel):
+    items: List[ServiceItem]  # In order of worship
+    lead_pastor: str = "Pastor"  # Fills {lead_pastor} in liturgy templates
+    background_image: Optional[str] = None  # Base64, content hash or background id
+
+
+# Bundle schema: the same items, one deck each, in a ZIP
+class BundleRequest(BaseModel):
+    items: List[ServiceItem]  # Decks are numbered in this order
+    lead_pastor: str = "Pastor"
+    background_image: Optional[str] = None  # Base64, content hash or background id
+    name: str = "slides"  # Archive file name, without .zip
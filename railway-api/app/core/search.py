@@ -0,0 +1,538 @@
+"""
+Full-text search over the Bible translations and the hymnals
+
+Text is folded before it is tokenised: case is dropped, accents and macrons
+are stripped, and the Tongan ʻokina (written ʻ, ‘, ’ or ' in the sources)
+is removed, so "ʻofa", "‘ofa" and "ofa" are the same term, as are "māhina"
+and "mahina".
+
+Each translation has an inverted index: for every term, the sorted rows
+(verses) that contain it, plus every row's term ids in order, used for
+BM25 lengths and to check that a query occurs as a phrase. Indexes are
+written next to the Bible packs as ``<version>.search`` by
+``python -m scripts.pack_bibles`` and memory-mapped; a translation without
+one is indexed in memory on its first search.
+
+The hymnals are small enough to index in memory at startup: titles, lyrics,
+author, composer and tune name, each weighted, with the last query word
+also matched as a prefix and titles matched by trigram similarity, so
+"amzing grce" still finds "Amazing Grace".
+"""
+import heapq
+import json
+import math
+import mmap
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.core import config
+from app.core.bible import bible_store
+from app.core.files import load_json_file
+from app.core.hymns import HYMNALS, UnknownHymnError
+
+# Index file layout (integers little-endian, sections 4-byte aligned):
+#   header     magic, format, reserved, meta length, rows, terms, tokens, postings
+#   meta       UTF-8 JSON: {"version", "books": [code, ...], "terms": [term, ...]}
+#   refs       (book index, chapter, verse) per row, uint16
+#   docs       row -> first token, uint32 (rows + 1)
+#   tokens     term id of every token of every row, in order, uint32
+#   posts      term -> first posting, uint32 (terms + 1)
+#   postings   rows containing each term, ascending, uint32
+SEARCH_MAGIC = b"BIBLSRCH"
+SEARCH_FORMAT = 1
+SEARCH_SUFFIX = ".search"
+_HEADER = struct.Struct("<8sHHIIIII")
+
+# Apostrophe-like marks used for the ʻokina, removed before tokenising
+_OKINA = re.compile("[\u02bb\u02bc\u2018\u2019'`\u00b4]")
+# Combining diacritical marks, left as separate characters by NFKD
+_MARKS = re.compile("[\u0300-\u036f]")
+_TOKEN = re.compile(r"[^\W_]+")
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+# Hymn fields indexed for search, with the weight of a match in each
+HYMN_FIELDS = (("title", 4.0), ("tune_name", 2.0), ("author", 2.0), ("composer", 1.5), ("lyrics", 1.0))
+# Dice similarity of title trigrams needed for a typo-tolerant title match
+TITLE_SIMILARITY = 0.45
+# Shortest last query word matched as a prefix, and the most words it expands to
+PREFIX_MIN = 2
+PREFIX_TERMS = 32
+
+
+def fold(text: str) -> str:
+    """Lowercase ``text`` without diacritics or ʻokina"""
+    text = _OKINA.sub("", text)
+    if not text.isascii():
+        text = _MARKS.sub("", unicodedata.normalize("NFKD", text))
+    return text.casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded word tokens of ``text``"""
+    return _TOKEN.findall(fold(text))
+
+
+def _uint32(buffer) -> Sequence[int]:
+    view = memoryview(buffer)
+    if sys.byteorder == "little":
+        return view.cast("I")
+    values = array("I", view)
+    values.byteswap()
+    return values
+
+
+def _uint16(buffer) -> Sequence[int]:
+    view = memoryview(buffer)
+    if sys.byteorder == "little":
+        return view.cast("H")
+    values = array("H", view)
+    values.byteswap()
+    return values
+
+
+def _padded(length: int) -> int:
+    return (length + 3) & ~3
+
+
+class BibleSearchIndex:
+    """Inverted index of one translation, built in memory or opened from a file"""
+
+    def __init__(self, version: str, books: List[str], terms: List[str],
+                 refs, docs, tokens, posts, postings):
+        self.version = version
+        self.books = books
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self._term_list = terms
+        self._refs = refs
+        self._docs = docs
+        self._tokens = tokens
+        self._posts = posts
+        self._postings = postings
+        self.rows = len(docs) - 1
+        self.average_length = len(tokens) / self.rows if self.rows else 0.0
+
+    @classmethod
+    def build(cls, source) -> "BibleSearchIndex":
+        """Index a loaded translation (BibleVersion or PackedBibleVersion)"""
+        books: Dict[str, int] = {}
+        terms: Dict[str, int] = {}
+        term_rows: List[array] = []
+        refs, docs, tokens = array("H"), array("I", [0]), array("I")
+        row = 0
+        for book, _, chapter, numbers in source.index():
+            book_index = books.setdefault(book, len(books))
+            for verse, text in source.texts(book, chapter, numbers):
+                seen = set()
+                for token in tokenize(text):
+                    term = terms.get(token)
+                    if term is None:
+                        term = terms[token] = len(terms)
+                        term_rows.append(array("I"))
+                    tokens.append(term)
+                    if term not in seen:
+                        seen.add(term)
+                        term_rows[term].append(row)
+                refs.extend((book_index, chapter, verse))
+                docs.append(len(tokens))
+                row += 1
+
+        posts, postings = array("I", [0]), array("I")
+        for rows in term_rows:
+            postings.extend(rows)
+            posts.append(len(postings))
+        return cls(source.version, list(books), list(terms), refs, docs, tokens, posts, postings)
+
+    @classmethod
+    def open(cls, path: Path) -> "BibleSearchIndex":
+        """Memory-map an index written by ``write``"""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, _, meta_len, rows, terms, tokens, postings = _HEADER.unpack_from(mm, 0)
+        if magic != SEARCH_MAGIC or fmt != SEARCH_FORMAT:
+            mm.close()
+            raise ValueError(f"{path} is not a format {SEARCH_FORMAT} Bible search index")
+
+        offset = _HEADER.size
+        meta = json.loads(mm[offset:offset + meta_len].decode("utf-8"))
+        offset += _padded(meta_len)
+        sections = []
+        for size, reader in ((rows * 3 * 2, _uint16), ((rows + 1) * 4, _uint32), (tokens * 4, _uint32),
+                             ((terms + 1) * 4, _uint32), (postings * 4, _uint32)):
+            sections.append(reader(mm[offset:offset + size]))
+            offset += _padded(size)
+        return cls(meta["version"], meta["books"], meta["terms"], *sections)
+
+    def write(self, path: Path) -> int:
+        """Write the index to ``path``; returns its size"""
+        meta = json.dumps(
+            {"version": self.version, "books": self.books, "terms": self._term_list},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        header = _HEADER.pack(SEARCH_MAGIC, SEARCH_FORMAT, 0, len(meta), self.rows,
+                              len(self._term_list), len(self._tokens), len(self._postings))
+
+        sections = [header, meta]
+        for kind, values in (("H", self._refs), ("I", self._docs), ("I", self._tokens),
+                             ("I", self._posts), ("I", self._postings)):
+            values = array(kind, values)
+            if sys.byteorder != "little":
+                values.byteswap()
+            sections.append(values.tobytes())
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        size = 0
+        with open(tmp_path, "wb") as f:
+            for data in sections:
+                f.write(data)
+                f.write(b"\0" * (_padded(len(data)) - len(data)))
+                size += _padded(len(data))
+        tmp_path.replace(path)
+        return size
+
+    def _postings_for(self, term: int):
+        return self._postings[self._posts[term]:self._posts[term + 1]]
+
+    def reference(self, row: int) -> Tuple[str, int, int]:
+        """(book, chapter, verse) of a row"""
+        book, chapter, verse = self._refs[row * 3:row * 3 + 3]
+        return self.books[book], chapter, verse
+
+    def search(self, query: str, limit: int = 20) -> Tuple[int, List[Tuple[int, float, bool]]]:
+        """
+        Verses containing every term of ``query``, best first.
+
+        Verses where the terms occur in order as a phrase rank above the
+        rest; within each group verses are ranked by BM25. Returns the number
+        of matching verses and up to ``limit`` (row, score, phrase) hits.
+        """
+        phrase = []
+        for token in tokenize(query):
+            term = self.terms.get(token)
+            if term is None:
+                return 0, []
+            phrase.append(term)
+        if not phrase:
+            return 0, []
+
+        postings = {term: self._postings_for(term) for term in set(phrase)}
+        idf = {
+            term: math.log(1 + (self.rows - len(rows) + 0.5) / (len(rows) + 0.5))
+            for term, rows in postings.items()
+        }
+
+        # Intersect postings, smallest first
+        postings = sorted(postings.values(), key=len)
+        candidates = postings[0].tolist()
+        for rows in postings[1:]:
+            if len(candidates) * 16 > len(rows):
+                members = set(rows.tolist())
+                candidates = [row for row in candidates if row in members]
+            else:
+                candidates = [row for row in candidates if _contains(rows, row)]
+            if not candidates:
+                return 0, []
+
+        scored = []
+        for row in candidates:
+            tokens = self._tokens[self._docs[row]:self._docs[row + 1]].tolist()
+            norm = _K1 * (1 - _B + _B * len(tokens) / self.average_length)
+            score = 0.0
+            for term, weight in idf.items():
+                tf = tokens.count(term)
+                score += weight * tf * (_K1 + 1) / (tf + norm)
+            scored.append((_has_phrase(tokens, phrase), score, row))
+
+        best = heapq.nlargest(limit, scored)
+        return len(candidates), [(row, score, is_phrase) for is_phrase, score, row in best]
+
+
+def _contains(rows, row: int) -> bool:
+    i = bisect_left(rows, row)
+    return i < len(rows) and rows[i] == row
+
+
+def _has_phrase(tokens: List[int], phrase: List[int]) -> bool:
+    if len(phrase) == 1:
+        return True
+    first, width = phrase[0], len(phrase)
+    return any(
+        token == first and tokens[i:i + width] == phrase
+        for i, token in enumerate(tokens)
+    )
+
+
+class BibleSearch:
+    """Search indexes for the Bible store's translations, opened on first use"""
+
+    def __init__(self, store):
+        self.store = store
+        self._indexes: Dict[str, BibleSearchIndex] = {}
+        self._lock = threading.Lock()
+
+    def index_path(self, version: str) -> Optional[Path]:
+        """Location of the index file for ``version`` (None without a pack dir)"""
+        if self.store.pack_dir is None:
+            return None
+        return self.store.pack_dir / f"{version}{SEARCH_SUFFIX}"
+
+    def index(self, version: str) -> BibleSearchIndex:
+        version = version.lower()
+        index = self._indexes.get(version)
+        if index is not None:
+            return index
+        source = self.store.version(version)  # UnknownPassageError for an unknown version
+        with self._lock:
+            index = self._indexes.get(version)
+            if index is None:
+                index = self._indexes[version] = self._open(version, source)
+        return index
+
+    def _open(self, version: str, source) -> BibleSearchIndex:
+        path = self.index_path(version)
+        if path is not None and path.exists():
+            try:
+                return BibleSearchIndex.open(path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening Bible search index {path}, rebuilding in memory: {e}")
+        return BibleSearchIndex.build(source)
+
+    def preload(self) -> None:
+        """Open every translation's index up front"""
+        for version in self.store.versions:
+            self.index(version)
+
+    def search(self, query: str, version: str, limit: int = 20) -> Dict[str, object]:
+        """Ranked verse hits for ``query`` in one translation, with their text"""
+        index = self.index(version)
+        total, hits = index.search(query, limit)
+        results = []
+        for row, score, is_phrase in hits:
+            book, chapter, verse = index.reference(row)
+            text = self.store.version(index.version).texts(book, chapter, [verse])
+            results.append({
+                "book": book,
+                "book_name": self.store.book_name(index.version, book),
+                "chapter": chapter,
+                "verse": verse,
+                "text": text[0][1] if text else "",
+                "score": round(score, 3),
+                "phrase": is_phrase,
+            })
+        return {"version": index.version, "total": total, "hits": results}
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of the folded words of ``text``, each padded with spaces"""
+    padded = " " + "  ".join(tokenize(text)) + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class HymnSearch:
+    """In-memory inverted index over every hymn's title, lyrics and credits"""
+
+    def __init__(self, hymns_dir: Path, hymnals: Tuple[str, ...] = HYMNALS):
+        self.hymns_dir = Path(hymns_dir)
+        self.hymnals = hymnals
+        self.hymns: List[Dict[str, str]] = []
+        # term -> hymn -> (field weights times idf, bit mask of the fields it occurs in)
+        self._postings: Dict[str, Dict[int, Tuple[float, int]]] = {}
+        self._terms: List[str] = []
+        self._trigrams: Dict[str, List[int]] = {}
+        self._title_sizes: List[int] = []
+        self._numbers: Dict[str, List[int]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "HymnSearch":
+        """Read every hymn file and build the index"""
+        hymns, postings, grams, sizes, numbers = [], {}, {}, [], {}
+        for hymnal in self.hymnals:
+            paths = sorted((self.hymns_dir / hymnal).glob("*.json"), key=lambda p: (len(p.stem), p.stem))
+            for path in paths:
+                try:
+                    data = load_json_file(path)
+                except ValueError as e:
+                    print(f"Error indexing hymn {path}: {e}")
+                    continue
+                lyrics = [verse.get("text") or "" for verse in data.get("lyrics") or []]
+                lines = (line.strip() for text in lyrics for line in text.splitlines())
+                hymn = len(hymns)
+                hymns.append({
+                    "hymnal": hymnal,
+                    "number": path.stem,
+                    "title": data.get("title") or "",
+                    "first_line": next((line for line in lines if line), ""),
+                    "author": data.get("author") or "",
+                    "composer": data.get("composer") or "",
+                    "tune_name": data.get("tune_name") or "",
+                })
+
+                terms = {}
+                for bit, (field, weight) in enumerate(HYMN_FIELDS):
+                    text = "\n".join(lyrics) if field == "lyrics" else hymns[hymn][field]
+                    for term, tf in Counter(tokenize(text)).items():
+                        score, fields = terms.get(term, (0.0, 0))
+                        terms[term] = (score + weight * (1 + math.log(tf)), fields | 1 << bit)
+                for term, entry in terms.items():
+                    rows = postings.get(term)
+                    if rows is None:
+                        rows = postings[term] = {}
+                    rows[hymn] = entry
+
+                title = trigrams(hymns[hymn]["title"])
+                for gram in title:
+                    grams.setdefault(gram, []).append(hymn)
+                sizes.append(len(title))
+                numbers.setdefault(path.stem.lower(), []).append(hymn)
+
+        for rows in postings.values():
+            idf = math.log(1 + len(hymns) / len(rows))
+            for hymn, (score, fields) in rows.items():
+                rows[hymn] = (score * idf, fields)
+
+        with self._lock:
+            self.hymns, self._postings, self._trigrams = hymns, postings, grams
+            self._title_sizes, self._numbers = sizes, numbers
+            self._terms = sorted(postings)
+            self._loaded = True
+        return self
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Indexed words starting with ``prefix``, shortest first"""
+        start = bisect_left(self._terms, prefix)
+        words = []
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            words.append(term)
+        return sorted(words, key=len)[:PREFIX_TERMS]
+
+    def _word_postings(self, token: str, prefix: bool) -> List[Tuple[Dict[int, Tuple[float, int]], float]]:
+        """(postings, weight) for each indexed word a query word stands for"""
+        if not prefix:
+            postings = self._postings.get(token)
+            return [(postings, 1.0)] if postings else []
+        # A completed prefix counts for less than the word as typed
+        return [(self._postings[term], 1.0 if term == token else 0.8) for term in self._expand(token)]
+
+    @staticmethod
+    def _match(hymn: int, word: list) -> Optional[Tuple[float, int]]:
+        """Best (score, field mask) of ``hymn`` over one query word's postings"""
+        best = None
+        for postings, weight in word:
+            entry = postings.get(hymn)
+            if entry is not None:
+                score = entry[0] * weight
+                best = (score, entry[1]) if best is None else (max(best[0], score), best[1] | entry[1])
+        return best
+
+    def _similar_titles(self, query: str) -> Dict[int, float]:
+        """Hymn -> title trigram similarity, for titles close to ``query``"""
+        grams = trigrams(query)
+        counts: Counter = Counter()
+        for gram in grams:
+            counts.update(self._trigrams.get(gram, ()))
+        similar = {}
+        for hymn, common in counts.items():
+            similarity = 2 * common / (len(grams) + self._title_sizes[hymn])
+            if similarity >= TITLE_SIMILARITY:
+                similar[hymn] = similarity
+        return similar
+
+    def search(self, query: str, hymnal: Optional[str] = None, limit: int = 20) -> Dict[str, object]:
+        """
+        Hymns matching ``query``, best first.
+
+        A hymn matches when every word occurs in one of its fields (the last
+        word also as a prefix, while it is being typed) or when the query is
+        its number; when that finds fewer than ``limit`` hymns, titles close
+        to the query are added. Raises UnknownHymnError for an unknown
+        ``hymnal``.
+        """
+        if not self._loaded:
+            self.load()
+        if hymnal is not None:
+            hymnal = hymnal.lower()
+            if hymnal not in self.hymnals:
+                raise UnknownHymnError(f"Unknown hymnal '{hymnal}'")
+
+        tokens = tokenize(query)
+        words = [
+            self._word_postings(token, i == len(tokens) - 1 and len(token) >= PREFIX_MIN
+                                and not query[-1:].isspace())
+            for i, token in enumerate(tokens)
+        ]
+        # Start from the rarest word and keep the hymns every other word matches
+        words.sort(key=lambda word: sum(len(postings) for postings, _ in word))
+        scores: Dict[int, float] = {}
+        fields: Dict[int, int] = {}
+        if words and all(words):
+            first = {}
+            for postings, weight in words[0]:
+                for hymn, (score, mask) in postings.items():
+                    best = first.get(hymn)
+                    score *= weight
+                    first[hymn] = (score, mask) if best is None else (max(best[0], score), best[1] | mask)
+            for hymn, (score, mask) in first.items():
+                for word in words[1:]:
+                    match = self._match(hymn, word)
+                    if match is None:
+                        break
+                    score += match[0]
+                    mask |= match[1]
+                else:
+                    scores[hymn] = score
+                    fields[hymn] = mask
+
+        def wanted(hymn):
+            return hymnal is None or self.hymns[hymn]["hymnal"] == hymnal
+
+        # Filter before the fuzzy fill, so matches elsewhere don't crowd it out
+        if hymnal is not None:
+            scores = {hymn: score for hymn, score in scores.items() if wanted(hymn)}
+
+        # Titles close to the query fill in when the words alone match too few hymns
+        fuzzy = set()
+        if len(scores) < limit and len("".join(tokens)) >= 3:
+            title_weight = HYMN_FIELDS[0][1]
+            for hymn, similarity in self._similar_titles(query).items():
+                if not wanted(hymn):
+                    continue
+                if hymn not in scores:
+                    fuzzy.add(hymn)
+                    fields[hymn] = 1
+                scores[hymn] = scores.get(hymn, 0.0) + title_weight * similarity
+        numbered = [hymn for hymn in self._numbers.get(query.strip().lower(), ()) if wanted(hymn)]
+        for hymn in numbered:
+            scores[hymn] = scores.get(hymn, 0.0) + 100.0
+            fields.setdefault(hymn, 0)
+
+        best = heapq.nsmallest(limit, scores, key=lambda hymn: (-scores[hymn], hymn))
+        hits = []
+        for hymn in best:
+            hits.append({
+                **self.hymns[hymn],
+                "score": round(scores[hymn], 3),
+                "matched": [name for bit, (name, _) in enumerate(HYMN_FIELDS) if fields[hymn] >> bit & 1]
+                           + (["number"] if hymn in numbered else []),
+                "fuzzy": hymn in fuzzy,
+            })
+        return {"total": len(scores), "hits": hits}
+
+
+# Process-wide search over the Bible store's translations
+bible_search = BibleSearch(bible_store)
+# Process-wide hymn search, built at startup
+hymn_search = HymnSearch(config.HYMNS_DIR)
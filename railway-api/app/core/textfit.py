@@ -0,0 +1,280 @@
+"""
+Text measurement and font-size fitting for slide text boxes
+
+Verse and lyric boxes have a fixed size, so their font size is chosen by
+measuring the text rather than from its length. Advance widths are held in
+a NumPy array indexed by code point; every distinct word of a batch (a
+whole chapter or hymn) is measured in one vectorised pass and memoised.
+Lines are broken greedily at spaces, as PowerPoint wraps them, and text
+that does not fit at the minimum size is split across slides.
+
+Widths come from an Arial Narrow Bold compatible TrueType file through
+Pillow's ImageFont when one is available (config.TEXT_FIT_FONT or a common
+system location), otherwise from built-in Arial Bold widths condensed to
+Arial Narrow's 82%.
+"""
+import hashlib
+import math
+import os
+import threading
+import unicodedata
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import ImageFont
+
+from app.core import config
+
+# Code points held in the width table: Latin, Greek, Cyrillic and the
+# spacing modifiers (ʻokina) used by the Tongan and Hawaiian texts
+TABLE_SIZE = 0x0500
+
+# PowerPoint's single line spacing for Arial, as a multiple of the font size
+LINE_SPACING = 1.2
+
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/msttcorefonts/ARIALNB.TTF",
+    "/usr/share/fonts/truetype/msttcorefonts/Arial_Narrow_Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSansNarrow-Bold.ttf",
+    "/usr/share/fonts/liberation-sans-narrow/LiberationSansNarrow-Bold.ttf",
+    "/Library/Fonts/Arial Narrow Bold.ttf",
+    "C:/Windows/Fonts/ARIALNB.TTF",
+)
+
+# Arial Bold advance widths (1/1000 em) for ' ' through '~'
+_ARIAL_BOLD_ASCII = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556,
+    333, 333, 584, 584, 584, 611, 975,
+    722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833,
+    722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611,
+    333, 278, 333, 584, 556, 333,
+    556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889,
+    611, 611, 611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500,
+    389, 280, 389, 584,
+)
+_ARIAL_BOLD_OTHER = {
+    "\u00a0": 278, "\u02bb": 278, "\u2018": 278, "\u2019": 278, "\u201c": 500,
+    "\u201d": 500, "\u2013": 556, "\u2014": 1000, "\u2026": 1000,
+}
+_ARIAL_BOLD_DEFAULT = 556
+NARROW_SCALE = 0.82
+
+
+class FontMetrics:
+    """Advance widths in ems, with a memo of measured words
+
+    ``digest`` identifies the width table, so decks fitted with other metrics
+    are cached under other keys (see decks.deck_key).
+    """
+
+    def __init__(self, char_width: Callable[[str], float], source: str):
+        self.source = source
+        self._char_width = char_width
+        self.table = np.array([char_width(chr(c)) for c in range(TABLE_SIZE)], dtype=np.float64)
+        self.digest = hashlib.sha256(self.table.tobytes()).hexdigest()[:16]
+        self.space = float(self.table[ord(" ")])
+        self._outside: Dict[int, float] = {}
+        self._words: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_font(cls, path) -> "FontMetrics":
+        """Metrics read from a TrueType/OpenType file with Pillow"""
+        units = 2048
+        font = ImageFont.truetype(str(path), size=units)
+        return cls(lambda ch: font.getlength(ch) / units, str(path))
+
+    @classmethod
+    def builtin(cls) -> "FontMetrics":
+        """Arial Bold widths scaled to Arial Narrow, for when no font file is installed"""
+        def char_width(ch):
+            if " " <= ch <= "~":
+                width = _ARIAL_BOLD_ASCII[ord(ch) - 32]
+            elif ch in _ARIAL_BOLD_OTHER:
+                width = _ARIAL_BOLD_OTHER[ch]
+            else:
+                # Accented letters measure as their base letter
+                base = unicodedata.normalize("NFD", ch)[:1]
+                if " " <= base <= "~":
+                    width = _ARIAL_BOLD_ASCII[ord(base) - 32]
+                elif unicodedata.category(ch).startswith(("C", "M")):
+                    width = 0
+                else:
+                    width = _ARIAL_BOLD_DEFAULT
+            return width * NARROW_SCALE / 1000
+        return cls(char_width, "builtin")
+
+    def word_widths(self, words: Sequence[str]) -> np.ndarray:
+        """Width in ems of each word; words not seen before are measured in one pass"""
+        memo = self._words
+        missing = [w for w in dict.fromkeys(words) if w not in memo]
+        if missing:
+            codes = np.frombuffer("".join(missing).encode("utf-32-le"), dtype=np.uint32)
+            inside = codes < TABLE_SIZE
+            widths = self.table[np.where(inside, codes, 0)]
+            for i in np.flatnonzero(~inside):
+                widths[i] = self._outside_width(int(codes[i]))
+            lengths = np.fromiter((len(w) for w in missing), dtype=np.int64, count=len(missing))
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            sums = np.add.reduceat(widths, starts) if len(widths) else np.zeros(len(missing))
+            with self._lock:
+                memo.update(zip(missing, sums.tolist()))
+        return np.fromiter((memo[w] for w in words), dtype=np.float64, count=len(words))
+
+    def _outside_width(self, code: int) -> float:
+        width = self._outside.get(code)
+        if width is None:
+            width = self._outside[code] = self._char_width(chr(code))
+        return width
+
+
+def load_metrics(path: Optional[str] = None) -> FontMetrics:
+    """Metrics from ``path``, config.TEXT_FIT_FONT or a system font, else built in"""
+    for candidate in (path, config.TEXT_FIT_FONT, *FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            try:
+                return FontMetrics.from_font(candidate)
+            except OSError as e:
+                print(f"Error loading text-fit font {candidate}: {e}")
+    print("Text fitting: no Arial Narrow font found, using built-in metrics")
+    return FontMetrics.builtin()
+
+
+class TextBox(NamedTuple):
+    """Area available to text inside a text box (size minus insets), in points"""
+    width: float
+    height: float
+
+
+class Fit(NamedTuple):
+    size: int  # Font size in points
+    lines: int  # Wrapped lines at that size
+    fits: bool  # False when the text overflows even at the minimum size
+
+
+class TextFitter:
+    """Chooses font sizes and slide splits for text in a fixed box"""
+
+    def __init__(self, metrics: Optional[FontMetrics] = None, line_spacing: float = LINE_SPACING):
+        self._metrics = metrics
+        self.line_spacing = line_spacing
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> FontMetrics:
+        if self._metrics is None:
+            with self._lock:
+                if self._metrics is None:
+                    self._metrics = load_metrics()
+        return self._metrics
+
+    def fit(self, text: str, box: TextBox, max_size: int, min_size: int, step: int = 2) -> Fit:
+        """Largest size from ``max_size`` down to ``min_size`` at which ``text`` fits"""
+        return self.fit_all([text], box, max_size, min_size, step)[0]
+
+    def fit_all(self, texts: Sequence[str], box: TextBox, max_size: int, min_size: int,
+                step: int = 2) -> List[Fit]:
+        """``fit`` for a batch of texts, measuring all their words at once"""
+        measured = self._measure(texts)
+        sizes = list(range(max_size, min_size - 1, -step))
+        return [self._best_fit(paragraphs, box, sizes) for paragraphs in measured]
+
+    def pages(self, texts: Sequence[str], box: TextBox, max_size: int, min_size: int,
+              step: int = 2) -> List[List[Tuple[int, str]]]:
+        """For each text, the (font size, text) of every slide it needs.
+
+        A text that does not fit at ``min_size`` is split at line breaks into
+        evenly filled slides, each then sized on its own. Lines are joined
+        with spaces and paragraphs with newlines.
+        """
+        measured = self._measure(texts)
+        sizes = list(range(max_size, min_size - 1, -step))
+        result = []
+        for text, paragraphs in zip(texts, measured):
+            fit = self._best_fit(paragraphs, box, sizes)
+            if fit.fits:
+                result.append([(fit.size, text)])
+                continue
+            chunks = self._split(paragraphs, box, min_size)
+            fits = self.fit_all(chunks, box, max_size, min_size, step)
+            result.append([(f.size, chunk) for f, chunk in zip(fits, chunks)])
+        return result
+
+    def _measure(self, texts):
+        # [(words, widths)] per paragraph, per text, from one word-width pass
+        split = [[p.split() for p in text.split("\n")] for text in texts]
+        flat = [w for paragraphs in split for words in paragraphs for w in words]
+        widths = self.metrics.word_widths(flat)
+        measured, i = [], 0
+        for paragraphs in split:
+            entry = []
+            for words in paragraphs:
+                entry.append((words, widths[i:i + len(words)]))
+                i += len(words)
+            measured.append(entry)
+        return measured
+
+    def _best_fit(self, paragraphs, box, sizes) -> Fit:
+        # Binary search: line count (and so height) only shrinks with the size
+        def lines_at(size):
+            return sum(len(self._wrap(widths, box.width / size)) for _, widths in paragraphs)
+
+        def fits(size, lines):
+            return lines * size * self.line_spacing <= box.height
+
+        lo, hi = 0, len(sizes) - 1
+        best = None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            lines = lines_at(sizes[mid])
+            if fits(sizes[mid], lines):
+                best, hi = Fit(sizes[mid], lines, True), mid - 1
+            else:
+                lo = mid + 1
+        return best or Fit(sizes[-1], lines_at(sizes[-1]), False)
+
+    def _wrap(self, widths: np.ndarray, budget: float) -> List[Tuple[int, int]]:
+        """(first word, end word) of each line when ``widths`` wrap at ``budget`` ems"""
+        if not len(widths):
+            return [(0, 0)]  # An empty paragraph still takes a line
+        space = self.metrics.space
+        ends = np.cumsum(widths + space)
+        ends = np.concatenate(([0.0], ends))
+        lines, start, count = [], 0, len(widths)
+        while start < count:
+            end = int(np.searchsorted(ends, ends[start] + budget + space, side="right")) - 1
+            if end <= start:
+                # A word wider than the line breaks across several lines
+                end = start + 1
+                lines.extend([(start, start)] * (math.ceil(widths[start] / budget) - 1))
+            lines.append((start, end))
+            start = end
+        return lines
+
+    def _split(self, paragraphs, box, size) -> List[str]:
+        # Wrap at the minimum size and deal the lines out evenly over slides
+        budget = box.width / size
+        lines = []  # (paragraph index, line text)
+        for index, (words, widths) in enumerate(paragraphs):
+            for start, end in self._wrap(widths, budget):
+                if end > start or not words:
+                    lines.append((index, " ".join(words[start:end])))
+        per_slide = max(1, int(box.height // (size * self.line_spacing)))
+        slides = math.ceil(len(lines) / per_slide)
+        per_slide = math.ceil(len(lines) / slides)
+
+        chunks = []
+        for first in range(0, len(lines), per_slide):
+            text, previous = "", None
+            for index, line in lines[first:first + per_slide]:
+                if previous is not None:
+                    text += " " if index == previous else "\n"
+                text += line
+                previous = index
+            chunks.append(text)
+        return chunks
+
+
+# Process-wide fitter; the font metrics load on first use
+text_fitter = TextFitter()
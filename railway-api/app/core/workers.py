@@ -0,0 +1,149 @@
+"""
+Bounded worker pool for PPTX generation
+
+python-pptx work is synchronous and CPU bound. Running it directly inside an
+``async def`` endpoint blocks the event loop, so every other request
+(including /api/health) waits for the deck being built. Endpoints hand the
+work to this pool instead. The pool caps the number of queued jobs and
+reports saturation so the endpoint can answer 429 with a Retry-After.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import config
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the pool already has its maximum number of pending jobs"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Slide generation is busy, please retry shortly")
+        self.retry_after = retry_after
+
+
+class JobTiming:
+    """Queue wait and run time of a single job, in seconds"""
+
+    __slots__ = ("queued", "run")
+
+    def __init__(self, queued: float, run: float):
+        self.queued = queued
+        self.run = run
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers reporting this job's timing in milliseconds"""
+        return {
+            "X-Queue-Time": f"{self.queued * 1000:.1f}",
+            "X-Generation-Time": f"{self.run * 1000:.1f}",
+        }
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float, float]:
+    # Module level so it can be pickled for process pools; wall-clock times
+    # are comparable across processes.
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class GenerationPool:
+    """Thread or process pool with a cap on pending jobs"""
+
+    # Run times kept for the Retry-After estimate and the stats endpoint
+    HISTORY_SIZE = 50
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_pending: int = 16):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._history: deque = deque(maxlen=self.HISTORY_SIZE)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="generate"
+                        )
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Tuple[Any, JobTiming]:
+        """Run ``fn(*args, **kwargs)`` on the pool and return (result, timing).
+
+        Raises PoolSaturatedError without queueing when the pool already has
+        ``workers + max_pending`` jobs in flight.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise PoolSaturatedError(self._retry_after())
+            self._pending += 1
+
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self.executor, _timed_call, fn, args, kwargs
+            )
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        timing = JobTiming(max(0.0, started - submitted), finished - started)
+        with self._lock:
+            self.completed += 1
+            self._history.append(timing.run)
+        return result, timing
+
+    def _retry_after(self) -> int:
+        # Time for the queue ahead of a new job to drain, rounded up
+        average = sum(self._history) / len(self._history) if self._history else 1.0
+        return max(1, math.ceil(average * self._pending / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, load and recent job timings"""
+        with self._lock:
+            history = list(self._history)
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_run_ms": round(sum(history) / len(history) * 1000, 1) if history else None,
+                "max_run_ms": round(max(history) * 1000, 1) if history else None,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Process-wide pool shared by all generate endpoints
+generation_pool = GenerationPool(
+    config.GENERATION_EXECUTOR,
+    config.GENERATION_WORKERS,
+    config.GENERATION_QUEUE_LIMIT,
+)
@@ -1,18 +1,34 @@
 """
 FastAPI application for church service automation
 """
+import asyncio
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # Import configuration
 from app.core import config
+from app.core.assets import asset_registry
+from app.core.bible import bible_store
+from app.core.decks import deck_cache
+from app.core.images import image_store
+from app.core.jobs import job_store
+from app.core.search import bible_search, hymn_search
+from app.core import metrics
+from app.core.workers import generation_pool
 
 # Import routers
 from app.routers import (
     hymn_slides, 
     scripture_slides, 
-    call_to_worship_slides
+    call_to_worship_slides,
+    service_slides,
+    bundle_slides,
+    jobs,
+    images,
+    search,
 )
 
 # Create FastAPI app
@@ -27,12 +43,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Background-Image",
+        "X-Queue-Time",
+        "X-Generation-Time",
+        "X-Deck-Cache",
+        "ETag",
+        "Retry-After",
+        "Server-Timing",
+        "X-Section-Count",
+    ],
 )
 
+# Pool and cache counters are read at scrape time
+metrics.registry.register_stats("generation_pool", generation_pool.stats,
+                                counters=("completed", "failed", "rejected"))
+metrics.registry.register_stats("deck_cache", deck_cache.stats,
+                                counters=("hits", "disk_hits", "misses", "evictions"))
+metrics.registry.register_stats("image_store", image_store.stats,
+                                counters=("hits", "disk_hits", "misses", "evictions",
+                                          "decodes", "normalizations", "composites"))
+metrics.registry.register_stats("jobs", job_store.stats,
+                                counters=("submitted", "cancelled", "expired"))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so path parameters don't create new series
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    metrics.http_request_seconds.observe(time.perf_counter() - start,
+                                         route=path, status=response.status_code)
+    if request.headers.get("content-length"):
+        metrics.http_request_bytes.observe(int(request.headers["content-length"]), route=path)
+    if response.headers.get("content-length"):
+        metrics.http_response_bytes.observe(int(response.headers["content-length"]), route=path)
+    return response
+
 # Include routers
 app.include_router(hymn_slides.router, prefix="/api", tags=["hymn-slides"])
 app.include_router(scripture_slides.router, prefix="/api", tags=["scripture-slides"])
 app.include_router(call_to_worship_slides.router, prefix="/api", tags=["call-to-worship-slides"])
+app.include_router(service_slides.router, prefix="/api", tags=["service-slides"])
+app.include_router(bundle_slides.router, prefix="/api", tags=["bundle-slides"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(images.router, prefix="/api", tags=["images"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 
 @app.get("/")
 async def root():
@@ -40,4 +98,44 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Generation stage timings, deck sizes and pool/cache counters for Prometheus"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/workers")
+async def worker_stats():
+    """Generation pool load and recent job timings"""
+    return generation_pool.stats()
+
+@app.get("/api/decks/stats")
+async def deck_cache_stats():
+    """Hit/miss counters for the generated deck cache"""
+    return deck_cache.stats()
+
+@app.on_event("startup")
+def preload_bibles():
+    if config.BIBLE_PRELOAD:
+        bible_store.preload()
+        bible_search.preload()
+
+@app.on_event("startup")
+def build_hymn_index():
+    hymn_search.load()
+
+@app.on_event("startup")
+def load_assets():
+    # Reports any missing placeholder or background once, at boot
+    asset_registry.load(backgrounds=True)
+
+@app.on_event("startup")
+async def start_job_watchdog():
+    # Expires finished jobs and stops abandoned or overdue builds
+    app.state.job_watchdog = asyncio.create_task(job_store.watchdog())
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    generation_pool.shutdown()
+    job_store.shutdown()
@@ -0,0 +1,184 @@
+"""
+Bundle router: several separate decks in one streamed ZIP download
+
+    POST /api/generate-bundle    one deck per item, as <nn>-<label>.pptx
+
+Items are the same hymn, scripture, call to worship and liturgy specs as a
+service request, but each becomes its own deck instead of a section of one.
+Decks are built in parallel (at most one per pool worker) and each is
+written to the response as soon as it is ready, so the archive is never
+held in memory as a whole. An item that cannot be built is left out and
+reported in manifest.json, the last member, rather than failing the bundle.
+"""
+import asyncio
+import json
+import re
+import time
+import zipfile
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.core.schemas import BundleRequest
+from app.core.bible import UnknownPassageError
+from app.core.hymns import UnknownHymnError
+from app.core.images import UnknownImageError
+from app.core.jobs import JobCancelledError, job_store
+from app.core.workers import PoolSaturatedError, generation_pool
+from .slides.utils import process_background_image, render_deck
+from .slides.uploads import request_body
+from .slides.liturgy import UnknownLiturgyError
+from .service_slides import build_section
+
+router = APIRouter()
+
+MANIFEST_NAME = "manifest.json"
+# Builds left to stop at their next slide after the client went away
+_draining = set()
+
+
+class _ZipStream:
+    """Write-only sink for ZipFile; ``drain`` hands over what was written so far
+
+    Without ``tell``/``seek`` ZipFile writes each member with a trailing data
+    descriptor, so nothing already sent is ever rewritten.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_") or "deck"
+
+
+async def _resolve_backgrounds(request: BundleRequest):
+    """Each distinct background reference -> image, or the error resolving it"""
+    backgrounds, errors = {}, {}
+    for reference in {request.background_image, *(i.background_image for i in request.items)}:
+        try:
+            backgrounds[reference] = await run_in_threadpool(process_background_image, reference)
+        except UnknownImageError as e:
+            errors[reference] = str(e)
+    return backgrounds, errors
+
+
+async def _render(section, progress):
+    """Render a section, waiting out pool saturation until the bundle is cancelled"""
+    while True:
+        progress.check()
+        try:
+            return await render_deck(section.kind, section.key, section.create_slides,
+                                     *section.args, progress=progress, **section.kwargs)
+        except PoolSaturatedError as e:
+            await asyncio.sleep(e.retry_after)
+
+
+@router.post("/generate-bundle")
+async def generate_bundle_endpoint(request: BundleRequest = Depends(request_body(BundleRequest))):
+    """Generate one deck per item and stream them as a ZIP (JSON or multipart)"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail='No bundle items provided')
+    if len(request.items) > config.BUNDLE_MAX_ITEMS:
+        raise HTTPException(status_code=400,
+                            detail=f"A bundle can hold at most {config.BUNDLE_MAX_ITEMS} decks")
+
+    backgrounds, background_errors = await _resolve_backgrounds(request)
+    width = max(2, len(str(len(request.items))))
+    entries, sections = [], {}
+    for index, item in enumerate(request.items):
+        entry = {"index": index + 1, "type": item.type, "label": item.type}
+        entries.append(entry)
+        reference = item.background_image or request.background_image
+        try:
+            if reference in background_errors:
+                raise UnknownImageError(background_errors[reference])
+            section = build_section(item, backgrounds[reference], request.lead_pastor)
+        except HTTPException as e:
+            entry.update(status="failed", error=e.detail)
+            continue
+        except (UnknownHymnError, UnknownPassageError, UnknownLiturgyError, UnknownImageError) as e:
+            entry.update(status="failed", error=str(e))
+            continue
+        entry["label"] = section.label
+        entry["file"] = f"{index + 1:0{width}d}-{_slug(section.label)}.pptx"
+        sections[index] = section
+
+    async def build(index, progress):
+        """(index, deck bytes or None, seconds or None when cached, error)"""
+        try:
+            data, timing = await _render(sections[index], progress)
+            return index, data, timing.run if timing else None, None
+        except JobCancelledError as e:
+            return index, None, None, str(e)
+        except Exception as e:
+            print(f"Error building bundle deck {entries[index]['label']}: {e}")
+            return index, None, None, str(e)
+
+    async def stream():
+        started = time.time()
+        # One bundle must not take every queue slot the other endpoints share
+        limit = asyncio.Semaphore(generation_pool.workers)
+        progress = {index: job_store.new_progress() for index in sections}
+
+        async def limited(index):
+            async with limit:
+                return await build(index, progress[index])
+
+        tasks = [asyncio.ensure_future(limited(index)) for index in sections]
+        sink = _ZipStream()
+        archive = zipfile.ZipFile(sink, "w")
+        try:
+            for next_deck in asyncio.as_completed(tasks):
+                index, data, seconds, error = await next_deck
+                entry = entries[index]
+                if error is not None:
+                    entry.update(status="failed", error=error)
+                    entry.pop("file")
+                    continue
+                # Decks are already deflated; storing them keeps the bundle cheap to write
+                info = zipfile.ZipInfo(entry["file"], time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                archive.writestr(info, data)
+                entry.update(status="ok", bytes=len(data), cached=seconds is None)
+                if seconds is not None:
+                    entry["seconds"] = round(seconds, 3)
+                yield sink.drain()
+
+            manifest = {
+                "created": started,
+                "decks": sum(entry["status"] == "ok" for entry in entries),
+                "failed": sum(entry["status"] == "failed" for entry in entries),
+                "items": entries,
+            }
+            archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2), zipfile.ZIP_DEFLATED)
+            archive.close()
+            yield sink.drain()
+        finally:
+            # On disconnect, builds stop at their next slide; cancelling the
+            # tasks instead would leave the pool's pending count short
+            for index, task in zip(sections, tasks):
+                if not task.done():
+                    progress[index].cancel()
+                    _draining.add(task)
+                    task.add_done_callback(_draining.discard)
+
+    filename = f"{_slug(request.name)}.zip"
+    return StreamingResponse(stream(), media_type="application/zip", headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Section-Count": str(len(request.items)),
+    })
@@ -1,23 +1,25 @@
 """
 Call to Worship slides router for generating responsive reading PowerPoint presentations
 """
-import os
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
 from app.core.schemas import CallToWorshipRequest
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 
-from app.core.files import create_temp_file
+from app.core.images import UnknownImageError
+from app.core.jobs import slides_total
+from app.core.metrics import stage
+from app.core.workers import PoolSaturatedError
 from .slides.utils import (
     # Base presentation functions
     create_presentation, 
-    save_presentation, 
+    save_presentation,
+    deck_response,
     process_background_image,
-    set_slide_background,
-    cleanup_temp_file,
+    set_slide_backdrop,
     # Text effect functions
     add_text_glow,
     set_hanging_indent,
@@ -32,6 +34,8 @@ from .slides.utils import (
     add_run_outline,
     set_run_effects
 )
+from .slides.prototypes import SlideFactory
+from .slides.uploads import request_body
 
 router = APIRouter()
 
@@ -46,58 +50,56 @@ def create_call_to_worship_slides_from_dict(pairs_list, output_file='call_to_wor
     """
     Create Call to Worship slides from a list of dictionaries.
     Each dictionary should have 'Leader' and 'People' keys.
-    Optional background_image should be base64 encoded string.
+    Optional background_image may be base64 data, a content hash reference
+    or a background id.
     """
     # Create a presentation object
-    prs = create_presentation()
+    with stage("setup"):
+        prs = create_presentation()
     
-    # Process background image if provided, otherwise use default
-    # Process background image - always expect base64
-    background_image_path = None
-    if background_image:
-        background_image_path = process_background_image(background_image)
+    # Resolve background image (base64, content hash or background id)
+    with stage("background"):
+        background = process_background_image(background_image)
     
-    # Create a slide for each pair
-    for pair in pairs_list:
-        add_call_to_worship_slide(prs, pair['Leader'], pair['People'], background_image_path)
+    slides_total(len(pairs_list))
     
-    # Clean up temporary background image file if created
-    if background_image:
-        cleanup_temp_file(background_image_path)
+    with stage("slides"):
+        # Slides are cloned from a prototype built by add_call_to_worship_slide
+        pair_slides = SlideFactory(
+            prs,
+            lambda: add_call_to_worship_slide(prs, "Leader", "People", background)
+        )
+        
+        # Create a slide for each pair
+        for pair in pairs_list:
+            leader_text, people_text = _strip_speaker_labels(pair['Leader'], pair['People'])
+            pair_slides.add({"Content": [("Leader: ", leader_text), ("People: ", people_text)]})
     
     # Save the presentation
-    save_presentation(prs, output_file)
+    with stage("save"):
+        save_presentation(prs, output_file)
     return f"Created {len(pairs_list)} Call to Worship slides"
 
 
-def add_call_to_worship_slide(prs, leader_text, people_text, background_image_path=None):
-    """Add a Call to Worship slide with Leader/People format"""
-    # Sanitize input to remove any accidental "Leader:" or "People:" prefixes
+def _strip_speaker_labels(leader_text, people_text):
+    """Remove any accidental "Leader:" or "People:" prefixes from the input"""
     if leader_text.strip().lower().startswith("leader:"):
         leader_text = leader_text.split(':', 1)[-1].lstrip()
     if people_text.strip().lower().startswith("people:"):
         people_text = people_text.split(':', 1)[-1].lstrip()
+    return leader_text, people_text
+
+
+def add_call_to_worship_slide(prs, leader_text, people_text, background=None):
+    """Add a Call to Worship slide with Leader/People format"""
+    # Sanitize input to remove any accidental "Leader:" or "People:" prefixes
+    leader_text, people_text = _strip_speaker_labels(leader_text, people_text)
         
     slide_layout = prs.slide_layouts[6]  # Blank layout
     slide = prs.slides.add_slide(slide_layout)
     
-    # Set background
-    set_slide_background(slide, background_image_path)
-    
-    # Add flower placeholder image in top right corner
-    placeholder_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
-        'public', 'images', 'placeholders', 'flower-placholder.jpg'
-    )
-    
-    if os.path.exists(placeholder_path):
-        # Position: 9.33 inches horizontal, 0.25 inches vertical
-        left = Inches(9.33)
-        top = Inches(0.25)
-        # Size: width 3.72 inches, height 2 inches
-        width = Inches(3.72)
-        height = Inches(2)
-        slide.shapes.add_picture(placeholder_path, left, top, width=width, height=height)
+    # Set background and add flower placeholder image in top right corner
+    set_slide_backdrop(slide, background, 'call_to_worship')
     
     # Add title - LEFT ALIGNED
     title_left = Inches(0.26)  # Match hymn slide positioning
@@ -133,6 +135,7 @@ def add_call_to_worship_slide(prs, leader_text, people_text, background_image_pa
     
     # Create single text box (no background highlight)
     content_box = slide.shapes.add_textbox(content_left, content_top, content_width, content_height)
+    content_box.name = "Content"
     
     content_frame = content_box.text_frame
     content_frame.word_wrap = True
@@ -206,11 +209,15 @@ def add_call_to_worship_slide(prs, leader_text, people_text, background_image_pa
     set_run_highlight(people_text_run, color_rgb=(255, 255, 0))  # Yellow background last
     # Also set endParaRPr effects similar to template for better renderer support
     add_end_paragraph_glow_and_highlight(people_para, scheme="bg1", glow_radius_pt=10.0, highlight_rgb=(255, 255, 0))
+    
+    return slide
 
 
 @router.post("/generate-call-to-worship")
-async def generate_call_to_worship_endpoint(request: CallToWorshipRequest):
-    """Generate Call to Worship PowerPoint slides"""
+async def generate_call_to_worship_endpoint(
+        request: CallToWorshipRequest = Depends(request_body(CallToWorshipRequest)),
+        if_none_match: Optional[str] = Header(None)):
+    """Generate Call to Worship PowerPoint slides (JSON, or multipart with the background as a file)"""
     try:
         # Extract pairs and background info
         pairs = request.pairs if request.pairs else []
@@ -240,21 +247,22 @@ async def generate_call_to_worship_endpoint(request: CallToWorshipRequest):
                 # Use the whole text as a single slide
                 pairs = [{'Leader': text, 'People': ''}]
         
-        # Create temporary file for the PowerPoint
-        output_path = create_temp_file(suffix='.pptx')
-        
-        # Use background image if provided (base64 only)
-        background = background_image
-        
-        # Generate the PowerPoint
-        result = create_call_to_worship_slides_from_dict(pairs, output_path, background)
+        # Resolve background image (base64, content hash or background id)
+        background = await run_in_threadpool(process_background_image, background_image)
         
-        # Return the file
-        return FileResponse(
-            path=output_path,
-            filename="call_to_worship.pptx",
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        # Serve from the deck cache or generate on the worker pool
+        return await deck_response(
+            "call_to_worship", pairs, "call_to_worship.pptx",
+            background, if_none_match,
+            create_call_to_worship_slides_from_dict, pairs, background_image=background
         )
         
+    except HTTPException:
+        raise
+    except UnknownImageError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
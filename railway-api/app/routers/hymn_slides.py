@@ -1,30 +1,43 @@
 """
 Hymn slides router for generating hymn PowerPoint presentations
 """
-import os
 import re
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
 from app.core.schemas import HymnRequest
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 
-from app.core.files import create_temp_file
+from app.core.images import UnknownImageError
+from app.core.jobs import slide_built, slides_total
+from app.core.metrics import stage
+from app.core.textfit import TextBox, text_fitter
+from app.core.workers import PoolSaturatedError
 from .slides.utils import (
     # Base presentation functions
     create_presentation, 
-    save_presentation, 
+    save_presentation,
+    deck_response,
     process_background_image,
     set_slide_background,
-    cleanup_temp_file,
+    set_slide_backdrop,
     # Text effect functions
     add_text_glow
 )
+from .slides.prototypes import SlideFactory
+from .slides.uploads import request_body
 
 router = APIRouter()
 
+# Lyrics text area (13.33 x 4.5in box less margins) and its font size range.
+# One size is used for the whole hymn; slides that do not fit at the minimum
+# are split.
+LYRICS_BOX = TextBox(Inches(12.33).pt, Inches(4.4).pt)
+LYRICS_MAX_SIZE = 60
+LYRICS_MIN_SIZE = 40
+
 
 def format_hymn_number(hymnal, hymn_number):
     """Format hymn number with hymnal abbreviation."""
@@ -64,14 +77,14 @@ def format_copyright_info(hymn_data):
     return copyright_parts
 
 
-def add_hymn_cover_slide(prs, hymn_data, background_image_path=None):
+def add_hymn_cover_slide(prs, hymn_data, background=None):
     """
     Add a hymn cover slide to an existing presentation.
     
     Args:
         prs: PowerPoint presentation object
         hymn_data: Dict with hymn data containing title, hymn_number, hymnal, etc.
-        background_image_path: Path to background image (optional)
+        background: StoredImage or path of the background image (optional)
     
     Returns:
         The slide object that was created
@@ -81,7 +94,7 @@ def add_hymn_cover_slide(prs, hymn_data, background_image_path=None):
     slide = prs.slides.add_slide(blank_slide_layout)
     
     # Set background image
-    set_slide_background(slide, background_image_path)
+    set_slide_background(slide, background)
     
     
     # Add main title - large, centered, with glow effect
@@ -185,55 +198,66 @@ def create_hymn_slides(hymn_data, output_file='hymn_slides.pptx', background_ima
     Args:
         hymn_data: Dict containing hymn information
         output_file: Path to save the presentation
-        background_image: Background image (file path or base64 data)
+        background_image: Background image (StoredImage, base64 data, content hash or background id)
         include_cover: Whether to include a cover slide (default: True)
     """
     # Create a presentation object
-    prs = create_presentation()
+    with stage("setup"):
+        prs = create_presentation()
     
-    # Process background image - always expect base64
-    background_image_path = None
-    if background_image:
-        background_image_path = process_background_image(background_image)
+    # Resolve background image (base64, content hash or background id)
+    with stage("background"):
+        background = process_background_image(background_image)
     
     slide_count = 0
     
-    # Add cover slide if requested
-    if include_cover:
-        add_hymn_cover_slide(prs, hymn_data, background_image_path)
-        slide_count += 1
-    
-    # Process each verse/section
-    for verse_idx, verse_data in enumerate(hymn_data['lyrics']):
-        page_name = verse_data.get('page_name', '')
-        verse_text = verse_data.get('text', '')
-        
-        # Split verse text by <br> tags to create individual slides
-        slides = verse_text.split('<br>')
+    with stage("fit"):
+        # Process each verse/section
+        slide_texts = []
+        for verse_idx, verse_data in enumerate(hymn_data['lyrics']):
+            page_name = verse_data.get('page_name', '')
+            verse_text = verse_data.get('text', '')
+            
+            # Split verse text by <br> tags to create individual slides
+            slides = verse_text.split('<br>')
+            
+            for slide_idx, slide_text in enumerate(slides):
+                slide_text = slide_text.strip()
+                if not slide_text:
+                    continue
+                slide_texts.append((page_name, slide_text))
         
-        for slide_idx, slide_text in enumerate(slides):
-            slide_text = slide_text.strip()
-            if not slide_text:
-                continue
-                
+        # Size the whole hymn in one pass, at the largest size every slide fits
+        pages = text_fitter.pages([text for _, text in slide_texts],
+                                  LYRICS_BOX, LYRICS_MAX_SIZE, LYRICS_MIN_SIZE)
+        size = Pt(min((s for slide_pages in pages for s, _ in slide_pages), default=LYRICS_MAX_SIZE))
+        slides_total(sum(len(slide_pages) for slide_pages in pages) + bool(include_cover))
+    
+    with stage("slides"):
+        # Add cover slide if requested
+        if include_cover:
+            add_hymn_cover_slide(prs, hymn_data, background)
+            slide_built()
             slide_count += 1
-            add_hymn_slide(
-                prs, 
-                hymn_data, 
-                slide_text, 
-                page_name,
-                verse_idx + 1,  # Verse number (1-based)
-                slide_idx + 1,  # Slide within verse (1-based)
-                len(slides),    # Total slides in this verse
-                background_image_path
-            )
-    
-    # Clean up temporary background image file if created
-    if background_image:
-        cleanup_temp_file(background_image_path)
+        
+        # Lyric slides are cloned from a prototype built by add_hymn_slide
+        lyric_slides = SlideFactory(
+            prs,
+            lambda: add_hymn_slide(prs, hymn_data, "Lyrics", "Verse", 1, 1, 1, background)
+        )
+        title_text = hymn_data['title'].title()
+        
+        for (page_name, _), slide_pages in zip(slide_texts, pages):
+            for _, page_text in slide_pages:
+                slide_count += 1
+                lyric_slides.add({
+                    "Title": [title_text, page_name] if page_name else [title_text],
+                    "Lyrics": page_text.split('\n'),
+                }, sizes={"Lyrics": size})
     
     # Save the presentation
-    save_presentation(prs, output_file)
+    with stage("save"):
+        save_presentation(prs, output_file)
     
     # Create descriptive message
     if include_cover:
@@ -243,28 +267,13 @@ def create_hymn_slides(hymn_data, output_file='hymn_slides.pptx', background_ima
         return f"Created {slide_count} hymn slides for {hymn_data['title']}"
 
 
-def add_hymn_slide(prs, hymn_data, slide_text, page_name, verse_num, slide_in_verse, total_in_verse, background_image_path=None):
+def add_hymn_slide(prs, hymn_data, slide_text, page_name, verse_num, slide_in_verse, total_in_verse, background=None):
     """Add a hymn slide with formatting and page names"""
     slide_layout = prs.slide_layouts[6]  # Blank layout
     slide = prs.slides.add_slide(slide_layout)
     
-    # Set background
-    set_slide_background(slide, background_image_path)
-    
-    # Add hymn placeholder image in top right corner
-    placeholder_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
-        'public', 'images', 'placeholders', 'hymn-placeholder.jpg'
-    )
-    
-    if os.path.exists(placeholder_path):
-        # Position: 9.33 inches horizontal, 0.25 inches vertical
-        left = Inches(9.33)
-        top = Inches(0.25)
-        # Size: width 3.72 inches, height 2 inches
-        width = Inches(3.72)
-        height = Inches(2)
-        slide.shapes.add_picture(placeholder_path, left, top, width=width, height=height)
+    # Set background and add hymn placeholder image in top right corner
+    set_slide_backdrop(slide, background, 'hymn')
     
     # Add title with hymn information and verse indicator
     title_left = Inches(0.26)
@@ -273,6 +282,7 @@ def add_hymn_slide(prs, hymn_data, slide_text, page_name, verse_num, slide_in_ve
     title_height = Inches(2.04)
     
     title_box = slide.shapes.add_textbox(title_left, title_top, title_width, title_height)
+    title_box.name = "Title"
     title_frame = title_box.text_frame
     title_frame.word_wrap = True
     title_frame.margin_left = Inches(0.5)
@@ -315,6 +325,7 @@ def add_hymn_slide(prs, hymn_data, slide_text, page_name, verse_num, slide_in_ve
     content_height = Inches(4.5)
     
     content_box = slide.shapes.add_textbox(content_left, content_top, content_width, content_height)
+    content_box.name = "Lyrics"
     content_frame = content_box.text_frame
     content_frame.word_wrap = True
     content_frame.vertical_anchor = MSO_ANCHOR.TOP
@@ -344,95 +355,90 @@ def add_hymn_slide(prs, hymn_data, slide_text, page_name, verse_num, slide_in_ve
         
         # Add glow effect to the paragraph
         add_text_glow(p, glow_radius=6, color_rgb=(255, 255, 255))
+    
+    return slide
+
+
+def convert_verses_to_lyrics(verses):
+    """Convert verses array to lyrics format"""
+    if not verses:
+        return []
+    
+    lyrics = []
+    for i, verse in enumerate(verses):
+        if isinstance(verse, dict):
+            # Already in structured format
+            lyrics.append({
+                'page_name': verse.get('page_name', f'Verse {i+1}'),
+                'text': verse.get('text', '')
+            })
+        else:
+            # Simple string format
+            lyrics.append({
+                'page_name': f'Verse {i+1}',
+                'text': str(verse)
+            })
+    return lyrics
+
+
+def build_hymn_info(data):
+    """
+    Normalise a generate request into the hymn_data dict create_hymn_slides expects.
+    
+    Accepts the nested format from the frontend ({"hymn": {...}}) and the
+    direct format used by test scripts. All hymn data must come from the request.
+    """
+    if 'hymn' in data:
+        # Nested format from frontend
+        hymn_request = data['hymn']
+        return {
+            'title': hymn_request.get('title', 'Hymn'),
+            'hymn_number': hymn_request.get('number', ''),
+            'hymnal': hymn_request.get('hymnal', 'UMH').lower(),
+            'author': hymn_request.get('author', ''),
+            'composer': hymn_request.get('composer', ''),
+            'tune_name': hymn_request.get('tune_name', ''),
+            'text_copyright': hymn_request.get('text_copyright', ''),
+            'tune_copyright': hymn_request.get('tune_copyright', ''),
+            'lyrics': hymn_request.get('lyrics', [])
+        }
+    
+    # Direct format
+    return {
+        'title': data.get('title', 'Hymn'),
+        'hymn_number': data.get('number', ''),
+        'hymnal': data.get('hymnal', 'UMH').lower(),
+        'author': data.get('author', ''),
+        'composer': data.get('composer', ''),
+        'tune_name': data.get('tune_name', ''),
+        'text_copyright': data.get('text_copyright', data.get('copyright', '')),
+        'tune_copyright': data.get('tune_copyright', ''),
+        'lyrics': data.get('lyrics', convert_verses_to_lyrics(data.get('verses', [])))
+    }
 
 
 @router.post("/generate-hymn-slides")
-async def generate_hymn_slides_endpoint(data: Dict[str, Any]):
-    """Generate hymn PowerPoint slides"""
+async def generate_hymn_slides_endpoint(data: Dict[str, Any] = Depends(request_body()),
+                                        if_none_match: Optional[str] = Header(None)):
+    """Generate hymn PowerPoint slides (JSON, or multipart with the background as a file)"""
     try:
-        # Check if hymn data is nested under 'hymn' key (from frontend)
-        if 'hymn' in data:
-            hymn_request = data['hymn']
-            title = hymn_request.get('title', 'Hymn')
-            number = hymn_request.get('number', '')
-            hymnal = hymn_request.get('hymnal', 'UMH').lower()
-            # For nested format, lyrics come with the hymn
-            lyrics_from_request = hymn_request.get('lyrics', [])
-        else:
-            # Direct format (from test scripts)
-            title = data.get('title', 'Hymn')
-            number = data.get('number', '')
-            hymnal = data.get('hymnal', 'UMH').lower()
-            lyrics_from_request = data.get('lyrics', [])
-        
-        background_image = data.get('background_image')
-        
-        # Convert verses to lyrics format if needed
-        def convert_verses_to_lyrics(verses):
-            """Convert verses array to lyrics format"""
-            if not verses:
-                return []
-            
-            lyrics = []
-            for i, verse in enumerate(verses):
-                if isinstance(verse, dict):
-                    # Already in structured format
-                    lyrics.append({
-                        'page_name': verse.get('page_name', f'Verse {i+1}'),
-                        'text': verse.get('text', '')
-                    })
-                else:
-                    # Simple string format
-                    lyrics.append({
-                        'page_name': f'Verse {i+1}',
-                        'text': str(verse)
-                    })
-            return lyrics
-        
-        # All hymn data must come from the request
-        if 'hymn' in data:
-            # Nested format from frontend
-            hymn_request = data['hymn']
-            hymn_info = {
-                'title': hymn_request.get('title', 'Hymn'),
-                'hymn_number': hymn_request.get('number', ''),
-                'hymnal': hymn_request.get('hymnal', 'UMH').lower(),
-                'author': hymn_request.get('author', ''),
-                'composer': hymn_request.get('composer', ''),
-                'tune_name': hymn_request.get('tune_name', ''),
-                'text_copyright': hymn_request.get('text_copyright', ''),
-                'tune_copyright': hymn_request.get('tune_copyright', ''),
-                'lyrics': hymn_request.get('lyrics', [])
-            }
-        else:
-            # Direct format
-            hymn_info = {
-                'title': data.get('title', 'Hymn'),
-                'hymn_number': data.get('number', ''),
-                'hymnal': data.get('hymnal', 'UMH').lower(),
-                'author': data.get('author', ''),
-                'composer': data.get('composer', ''),
-                'tune_name': data.get('tune_name', ''),
-                'text_copyright': data.get('text_copyright', data.get('copyright', '')),
-                'tune_copyright': data.get('tune_copyright', ''),
-                'lyrics': data.get('lyrics', convert_verses_to_lyrics(data.get('verses', [])))
-            }
-        
-        # Create temporary file for the PowerPoint
-        output_path = create_temp_file(suffix='.pptx')
-        
-        # Use background image if provided (base64 only)
-        background = background_image
+        hymn_info = build_hymn_info(data)
         
-        # Generate the PowerPoint
-        result = create_hymn_slides(hymn_info, output_path, background)
+        # Resolve background image (base64, content hash or background id)
+        background = await run_in_threadpool(process_background_image, data.get('background_image'))
         
-        # Return the file
-        return FileResponse(
-            path=output_path,
-            filename=f"hymn_{hymnal}_{number}.pptx",
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        # Serve from the deck cache or generate on the worker pool
+        return await deck_response(
+            "hymn", hymn_info,
+            f"hymn_{hymn_info['hymnal']}_{hymn_info['hymn_number']}.pptx",
+            background, if_none_match,
+            create_hymn_slides, hymn_info, background_image=background
         )
         
+    except UnknownImageError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
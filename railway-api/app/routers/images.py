@@ -0,0 +1,49 @@
+"""
+Images router for pre-uploading background images to the content-addressed store
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+
+from app.core.schemas import ImageUploadRequest
+from app.core.images import image_store
+from .slides.uploads import store_upload
+
+router = APIRouter()
+
+
+@router.post("/images")
+async def upload_image_endpoint(request: Request):
+    """Store an image and return the reference to use as background_image
+
+    Accepts JSON ({"image": "<base64>"}) or multipart/form-data with the
+    image as a raw ``image`` file part.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        try:
+            upload = form.get("image")
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(status_code=400, detail="Expected an 'image' file part")
+            image = await store_upload(upload)
+        finally:
+            await form.close()
+        return {"id": image.reference, "size": len(image)}
+
+    try:
+        body = ImageUploadRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    try:
+        image = image_store.from_base64(body.image)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
+
+    return {"id": image.reference, "size": len(image)}
+
+
+@router.get("/images/stats")
+async def image_stats_endpoint():
+    """Hit/miss counters for the background image store"""
+    return image_store.stats()
@@ -0,0 +1,236 @@
+"""
+Job router: submit a deck, follow its progress, download it when ready
+
+The synchronous /api/generate-* endpoints hold the connection open while a
+deck builds. Here the build runs as a background job instead:
+
+    POST   /api/jobs                 submit a service request (one or more items)
+    GET    /api/jobs/{id}            status with slides built / total
+    GET    /api/jobs/{id}/events     the same, streamed as Server-Sent Events
+    GET    /api/jobs/{id}/download   the finished deck
+    DELETE /api/jobs/{id}            cancel a build or discard a finished deck
+
+A build is cancelled when its last event stream disconnects, when nobody has
+polled it for JOB_ABANDON_SECONDS, or at JOB_DEADLINE_SECONDS. Finished decks
+are kept for JOB_TTL_SECONDS.
+"""
+import asyncio
+import json
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.schemas import ServiceRequest
+from app.core.bible import UnknownPassageError
+from app.core.decks import deck_cache
+from app.core.hymns import UnknownHymnError
+from app.core.images import UnknownImageError
+from app.core.jobs import (
+    DONE,
+    FAILED,
+    RUNNING,
+    Job,
+    JobCancelledError,
+    UnknownJobError,
+    job_store,
+)
+from app.core.metrics import observe_generation
+from app.core.workers import PoolSaturatedError, generation_pool
+from .slides.utils import pptx_response, render_deck
+from .slides.liturgy import UnknownLiturgyError
+from .slides.uploads import request_body
+from .slides.merge import SourceDeck, merge_decks
+from .service_slides import build_sections, service_key
+
+router = APIRouter()
+
+# How often an event stream checks its job for progress
+PROGRESS_INTERVAL = 0.25
+# Comment line sent on an idle stream so proxies keep it open
+KEEPALIVE_INTERVAL = 15.0
+
+
+async def _until_admitted(job, run, *args, **kwargs):
+    """Await ``run`` on the pool, waiting out saturation instead of failing the job"""
+    while True:
+        try:
+            return await run(*args, **kwargs)
+        except PoolSaturatedError as e:
+            await asyncio.sleep(e.retry_after)
+            if job.done:
+                raise JobCancelledError("Job was cancelled")
+
+
+async def run_job(job: Job, sections):
+    """Render a job's sections (merging them for a multi-item service)"""
+    if job.done:
+        # Cancelled before the task started
+        return
+    job.set_status(RUNNING)
+    try:
+        key = sections[0].key if len(sections) == 1 else service_key(sections)
+        pptx_data = deck_cache.get(key)
+        if pptx_data is not None:
+            job.progress[0].finish(len(SourceDeck(pptx_data).slide_partnames()))
+            for progress in job.progress[1:]:
+                progress.finish(0)
+        else:
+            # One job must not take every queue slot the other endpoints share
+            limit = asyncio.Semaphore(generation_pool.workers)
+
+            async def render(section, progress):
+                try:
+                    async with limit:
+                        progress.check()
+                        data, timing = await _until_admitted(
+                            job, render_deck, section.kind, section.key, section.create_slides,
+                            *section.args, progress=progress, **section.kwargs
+                        )
+                except Exception:
+                    # The job has failed: stop the other sections at their next slide
+                    for other in job.progress:
+                        other.cancel()
+                    raise
+                if timing is None:
+                    progress.finish(len(SourceDeck(data).slide_partnames()))
+                return data
+
+            decks = await asyncio.gather(*(
+                render(section, progress) for section, progress in zip(sections, job.progress)
+            ))
+            if len(decks) == 1:
+                pptx_data = decks[0]
+            else:
+                pptx_data, merge_timing = await _until_admitted(job, generation_pool.run, merge_decks, decks)
+                observe_generation("service", merge_timing)
+                deck_cache.put(key, pptx_data)
+
+        if not job.done:
+            job.data, job.key = pptx_data, key
+            job.set_status(DONE)
+    except JobCancelledError:
+        # Status and reason were set by whoever cancelled the job
+        pass
+    except Exception as e:
+        print(f"Error running job {job.id}: {e}")
+        if not job.done:
+            job.set_status(FAILED, str(e))
+
+
+def _filename(sections):
+    if len(sections) > 1:
+        return "service.pptx"
+    return re.sub(r"[^A-Za-z0-9]+", "_", sections[0].label).strip("_") + ".pptx"
+
+
+def _links(job: Job):
+    base = f"/api/jobs/{job.id}"
+    return {"status": base, "events": f"{base}/events", "download": f"{base}/download"}
+
+
+def _get_job(job_id: str) -> Job:
+    try:
+        job = job_store.get(job_id)
+    except UnknownJobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    job.touch()
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: ServiceRequest = Depends(request_body(ServiceRequest))):
+    """Start generating a deck in the background and return the job's links (JSON or multipart)"""
+    try:
+        sections = await build_sections(request)
+    except HTTPException:
+        raise
+    except (UnknownHymnError, UnknownPassageError, UnknownLiturgyError, UnknownImageError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job = job_store.add(Job(
+        "service" if len(sections) > 1 else sections[0].kind,
+        [section.label for section in sections],
+        _filename(sections),
+        [job_store.new_progress() for _ in sections],
+    ))
+    job.task = asyncio.create_task(run_job(job, sections))
+    links = _links(job)
+    return JSONResponse({**job.snapshot(), "links": links}, status_code=202,
+                        headers={"Location": links["status"]})
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status of a job, with slides built and expected so far"""
+    job = _get_job(job_id)
+    return {**job.snapshot(), "links": _links(job)}
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Stream a job's progress as Server-Sent Events.
+
+    A ``progress`` event is sent whenever the slide counts or status change,
+    then one final ``done``, ``failed`` or ``cancelled`` event. Disconnecting
+    before the job finishes cancels it, unless another stream is still open.
+    """
+    job = _get_job(job_id)
+
+    async def stream():
+        job.watchers += 1
+        last = None
+        idle = 0.0
+        try:
+            while True:
+                job.touch()
+                snapshot = job.snapshot()
+                if job.done:
+                    yield _event(job.status, snapshot)
+                    return
+                current = (snapshot["status"], snapshot["built"], snapshot["total"])
+                if current != last:
+                    last, idle = current, 0.0
+                    yield _event("progress", snapshot)
+                elif idle >= KEEPALIVE_INTERVAL:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+                if await request.is_disconnected():
+                    return
+                await asyncio.sleep(PROGRESS_INTERVAL)
+                idle += PROGRESS_INTERVAL
+        finally:
+            job.watchers -= 1
+            if not job.done and not job.watchers:
+                job_store.cancel(job.id, "Client went away")
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_job(job_id: str):
+    """The finished deck; 409 while the job is still running or if it did not finish"""
+    job = _get_job(job_id)
+    if job.status != DONE:
+        detail = f"Job is {job.status}" + (f": {job.error}" if job.error else "")
+        raise HTTPException(status_code=409, detail=detail)
+    return pptx_response(job.data, job.filename, {"ETag": f'"{job.key}"'})
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a running job, or discard a finished one's deck"""
+    job = _get_job(job_id)
+    if job.done:
+        job_store.remove(job.id)
+    else:
+        job_store.cancel(job.id)
+    return job.snapshot()
@@ -1,29 +1,44 @@
 """
 Scripture slides router for generating Bible verse PowerPoint presentations
 """
-import os
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from typing import List, Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 
 from app.core.schemas import ScriptureSlideRequest
-from app.core.files import create_temp_file
+from app.core.bible import UnknownPassageError, bible_store
+from app.core.images import UnknownImageError
+from app.core.jobs import slides_total
+from app.core.metrics import stage
+from app.core.textfit import TextBox, text_fitter
+from app.core.workers import PoolSaturatedError
 from .slides.utils import (
     # Base presentation functions
     create_presentation,
     save_presentation,
+    deck_response,
     process_background_image,
-    set_slide_background,
-    cleanup_temp_file,
+    set_slide_backdrop,
     # Text effect functions
     add_text_glow
 )
+from .slides.prototypes import SlideFactory
+from .slides.uploads import request_body
 
 router = APIRouter()
 
+# Translation used for reference-only requests that name no version
+DEFAULT_VERSION = "nrsvue"
+
+# Verse text area (13.33 x 5.0in box less margins) and its font size range;
+# verses that do not fit at the minimum continue on another slide
+VERSE_BOX = TextBox(Inches(12.33).pt, Inches(4.9).pt)
+VERSE_MAX_SIZE = 58
+VERSE_MIN_SIZE = 32
+
 
 def _get_book_name(book_code: str, is_tongan: bool = False) -> str:
     """Convert book code to readable book name
@@ -78,127 +93,169 @@ def create_scripture_slides(
     reference: Dict[str, str],
     verses: List[Dict[str, str]],
     output_file: str = "scripture_slides.pptx",
-    background_image: str | None = None,
+    background_image=None,
     verses_alt: List[Dict[str, str]] | None = None,
+    translation_labels: Tuple[str, str] = ("NRSVUE", "TMB"),
 ) -> str:
     """Create scripture slides.
 
     reference: { 'book': 'PS', 'chapter': 23 }
     verses: list of { 'verse': int, 'text': str } - primary translation (NRSVUE)
     verses_alt: optional list of { 'verse': int, 'text': str } - alternate translation (TMB) for combined mode
+    translation_labels: labels shown for verses and verses_alt in combined mode
+    """
+    book, chapter = reference['book'], reference['chapter']
+    
+    # If verses_alt is provided, we're in combined mode - alternate between translations
+    if verses_alt:
+        entries = (
+            (book, chapter, verse_num, list(zip(texts, translation_labels)))
+            for verse_num, texts in _combine_translations([verses, verses_alt])
+        )
+    else:
+        # Single translation mode - one slide per verse, no label
+        entries = (
+            (book, chapter, v.get("verse"), [(v.get("text", "").strip(), None)])
+            for v in verses
+        )
+    
+    slide_count = _write_verse_slides(entries, output_file, background_image, translation_labels[0])
+    return f"Created {slide_count} scripture slides"
+
+
+def create_passage_slides(
+    passages: List[Dict[str, object]],
+    output_file: str = "scripture_slides.pptx",
+    background_image=None,
+    versions: Tuple[str, ...] = ("nrsvue",),
+) -> str:
+    """Create one deck covering several passages, reading the text from the Bible store.
+
+    passages: list of { 'book', 'chapter', 'start_verse', 'end_chapter', 'end_verse' }
+        (see schemas.Passage); a passage may span chapters of one book
+    versions: one translation, or two for combined mode (alternating slides)
+    """
+    labels = [v.upper() for v in versions] if len(versions) > 1 else [None]
+    
+    def entries():
+        for passage in passages:
+            for book, chapter, chapter_verses in _passage_chapters(passage, versions):
+                for verse_num, texts in _combine_translations(chapter_verses):
+                    yield book, chapter, verse_num, list(zip(texts, labels))
+    
+    slide_count = _write_verse_slides(entries(), output_file, background_image, labels[0])
+    return f"Created {slide_count} scripture slides"
+
+
+def passage_chapters(passage: Dict[str, object]) -> List[Tuple[int, Optional[int], Optional[int]]]:
+    """(chapter, first verse, last verse) for each chapter a passage touches.
+
+    None for a verse bound means the start or end of that chapter.
+    """
+    first, last = passage['chapter'], passage.get('end_chapter') or passage['chapter']
+    return [
+        (
+            chapter,
+            passage.get('start_verse') if chapter == first else None,
+            passage.get('end_verse') if chapter == last else None,
+        )
+        for chapter in range(first, last + 1)
+    ]
+
+
+def _passage_chapters(passage, versions):
+    # Verse lists of each version for every chapter of the passage
+    book = passage['book'].upper()
+    for chapter, start, end in passage_chapters(passage):
+        numbers = bible_store.verse_numbers(versions[0], book, chapter)
+        if not numbers:
+            continue
+        # Clamp to the verses the chapter has, whatever bounds the client sent
+        span = [(max(start or numbers[0], numbers[0]), min(end or numbers[-1], numbers[-1]))]
+        yield book, chapter, [bible_store.verses(v, book, chapter, span) for v in versions]
+
+
+def _combine_translations(translations):
+    """(verse number, [text per translation]) for each verse of the primary translation.
+
+    Verses missing from a secondary translation get an empty text, and
+    verses only present in a secondary translation are dropped.
+    """
+    primary, *others = [
+        {v.get("verse"): v.get("text", "").strip() for v in verses if v.get("verse")}
+        for verses in translations
+    ]
+    for verse_num in sorted(primary):
+        yield verse_num, [primary[verse_num]] + [o.get(verse_num, "") for o in others]
+
+
+def _write_verse_slides(entries, output_file, background_image, prototype_label) -> int:
+    """Add one slide per (book, chapter, verse, [(text, label), ...]) entry and save.
+
+    Each text gets its own slide, titled with its label; empty texts are
+    skipped. Returns the number of slides written.
     """
-    prs = create_presentation()
+    with stage("setup"):
+        prs = create_presentation()
 
-    # Process background image - always expect base64
-    background_image_path = None
-    if background_image:
-        background_image_path = process_background_image(background_image)
+    # Resolve background image (base64, content hash or background id)
+    with stage("background"):
+        background = process_background_image(background_image)
 
     # No default background - frontend should always provide one
 
     slide_count = 0
+    book, chapter = None, None
 
-    # If verses_alt is provided, we're in combined mode - alternate between translations
-    if verses_alt:
-        # Create a mapping of verse numbers to both translations
-        verse_map = {}
-        for v in verses:
-            verse_num = v.get("verse")
-            if verse_num:
-                verse_map[verse_num] = {"nrsvue": v.get("text", "").strip(), "tmb": ""}
-        
-        for v in verses_alt:
-            verse_num = v.get("verse")
-            if verse_num and verse_num in verse_map:
-                verse_map[verse_num]["tmb"] = v.get("text", "").strip()
-        
-        # Generate slides alternating between translations for each verse
-        for verse_num in sorted(verse_map.keys()):
-            texts = verse_map[verse_num]
-            
-            # First slide: NRSVUE
-            if texts["nrsvue"]:
-                slide_layout = prs.slide_layouts[6]
-                slide = prs.slides.add_slide(slide_layout)
-                set_slide_background(slide, background_image_path)
-                
-                # Add scripture placeholder image in top right corner
-                placeholder_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
-                    'public', 'images', 'placeholders', 'scripture-placeholder.jpg'
-                )
-                
-                if os.path.exists(placeholder_path):
-                    # Position: 9.33 inches horizontal, 0.25 inches vertical
-                    left = Inches(9.33)
-                    top = Inches(0.25)
-                    # Size: width 3.72 inches, height 2 inches
-                    width = Inches(3.72)
-                    height = Inches(2)
-                    slide.shapes.add_picture(placeholder_path, left, top, width=width, height=height)
-                
-                _add_verse_content(slide, reference['book'], reference['chapter'], verse_num, texts["nrsvue"], "NRSVUE")
-                slide_count += 1
-            
-            # Second slide: TMB
-            if texts["tmb"]:
-                slide_layout = prs.slide_layouts[6]
-                slide = prs.slides.add_slide(slide_layout)
-                set_slide_background(slide, background_image_path)
-                
-                # Add scripture placeholder image in top right corner
-                placeholder_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
-                    'public', 'images', 'placeholders', 'scripture-placeholder.jpg'
-                )
-                
-                if os.path.exists(placeholder_path):
-                    # Position: 9.33 inches horizontal, 0.25 inches vertical
-                    left = Inches(9.33)
-                    top = Inches(0.25)
-                    # Size: width 3.72 inches, height 2 inches
-                    width = Inches(3.72)
-                    height = Inches(2)
-                    slide.shapes.add_picture(placeholder_path, left, top, width=width, height=height)
-                
-                _add_verse_content(slide, reference['book'], reference['chapter'], verse_num, texts["tmb"], "TMB")
-                slide_count += 1
-    else:
-        # Single translation mode - use verses as before
-        for v in verses:
-            verse_num = v.get("verse")
-            text = v.get("text", "").strip()
-            if not text:
-                continue
-
-            # Create exactly one slide per verse
-            slide_layout = prs.slide_layouts[6]
-            slide = prs.slides.add_slide(slide_layout)
-            set_slide_background(slide, background_image_path)
-            
-            # Add scripture placeholder image in top right corner
-            placeholder_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
-                'public', 'images', 'placeholders', 'scripture-placeholder.jpg'
-            )
-            
-            if os.path.exists(placeholder_path):
-                # Position: 9.33 inches horizontal, 0.25 inches vertical
-                left = Inches(9.33)
-                top = Inches(0.25)
-                # Size: width 3.72 inches, height 2 inches
-                width = Inches(3.72)
-                height = Inches(2)
-                slide.shapes.add_picture(placeholder_path, left, top, width=width, height=height)
-            
-            _add_verse_content(slide, reference['book'], reference['chapter'], verse_num, text, None)
-            slide_count += 1
+    # Verse slides are cloned from a prototype built by add_scripture_slide
+    # for the first entry
+    verse_slides = SlideFactory(
+        prs,
+        lambda: add_scripture_slide(prs, book, chapter, 1, "Verse", prototype_label, background)
+    )
+
+    # Size every verse of the deck in one pass (reading the text for passages)
+    with stage("fit"):
+        entries = list(entries)
+        pages = text_fitter.pages(
+            [text for *_, texts in entries for text, _ in texts if text],
+            VERSE_BOX, VERSE_MAX_SIZE, VERSE_MIN_SIZE
+        )
+        slides_total(sum(len(verse_pages) for verse_pages in pages))
+        pages = iter(pages)
 
-    if background_image:
-        cleanup_temp_file(background_image_path)
+    with stage("slides"):
+        for book, chapter, verse_num, texts in entries:
+            for text, translation_label in texts:
+                if not text:
+                    continue
+                book_name = _get_book_name(book, translation_label == "TMB")
+                title = [f"{book_name} {chapter}:{verse_num}"]
+                if translation_label:
+                    title.append(translation_label)
+                for size, page_text in next(pages):
+                    verse_slides.add({"Title": title, "Verse": [page_text]}, sizes={"Verse": Pt(size)})
+                    slide_count += 1
 
-    save_presentation(prs, output_file)
-    return f"Created {slide_count} scripture slides"
+    with stage("save"):
+        save_presentation(prs, output_file)
+    return slide_count
+
+
+def add_scripture_slide(prs, book, chapter, verse_num, text, translation_label=None, background=None):
+    """Add a single verse slide with background and scripture placeholder image"""
+    slide_layout = prs.slide_layouts[6]
+    slide = prs.slides.add_slide(slide_layout)
+    # Set background and add scripture placeholder image in top right corner
+    set_slide_backdrop(slide, background, 'scripture')
+    
+    _add_verse_content(slide, book, chapter, verse_num, text, translation_label)
+    return slide
+
+
+def _verse_font_size(text):
+    """Largest font size at which the verse text fits its box"""
+    return Pt(text_fitter.fit(text, VERSE_BOX, VERSE_MAX_SIZE, VERSE_MIN_SIZE).size)
 
 
 def _add_verse_content(slide, book, chapter, verse_num, text, translation_label=None):
@@ -210,6 +267,7 @@ def _add_verse_content(slide, book, chapter, verse_num, text, translation_label=
     title_height = Inches(1.2)
 
     title_box = slide.shapes.add_textbox(title_left, title_top, title_width, title_height)
+    title_box.name = "Title"
     title_frame = title_box.text_frame
     title_frame.word_wrap = True
     title_frame.margin_left = Inches(0.5)
@@ -247,6 +305,7 @@ def _add_verse_content(slide, book, chapter, verse_num, text, translation_label=
     content_height = Inches(5.0)
 
     content_box = slide.shapes.add_textbox(content_left, content_top, content_width, content_height)
+    content_box.name = "Verse"
     content_frame = content_box.text_frame
     content_frame.word_wrap = True
     content_frame.vertical_anchor = MSO_ANCHOR.MIDDLE  # Center vertically
@@ -260,44 +319,99 @@ def _add_verse_content(slide, book, chapter, verse_num, text, translation_label=
     p.alignment = PP_ALIGN.CENTER
     p.font.name = "Arial Narrow"
     # Dynamically adjust font size based on text length
-    if len(text) > 300:
-        p.font.size = Pt(36)
-    elif len(text) > 200:
-        p.font.size = Pt(44)
-    elif len(text) > 100:
-        p.font.size = Pt(52)
-    else:
-        p.font.size = Pt(58)
+    p.font.size = _verse_font_size(text)
     p.font.bold = True
     p.font.color.rgb = RGBColor(0, 0, 0)
     add_text_glow(p, glow_radius=6, color_rgb=(255, 255, 255))
 
 
+def request_passages(request: ScriptureSlideRequest) -> List[Dict[str, object]]:
+    """Passages named by a reference-only request.
+
+    Uses ``passages`` when given; otherwise one passage per verse range of
+    ``reference`` (the whole chapter without ranges). Raises
+    UnknownPassageError for a chapter missing from the Bible store.
+    """
+    if request.passages:
+        passages = [p.model_dump() for p in request.passages]
+    elif request.reference:
+        book, chapter = request.reference['book'], int(request.reference['chapter'])
+        passages = [
+            {"book": book, "chapter": chapter, "start_verse": r.start,
+             "end_chapter": None, "end_verse": r.end if r.end is not None else r.start}
+            for r in request.verse_ranges
+        ] if request.verse_ranges else [
+            {"book": book, "chapter": chapter, "start_verse": None,
+             "end_chapter": None, "end_verse": None}
+        ]
+    else:
+        raise UnknownPassageError("No reference or passages given")
+
+    # Check every version and chapter up front so errors surface before generation
+    versions = [v.lower() for v in (request.versions or [DEFAULT_VERSION])]
+    for version in versions:
+        bible_store.version(version)
+    verse_count = 0
+    for passage in passages:
+        passage['book'] = passage['book'].upper()
+        for chapter, start, end in passage_chapters(passage):
+            numbers = bible_store.verse_numbers(versions[0], passage['book'], chapter)
+            verse_count += sum(
+                1 for n in numbers
+                if (start is None or n >= start) and (end is None or n <= end)
+            )
+    if not verse_count:
+        raise UnknownPassageError("No verses found for the requested passages")
+    return passages
+
+
 @router.post("/generate-scripture-slides")
-async def generate_scripture_slides_endpoint(request: ScriptureSlideRequest):
-    """Generate scripture slides"""
+async def generate_scripture_slides_endpoint(
+        request: ScriptureSlideRequest = Depends(request_body(ScriptureSlideRequest)),
+        if_none_match: Optional[str] = Header(None)):
+    """Generate scripture slides (JSON, or multipart with the background as a file)"""
     try:
-        # Create temporary file for the PowerPoint
-        output_path = create_temp_file(suffix='.pptx')
+        if request.verses is None:
+            # Reference-only request: the worker reads the text from the Bible store
+            versions = tuple(v.lower() for v in (request.versions or [DEFAULT_VERSION]))
+            if len(versions) > 2:
+                raise HTTPException(status_code=400, detail='At most two versions can be combined')
+            passages = request_passages(request)
+            
+            background = await run_in_threadpool(process_background_image, request.background_image)
+            return await deck_response(
+                "passages", {"passages": passages, "versions": versions}, "scripture.pptx",
+                background, if_none_match,
+                create_passage_slides, passages, background_image=background, versions=versions
+            )
         
-        # Use background image if provided (base64 only)
-        background = request.background_image
+        # Resolve background image (base64, content hash or background id)
+        background = await run_in_threadpool(process_background_image, request.background_image)
         
-        # Generate the PowerPoint
-        create_scripture_slides(
+        # Serve from the deck cache or generate on the worker pool
+        params = {
+            "reference": request.reference,
+            "verses": request.verses,
+            "verses_alt": request.verses_alt,
+        }
+        return await deck_response(
+            "scripture", params, "scripture.pptx",
+            background, if_none_match,
+            create_scripture_slides,
             reference=request.reference,
             verses=request.verses,
-            output_file=output_path,
-            background_image=request.background_image,
+            background_image=background,
             verses_alt=request.verses_alt
         )
         
-        # Return the file
-        return FileResponse(
-            path=output_path,
-            filename="scripture.pptx",
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        )
-        
+    except HTTPException:
+        raise
+    except UnknownPassageError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UnknownImageError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
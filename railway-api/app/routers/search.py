@@ -0,0 +1,63 @@
+"""
+Search router: find scripture by phrase, and hymns by words, title or number
+
+    GET /api/search/bible?q=the lord is my shepherd[&version=nrsvue&version=tmb][&limit=20]
+    GET /api/search/hymns?q=amazing grace[&hymnal=umh][&limit=20]
+
+Bible hits are ranked per translation (all of them unless ``version`` is
+given). Each carries the body /api/generate-scripture-slides accepts for
+that verse, so a result can be turned into slides as is. Hymn hits carry
+the hymnal and number to load the hymn by.
+"""
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+
+from app.core.bible import UnknownPassageError, bible_store
+from app.core.hymns import UnknownHymnError
+from app.core.search import bible_search, hymn_search
+
+router = APIRouter()
+
+
+def _search_versions(query, versions, limit):
+    return [bible_search.search(query, version, limit) for version in versions]
+
+
+@router.get("/search/bible")
+async def search_bible(q: str = Query(..., min_length=1, description="Words or a phrase to find"),
+                       version: Optional[List[str]] = Query(None, description="Translations to search"),
+                       limit: int = Query(20, ge=1, le=100, description="Hits per translation")):
+    """Verses containing every word of ``q``, exact phrases first, per translation"""
+    versions = [v.lower() for v in version] if version else list(bible_store.versions)
+    start = time.perf_counter()
+    try:
+        # The first search of a translation opens (or builds) its index
+        results = await run_in_threadpool(_search_versions, q, versions, limit)
+    except UnknownPassageError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    for result in results:
+        for hit in result["hits"]:
+            hit["reference"] = f"{hit['book_name']} {hit['chapter']}:{hit['verse']}"
+            hit["request"] = {
+                "passages": [{"book": hit["book"], "chapter": hit["chapter"], "start_verse": hit["verse"],
+                              "end_chapter": None, "end_verse": hit["verse"]}],
+                "versions": [result["version"]],
+            }
+    return {"query": q, "took_ms": round((time.perf_counter() - start) * 1000, 2), "results": results}
+
+
+@router.get("/search/hymns")
+async def search_hymns(q: str = Query(..., min_length=1, description="Words, a title or a hymn number"),
+                       hymnal: Optional[str] = Query(None, description="umh, thb or fws"),
+                       limit: int = Query(20, ge=1, le=100)):
+    """Hymns matching ``q`` in their title, lyrics, author, composer or tune name"""
+    start = time.perf_counter()
+    try:
+        results = hymn_search.search(q, hymnal, limit)
+    except UnknownHymnError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"query": q, "took_ms": round((time.perf_counter() - start) * 1000, 3), **results}
@@ -0,0 +1,192 @@
+"""
+Whole-service router: one merged deck for an entire order of worship
+"""
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.schemas import ScriptureSlideRequest, ServiceItem, ServiceRequest
+from app.core.bible import UnknownPassageError
+from app.core.decks import deck_cache, deck_key, etag_matches
+from app.core.hymns import UnknownHymnError, hymn_store
+from app.core.images import UnknownImageError
+from app.core.metrics import observe_generation
+from app.core.workers import PoolSaturatedError, generation_pool
+from .slides.utils import (
+    pptx_response,
+    process_background_image,
+    render_deck,
+)
+from .slides.uploads import request_body
+from .slides.liturgy import UnknownLiturgyError, create_liturgy_slides, template_digest
+from .slides.merge import merge_decks
+from .hymn_slides import create_hymn_slides
+from .scripture_slides import DEFAULT_VERSION, create_passage_slides, request_passages
+from .call_to_worship_slides import create_call_to_worship_slides_from_dict
+
+router = APIRouter()
+
+
+class ServiceSection:
+    """One item of the service, ready to render (or fetch from the deck cache)"""
+
+    __slots__ = ("label", "kind", "key", "create_slides", "args", "kwargs")
+
+    def __init__(self, label, kind, params, background, create_slides, *args, **kwargs):
+        self.label = label
+        self.kind = kind
+        # Same kind and params as the single-item endpoints, so the deck cache is shared
+        self.key = deck_key(kind, params, background)
+        self.create_slides = create_slides
+        self.args = args
+        self.kwargs = kwargs
+
+
+def build_section(item: ServiceItem, background, lead_pastor) -> ServiceSection:
+    """
+    Validate one service item and describe how to render it.
+
+    Raises HTTPException (400) for an incomplete item and the store's lookup
+    error for a hymn, passage or template that does not exist.
+    """
+    kind = item.type.lower()
+
+    if kind == "hymn":
+        if not item.hymnal or item.number is None:
+            raise HTTPException(status_code=400, detail="Hymn items need a hymnal and number")
+        hymn_info = dict(hymn_store.get(item.hymnal, item.number))
+        hymn_info['hymnal'] = str(hymn_info.get('hymnal') or item.hymnal).lower()
+        return ServiceSection(
+            f"hymn {hymn_info['hymnal']} {item.number}", "hymn", hymn_info, background,
+            create_hymn_slides, hymn_info, background_image=background
+        )
+
+    if kind == "scripture":
+        versions = tuple(v.lower() for v in (item.versions or [DEFAULT_VERSION]))
+        if len(versions) > 2:
+            raise HTTPException(status_code=400, detail='At most two versions can be combined')
+        passages = request_passages(ScriptureSlideRequest(
+            reference=item.reference, verse_ranges=item.verse_ranges,
+            passages=item.passages, versions=list(versions),
+        ))
+        first = passages[0]
+        return ServiceSection(
+            f"scripture {first['book']} {first['chapter']}", "passages",
+            {"passages": passages, "versions": versions}, background,
+            create_passage_slides, passages, background_image=background, versions=versions
+        )
+
+    if kind == "call_to_worship":
+        if not item.pairs:
+            raise HTTPException(status_code=400, detail="Call to worship items need pairs")
+        return ServiceSection(
+            "call_to_worship", "call_to_worship", item.pairs, background,
+            create_call_to_worship_slides_from_dict, item.pairs, background_image=background
+        )
+
+    if kind == "liturgy":
+        if not item.name:
+            raise HTTPException(status_code=400, detail="Liturgy items need a template name")
+        fields = {"lead_pastor": lead_pastor}
+        # Templates carry their own artwork, so the background is not used
+        params = {"name": item.name, "template": template_digest(item.name), "fields": fields}
+        return ServiceSection(
+            item.name, "liturgy", params, None,
+            create_liturgy_slides, item.name, fields
+        )
+
+    raise HTTPException(status_code=400, detail=f"Unknown service item type '{item.type}'")
+
+
+async def build_sections(request: ServiceRequest):
+    """Resolve the backgrounds of a service request and build its sections"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail='No service items provided')
+
+    # Resolve each distinct background once (base64, content hash or background id)
+    backgrounds = {}
+    for reference in {request.background_image, *(i.background_image for i in request.items)}:
+        backgrounds[reference] = await run_in_threadpool(process_background_image, reference)
+
+    return [
+        build_section(item, backgrounds[item.background_image or request.background_image],
+                      request.lead_pastor)
+        for item in request.items
+    ]
+
+
+def service_key(sections) -> str:
+    """The service deck is identified by its sections' keys"""
+    return deck_key("service", [section.key for section in sections])
+
+
+async def render_sections(sections):
+    """
+    Render every section concurrently, at most one per pool worker at a time.
+
+    Returns a list of (deck bytes, timing) in service order; timing is None
+    for a section served from the deck cache.
+    """
+    # One service must not take every queue slot the other endpoints share
+    limit = asyncio.Semaphore(generation_pool.workers)
+
+    async def render(section):
+        async with limit:
+            return await render_deck(section.kind, section.key, section.create_slides,
+                                     *section.args, **section.kwargs)
+
+    return await asyncio.gather(*(render(section) for section in sections))
+
+
+def service_timing_header(sections, results, merge_timing):
+    """Server-Timing value with each section's generation time and the merge"""
+    entries = []
+    for i, (section, (_, timing)) in enumerate(zip(sections, results), 1):
+        if timing is None:
+            entries.append(f'section-{i};desc="{section.label} (cached)";dur=0')
+        else:
+            entries.append(f'section-{i};desc="{section.label}";dur={timing.run * 1000:.1f}')
+    entries.append(f'merge;dur={merge_timing.run * 1000:.1f}')
+    return ", ".join(entries)
+
+
+@router.post("/generate-service-slides")
+async def generate_service_slides_endpoint(
+        request: ServiceRequest = Depends(request_body(ServiceRequest)),
+        if_none_match: Optional[str] = Header(None)):
+    """Generate one deck for a whole service, in order of worship (JSON or multipart)"""
+    try:
+        sections = await build_sections(request)
+        key = service_key(sections)
+        headers = {"ETag": f'"{key}"', "X-Section-Count": str(len(sections))}
+        if etag_matches(if_none_match, headers["ETag"], key in deck_cache):
+            return Response(status_code=304, headers=headers)
+
+        pptx_data = deck_cache.get(key)
+        if pptx_data is not None:
+            headers["X-Deck-Cache"] = "hit"
+            return pptx_response(pptx_data, "service.pptx", headers)
+
+        results = await render_sections(sections)
+        pptx_data, merge_timing = await generation_pool.run(
+            merge_decks, [data for data, _ in results]
+        )
+        observe_generation("service", merge_timing)
+        deck_cache.put(key, pptx_data)
+
+        headers["Server-Timing"] = service_timing_header(sections, results, merge_timing)
+        headers["X-Deck-Cache"] = "miss"
+        return pptx_response(pptx_data, "service.pptx", headers)
+
+    except HTTPException:
+        raise
+    except (UnknownHymnError, UnknownPassageError, UnknownLiturgyError, UnknownImageError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,10 +3,22 @@ from .utils import (
     # Base presentation functions
     create_presentation,
     save_presentation,
+    render_presentation,
+    render_timed,
+    pptx_response,
+    deck_response,
+    render_deck,
+    PPTX_MEDIA_TYPE,
     process_background_image,
+    generation_headers,
     set_slide_background,
+    add_stored_picture,
+    add_placeholder_image,
+    set_slide_backdrop,
     cleanup_temp_file,
     # Text effect functions
+    effect_element,
+    effect_list_element,
     add_text_glow,
     add_text_outline,
     add_text_highlight,
@@ -19,4 +31,20 @@ from .utils import (
     add_run_outline,
     set_run_effects,
     add_end_paragraph_glow_and_highlight,
-)
\ No newline at end of file
+)
+from .package import (
+    SaveProfile,
+    SAVE_PROFILE,
+    write_package,
+)
+from .merge import (
+    merge_decks,
+    DeckMerger,
+    SourceDeck,
+)
+from .liturgy import (
+    UnknownLiturgyError,
+    liturgy_names,
+    create_liturgy_slides,
+    fill_template_fields,
+)
@@ -0,0 +1,95 @@
+"""
+Static liturgy decks (doxology, gloria patri, benediction, ...)
+
+Each ``app/templates/<name>.pptx`` is a finished deck. The only per-service
+content is ``{field}`` placeholders such as ``{lead_pastor}``, which
+PowerPoint tends to split over several runs ('{', 'lead_pastor', '}'), so
+they are filled in per paragraph while keeping the formatting of the run the
+placeholder starts in.
+"""
+import copy
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from pptx import Presentation
+
+from app.core import config
+from .utils import save_presentation
+
+_FIELD = re.compile(r"\{(\w+)\}")
+
+
+class UnknownLiturgyError(LookupError):
+    """Raised for a liturgy item with no template"""
+
+
+def liturgy_names() -> List[str]:
+    """Names of the available liturgy templates"""
+    return sorted(path.stem for path in config.TEMPLATES_DIR.glob("*.pptx"))
+
+
+@lru_cache(maxsize=None)
+def _template_path(name):
+    if name not in liturgy_names():
+        raise UnknownLiturgyError(f"Unknown liturgy item '{name}'")
+    return config.TEMPLATES_DIR / f"{name}.pptx"
+
+
+@lru_cache(maxsize=None)
+def template_digest(name) -> str:
+    """SHA-256 of a template file, so cached decks follow template edits"""
+    return hashlib.sha256(_template_path(name).read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _pristine_template(name):
+    # Parsed once per process; never modified, only deep-copied
+    return Presentation(str(_template_path(name)))
+
+
+def create_liturgy_slides(name, fields: Optional[Dict[str, str]] = None, output_file=None):
+    """Write the ``name`` template with its ``{field}`` placeholders filled in"""
+    prs = copy.deepcopy(_pristine_template(name))
+    if fields:
+        fill_template_fields(prs, fields)
+    return save_presentation(prs, output_file)
+
+
+def fill_template_fields(prs, fields: Dict[str, str]) -> None:
+    """Replace ``{field}`` placeholders in every text frame of ``prs``.
+
+    Unknown fields are left as they are.
+    """
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                for paragraph in shape.text_frame.paragraphs:
+                    _fill_paragraph(paragraph, fields)
+
+
+def _fill_paragraph(paragraph, fields):
+    runs = paragraph.runs
+    text = "".join(run.text for run in runs)
+    if "{" not in text:
+        return
+
+    # Right to left, so earlier offsets stay valid as runs change length
+    for match in reversed([m for m in _FIELD.finditer(text) if m.group(1) in fields]):
+        start, end = match.span()
+        offset = 0
+        first = True
+        for run in runs:
+            run_text = run.text
+            run_start, run_end = offset, offset + len(run_text)
+            offset = run_end
+            if run_end <= start or run_start >= end:
+                continue
+            head = run_text[:max(0, start - run_start)]
+            tail = run_text[end - run_start:] if end < run_end else ""
+            if first:
+                run.text = head + str(fields[match.group(1)]) + tail
+                first = False
+            else:
+                run.text = tail
@@ -0,0 +1,221 @@
+"""
+Merge several decks into one presentation
+
+Slides are spliced into the first deck at the package level: each source
+deck is read straight from its zip (slide XML, relationships and part
+blobs) rather than loaded through python-pptx, so its masters, layouts and
+themes are never parsed. Copied slides keep their shapes, background and
+transitions, use the destination layout of the same name (Blank when there
+is none), and have their relationship ids remapped. Nothing is re-rendered.
+
+Binary parts (pictures, media, HD photos) are de-duplicated by SHA-256
+across the whole merged deck, so a background shared by every section is
+stored once and the merged size grows with unique media, not with the
+number of sections.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, XmlPart
+from pptx.opc.packuri import PackURI
+from pptx.oxml import parse_xml
+from pptx.parts.image import ImagePart
+
+from .utils import save_presentation
+
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PR_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+_P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+
+# Relationships that belong to the source deck rather than the slide content
+_SKIPPED_RELS = {RT.SLIDE_LAYOUT, RT.NOTES_SLIDE}
+
+BLANK_LAYOUT = 6
+
+
+def merge_decks(decks: Iterable[bytes], output_file=None):
+    """Concatenate the slides of ``decks`` (.pptx bytes) in order.
+
+    The first deck provides the slide size, theme and layouts. Returns the
+    merged deck as bytes unless ``output_file`` is given.
+    """
+    decks = list(decks)
+    if not decks:
+        raise ValueError("No decks to merge")
+
+    merger = DeckMerger(Presentation(io.BytesIO(decks[0])))
+    for data in decks[1:]:
+        merger.append(data)
+    return merger.save(output_file)
+
+
+class SourceDeck:
+    """A .pptx read at the package level: part blobs, content types and relationships"""
+
+    def __init__(self, data: bytes):
+        self._zip = zipfile.ZipFile(io.BytesIO(data))
+        types = etree.fromstring(self._zip.read("[Content_Types].xml"))
+        self._defaults = {e.get("Extension").lower(): e.get("ContentType")
+                          for e in types.iter(f"{_CT_NS}Default")}
+        self._overrides = {e.get("PartName"): e.get("ContentType")
+                           for e in types.iter(f"{_CT_NS}Override")}
+
+    def blob(self, partname: str) -> bytes:
+        return self._zip.read(partname.lstrip("/"))
+
+    def content_type(self, partname: str) -> str:
+        if partname in self._overrides:
+            return self._overrides[partname]
+        return self._defaults[posixpath.splitext(partname)[1][1:].lower()]
+
+    def rels(self, partname: str) -> List[Tuple[str, str, str, bool]]:
+        """(rId, reltype, target, is_external) for each relationship of a part.
+
+        Internal targets are resolved to absolute partnames.
+        """
+        directory, name = posixpath.split(partname)
+        try:
+            xml = self._zip.read(posixpath.join(directory, "_rels", f"{name}.rels").lstrip("/"))
+        except KeyError:
+            return []
+        rels = []
+        for rel in etree.fromstring(xml).iter(f"{_PR_NS}Relationship"):
+            target = rel.get("Target")
+            external = rel.get("TargetMode") == "External"
+            if not external:
+                target = posixpath.normpath(posixpath.join(directory, target))
+            rels.append((rel.get("Id"), rel.get("Type"), target, external))
+        return rels
+
+    def slide_partnames(self) -> List[str]:
+        """Slide partnames in presentation order"""
+        targets = {rId: target for rId, _, target, _ in self.rels("/ppt/presentation.xml")}
+        presentation = etree.fromstring(self.blob("/ppt/presentation.xml"))
+        return [targets[sld_id.get(f"{_R_NS}id")]
+                for sld_id in presentation.iter(f"{_P_NS}sldId")]
+
+    def layout_name(self, slide_partname: str) -> Optional[str]:
+        """Name of the layout a slide uses"""
+        for _, reltype, target, _ in self.rels(slide_partname):
+            if reltype == RT.SLIDE_LAYOUT:
+                c_sld = etree.fromstring(self.blob(target)).find(f"{_P_NS}cSld")
+                return c_sld.get("name") if c_sld is not None else None
+        return None
+
+
+class DeckMerger:
+    """Appends the slides of other decks to a python-pptx presentation"""
+
+    def __init__(self, prs):
+        self.prs = prs
+        self.package = prs.part.package
+        self._layouts = {layout.name: layout for layout in prs.slide_layouts}
+        self._blank = prs.slide_layouts[BLANK_LAYOUT]
+        self._partnames = set()
+        # SHA-256 of every binary part in the destination -> that part
+        self._media: Dict[str, Part] = {}
+        for part in self.package.iter_parts():
+            self._partnames.add(part.partname)
+            if not isinstance(part, XmlPart):
+                self._media.setdefault(hashlib.sha256(part.blob).hexdigest(), part)
+        self.media_added = 0
+        self.media_reused = 0
+
+    def append(self, data: bytes) -> int:
+        """Append every slide of a .pptx; returns the number of slides added"""
+        source = SourceDeck(data)
+        # Source partname -> destination part, so parts shared by slides are copied once
+        copied: Dict[str, Part] = {}
+        slides = source.slide_partnames()
+        for partname in slides:
+            layout = self._layouts.get(source.layout_name(partname), self._blank)
+            self._copy_slide(source, partname, layout, copied)
+        return len(slides)
+
+    def save(self, output_file=None):
+        return save_presentation(self.prs, output_file)
+
+    def _copy_slide(self, source, partname, layout, copied):
+        slide = self.prs.slides.add_slide(layout)
+        self._partnames.add(slide.part.partname)
+        rids = self._copy_rels(source, partname, slide.part, copied)
+
+        # Swap in the source slide's content; the layout's placeholders go with it
+        element = parse_xml(source.blob(partname))
+        _remap_rids(element, rids)
+        target = slide._element
+        for child in list(target):
+            target.remove(child)
+        for child in element:
+            target.append(child)
+        for name, value in element.attrib.items():
+            target.set(name, value)
+        return slide
+
+    def _copy_rels(self, source, partname, new_part, copied) -> Dict[str, str]:
+        # Relate new_part to copies of the source part's targets; returns old -> new rIds
+        rids = {}
+        for rId, reltype, target, external in source.rels(partname):
+            if reltype in _SKIPPED_RELS:
+                continue
+            if external:
+                rids[rId] = new_part.relate_to(target, reltype, is_external=True)
+            else:
+                rids[rId] = new_part.relate_to(self._import_part(source, target, copied), reltype)
+        return rids
+
+    def _import_part(self, source, partname, copied) -> Part:
+        part = copied.get(partname)
+        if part is not None:
+            return part
+
+        content_type = source.content_type(partname)
+        blob = source.blob(partname)
+        if _is_xml(content_type):
+            # e.g. a chart; its own relationships are copied too
+            part = XmlPart(self._next_partname(partname), content_type, self.package,
+                           parse_xml(blob))
+            copied[partname] = part
+            rids = self._copy_rels(source, partname, part, copied)
+            _remap_rids(part._element, rids)
+            return part
+
+        digest = hashlib.sha256(blob).hexdigest()
+        part = self._media.get(digest)
+        if part is not None:
+            self.media_reused += 1
+        else:
+            part_class = ImagePart if content_type.startswith("image/") else Part
+            part = part_class(self._next_partname(partname), content_type, self.package, blob)
+            self._media[digest] = part
+            self.media_added += 1
+        copied[partname] = part
+        return part
+
+    def _next_partname(self, partname: str) -> PackURI:
+        # e.g. /ppt/media/image3.png -> first free /ppt/media/imageN.png
+        template = re.sub(r"\d*(\.\w+)$", r"%d\1", partname)
+        n = 1
+        while template % n in self._partnames:
+            n += 1
+        self._partnames.add(template % n)
+        return PackURI(template % n)
+
+
+def _is_xml(content_type: str) -> bool:
+    return content_type.endswith("+xml") or content_type.endswith("/xml")
+
+
+def _remap_rids(element, rids):
+    for node in element.iter():
+        for name, value in node.attrib.items():
+            if name.startswith(_R_NS) and value in rids:
+                node.set(name, rids[value])
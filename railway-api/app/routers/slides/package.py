@@ -0,0 +1,135 @@
+"""
+Fast .pptx writer with per-part compression
+
+``prs.save`` deflates every part at zlib's default level, including JPEG and
+PNG media that are already compressed, so a deck dominated by a large
+background spends most of its save time re-compressing the image for no
+gain. ``write_package`` writes the same package (same members, in the same
+order, starting with [Content_Types].xml) but stores pre-compressed media
+as is and deflates XML at the profile's level. Zip timestamps are fixed, so
+the same deck always produces the same bytes.
+"""
+import time
+import zipfile
+from typing import Dict
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+
+from app.core import config
+
+# Formats that deflate cannot shrink any further
+PRECOMPRESSED_TYPES = frozenset({
+    CT.JPEG, CT.PNG, CT.GIF, "image/jpg", "image/webp",
+    CT.MP4, CT.MOV, CT.MPG, CT.VIDEO, "audio/mpeg",
+})
+
+# Reporting categories for the parts of a deck
+PART_TYPES = {
+    CT.PML_SLIDE: "slide",
+    CT.PML_SLIDE_LAYOUT: "layout",
+    CT.PML_SLIDE_MASTER: "master",
+    CT.PML_NOTES_SLIDE: "notes",
+    CT.PML_NOTES_MASTER: "notes",
+    CT.OFC_THEME: "theme",
+}
+
+# Earliest zip timestamp; any fixed value keeps the output deterministic
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class SaveProfile:
+    """How ``write_package`` compresses each part"""
+
+    __slots__ = ("xml_level", "store_media")
+
+    def __init__(self, xml_level: int = 6, store_media: bool = True):
+        self.xml_level = xml_level
+        self.store_media = store_media
+
+    def __repr__(self) -> str:
+        return f"SaveProfile(xml_level={self.xml_level}, store_media={self.store_media})"
+
+
+# Profile used by save_presentation in "fast" mode
+SAVE_PROFILE = SaveProfile(config.SAVE_XML_LEVEL, config.SAVE_STORE_MEDIA)
+
+
+def part_type(content_type: str) -> str:
+    """Reporting category of a part: media, slide, layout, master, notes, theme, rels or other"""
+    if content_type.startswith(("image/", "video/", "audio/")):
+        return "media"
+    if content_type == CT.OPC_RELATIONSHIPS:
+        return "rels"
+    return PART_TYPES.get(content_type, "other")
+
+
+class PartStats:
+    """Size before and after compression, and time spent writing, for one part type"""
+
+    __slots__ = ("parts", "raw", "stored", "seconds")
+
+    def __init__(self):
+        self.parts = 0
+        self.raw = 0
+        self.stored = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"parts": self.parts, "raw": self.raw, "stored": self.stored, "seconds": self.seconds}
+
+
+class _PackageZip:
+    """Zip archive of a package, compressing each member by its content type"""
+
+    def __init__(self, file, profile: SaveProfile):
+        self._zip = zipfile.ZipFile(file, "w")
+        self._profile = profile
+        self.stats: Dict[str, PartStats] = {}
+
+    def write(self, pack_uri, blob: bytes, content_type: str) -> None:
+        start = time.perf_counter()
+        info = zipfile.ZipInfo(pack_uri.membername, ZIP_EPOCH)
+        info.external_attr = 0o600 << 16
+        if self._profile.store_media and content_type in PRECOMPRESSED_TYPES:
+            info.compress_type = zipfile.ZIP_STORED
+            self._zip.writestr(info, blob)
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self._zip.writestr(info, blob, compresslevel=self._profile.xml_level)
+
+        stats = self.stats.get(part_type(content_type))
+        if stats is None:
+            stats = self.stats[part_type(content_type)] = PartStats()
+        stats.parts += 1
+        stats.raw += len(blob)
+        stats.stored += info.compress_size
+        stats.seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def write_package(prs, file, profile: SaveProfile = SAVE_PROFILE) -> Dict[str, PartStats]:
+    """
+    Write ``prs`` to a path or file-like object, compressing parts per ``profile``.
+
+    Mirrors python-pptx's PackageWriter: content types first, then the
+    package rels, then each part followed by its rels. Returns PartStats
+    by part type.
+    """
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+    writer = _PackageZip(file, profile)
+    try:
+        writer.write(CONTENT_TYPES_URI, serialize_part_xml(_ContentTypesItem.xml_for(parts)), CT.XML)
+        writer.write(PACKAGE_URI.rels_uri, package._rels.xml, CT.OPC_RELATIONSHIPS)
+        for part in parts:
+            writer.write(part.partname, part.blob, part.content_type)
+            if part._rels:
+                writer.write(part.partname.rels_uri, part.rels.xml, CT.OPC_RELATIONSHIPS)
+    finally:
+        writer.close()
+    return writer.stats
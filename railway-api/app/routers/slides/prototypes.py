@@ -0,0 +1,189 @@
+"""
+Prototype slide engine
+
+Each slide kind (hymn lyrics, scripture verse, call to worship) is built once
+per presentation with the regular builder functions. That slide becomes the
+prototype: later slides are produced by deep-copying its shape tree and
+swapping in new text, instead of rebuilding every textbox, font property and
+effect from scratch.
+
+Text is addressed by slot, the name of the textbox shape holding it. A slot
+value is a list of paragraphs; each paragraph is either a string (the text
+of a single-run paragraph) or a tuple with one string per run. Paragraph
+``i`` is cloned from the prototype's paragraph ``i`` in that slot, or from
+its last paragraph when there are more values than templates. A ``\n`` or
+``\v`` in a value becomes a line break, as it does with python-pptx's
+``paragraph.text``.
+"""
+import copy
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+from app.core.jobs import slide_built
+
+ParagraphValue = Union[str, Sequence[str]]
+
+# Relationship attributes that may point at slide-level rels (images, links)
+_REL_ATTRS = (qn('r:embed'), qn('r:link'), qn('r:id'))
+# Characters python-pptx turns into <a:br/> when setting paragraph text
+_LINE_BREAKS = re.compile("\n|\v")
+
+
+class SlidePrototype:
+    """A fully styled slide whose XML is cloned to produce new slides"""
+
+    def __init__(self, slide):
+        self._layout = slide.slide_layout
+        cSld = slide._element.cSld
+        self._bg = copy.deepcopy(cSld.bg) if cSld.bg is not None else None
+        self._sp_tree = copy.deepcopy(slide.shapes._spTree)
+        self._rels = [
+            (rel.rId, rel.reltype, rel.target_part)
+            for rel in slide.part.rels.values()
+            if rel.reltype != RT.SLIDE_LAYOUT and not rel.is_external
+        ]
+        self._paragraphs: Dict[str, list] = {}
+        for sp in self._sp_tree.iter(qn('p:sp')):
+            txBody = sp.find(qn('p:txBody'))
+            if txBody is not None:
+                name = sp.find(qn('p:nvSpPr')).find(qn('p:cNvPr')).get('name')
+                self._paragraphs[name] = txBody.findall(qn('a:p'))
+
+    @property
+    def slots(self) -> List[str]:
+        """Names of the text slots this prototype can fill"""
+        return list(self._paragraphs)
+
+    def stamp(self, slides, slots: Dict[str, List[ParagraphValue]],
+              sizes: Optional[Dict[str, object]] = None):
+        """Append a copy of the prototype to ``slides`` and fill in its text"""
+        slide = slides.add_slide(self._layout)
+        rId_map = {}
+        for rId, reltype, target_part in self._rels:
+            new_rId = slide.part.relate_to(target_part, reltype)
+            if new_rId != rId:
+                rId_map[rId] = new_rId
+
+        if self._bg is not None:
+            bg = copy.deepcopy(self._bg)
+            if rId_map:
+                _remap_rels(bg, rId_map)
+            slide._element.cSld.insert(0, bg)
+
+        sp_tree = slide.shapes._spTree
+        # Skip nvGrpSpPr/grpSpPr, which every new slide already has
+        for shape in self._sp_tree[2:]:
+            shape = copy.deepcopy(shape)
+            if rId_map:
+                _remap_rels(shape, rId_map)
+            sp_tree.append(shape)
+
+        self.fill(slide, slots, sizes)
+        return slide
+
+    def fill(self, slide, slots: Dict[str, List[ParagraphValue]],
+             sizes: Optional[Dict[str, object]] = None) -> None:
+        """Replace the paragraphs of each named slot on ``slide``.
+
+        ``sizes`` optionally maps a slot name to a font size (a python-pptx
+        Length such as ``Pt(44)``) applied to every paragraph in that slot.
+        """
+        sizes = sizes or {}
+        for sp in slide.shapes._spTree.iter(qn('p:sp')):
+            name = sp.find(qn('p:nvSpPr')).find(qn('p:cNvPr')).get('name')
+            if name not in slots:
+                continue
+            txBody = sp.find(qn('p:txBody'))
+            for p in txBody.findall(qn('a:p')):
+                txBody.remove(p)
+            templates = self._paragraphs[name]
+            size = sizes.get(name)
+            for i, value in enumerate(slots[name]):
+                p = copy.deepcopy(templates[min(i, len(templates) - 1)])
+                _set_paragraph_text(p, value)
+                if size is not None:
+                    _set_paragraph_size(p, size)
+                txBody.append(p)
+
+
+class SlideFactory:
+    """Produces slides of one kind for a single presentation.
+
+    The first call to ``add`` runs ``build`` (a regular builder that adds a
+    slide containing every slot) and captures the result as the prototype;
+    that slide is then filled with the first set of values. Every later
+    call stamps a copy of the prototype.
+    """
+
+    def __init__(self, prs, build: Callable[[], object]):
+        self._slides = prs.slides
+        self._build = build
+        self.prototype: Optional[SlidePrototype] = None
+
+    def add(self, slots: Dict[str, List[ParagraphValue]],
+            sizes: Optional[Dict[str, object]] = None):
+        if self.prototype is None:
+            slide = self._build()
+            self.prototype = SlidePrototype(slide)
+            self.prototype.fill(slide, slots, sizes)
+        else:
+            slide = self.prototype.stamp(self._slides, slots, sizes)
+        slide_built()
+        return slide
+
+
+def _set_paragraph_text(p, value: ParagraphValue) -> None:
+    runs = p.findall(qn('a:r'))
+    if isinstance(value, str):
+        if not value:
+            # Match python-pptx, which adds no run for an empty paragraph
+            for r in runs:
+                p.remove(r)
+            return
+        value = (value,)
+    for i, r in enumerate(runs):
+        if i < len(value):
+            _set_run_text(p, r, value[i])
+        else:
+            p.remove(r)
+
+
+def _set_run_text(p, r, text: str) -> None:
+    """Set the text of run ``r``, splitting it at line breaks like ``p.text``
+
+    Each line after the first goes into a copy of ``r`` (keeping its
+    formatting) after an ``<a:br/>``; lines that would be empty get no run.
+    """
+    lines = _LINE_BREAKS.split(text)
+    r.text = lines[0]
+    anchor = r
+    for line in lines[1:]:
+        br = OxmlElement('a:br')
+        anchor.addnext(br)
+        anchor = br
+        if line:
+            run = copy.deepcopy(r)
+            run.text = line
+            anchor.addnext(run)
+            anchor = run
+    if not lines[0]:
+        p.remove(r)
+
+
+def _set_paragraph_size(p, size) -> None:
+    pPr = p.find(qn('a:pPr'))
+    defRPr = pPr.find(qn('a:defRPr')) if pPr is not None else None
+    if defRPr is not None:
+        defRPr.set('sz', str(int(round(size.pt * 100))))
+
+
+def _remap_rels(element, rId_map: Dict[str, str]) -> None:
+    for node in element.iter():
+        for attr in _REL_ATTRS:
+            rId = node.get(attr)
+            if rId in rId_map:
+                node.set(attr, rId_map[rId])
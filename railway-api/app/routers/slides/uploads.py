@@ -0,0 +1,102 @@
+"""
+Generate request bodies sent as JSON or as multipart/form-data
+
+JSON bodies carry the background as a base64 string, which is a third larger
+than the image and is held several times over while it is parsed and
+decoded. A multipart body sends the same request as a JSON ``request`` field
+plus the image as a raw ``background_image`` file part. Starlette's parser
+streams file parts to a spooled temporary file, and the image is read from
+there into the image store in chunks, hashed as it goes.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional, Type
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from starlette.datastructures import UploadFile
+
+from app.core import config
+from app.core.images import StoredImage, image_store
+
+REQUEST_FIELD = "request"
+IMAGE_FIELD = "background_image"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# A url-encoded form is accepted too, for a request without a file part
+FORM_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+
+
+async def store_upload(upload: UploadFile) -> StoredImage:
+    """Read an uploaded image into the image store in chunks"""
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > config.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413,
+                                detail=f"Background image is larger than {config.UPLOAD_MAX_BYTES} bytes")
+        digest.update(chunk)
+        chunks.append(chunk)
+    if not size:
+        raise HTTPException(status_code=400, detail="Background image file is empty")
+    return image_store.put(b"".join(chunks), digest.hexdigest())
+
+
+async def read_form(request: Request) -> Dict[str, Any]:
+    """The JSON ``request`` field of a form body, with any uploaded image stored
+
+    The image's ``sha256:<digest>`` reference takes the place of the
+    ``background_image`` value, so the rest of the pipeline is unchanged. A
+    text ``background_image`` part (a background id or content hash) is
+    passed through as is.
+    """
+    form = await request.form()
+    try:
+        try:
+            payload = json.loads(form.get(REQUEST_FIELD) or "{}")
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid '{REQUEST_FIELD}' field: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=400, detail=f"'{REQUEST_FIELD}' must be a JSON object")
+
+        image = form.get(IMAGE_FIELD)
+        if isinstance(image, UploadFile):
+            payload[IMAGE_FIELD] = (await store_upload(image)).reference
+        elif image:
+            payload[IMAGE_FIELD] = image
+        return payload
+    finally:
+        await form.close()
+
+
+def request_body(model: Optional[Type[BaseModel]] = None):
+    """
+    Dependency parsing a generate request from JSON or multipart/form-data.
+
+    Returns an instance of ``model``, or the plain dict when no model is
+    given. Validation errors get the same 422 response as a declared body.
+    """
+    async def parse(request: Request):
+        content_type = request.headers.get("content-type", "")
+        try:
+            if content_type.startswith(FORM_TYPES):
+                payload = await read_form(request)
+                return model.model_validate(payload) if model else payload
+            body = await request.body()
+            if model:
+                return model.model_validate_json(body)
+            payload = json.loads(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+        return payload
+
+    return parse
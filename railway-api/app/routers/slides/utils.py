@@ -1,16 +1,51 @@
+import io
 import os
-import base64
+import copy
+import re
 import tempfile
+import time
+from functools import lru_cache
+from urllib.parse import quote
+from fastapi.responses import Response
 from pptx import Presentation
 from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.image import Image as PptxImage, ImagePart
 from pptx.util import Inches
 from pptx.dml.color import RGBColor
 
+from app.core import config
+from app.core.assets import asset_registry
+from app.core.decks import deck_cache, deck_key, etag_matches
+from app.core.images import StoredImage, UnknownImageError, image_store
+from app.core.jobs import track_progress
+from app.core.metrics import (
+    background_resolve_seconds,
+    collect_stages,
+    count_slides,
+    observe_generation,
+    record_parts,
+)
+from app.core.workers import generation_pool
+from .package import write_package
+
 
 # Base presentation functions
 
 def create_presentation(width=Inches(13.33), height=Inches(7.5)):
-    """Create a new PowerPoint presentation with specified dimensions"""
+    """Create a new PowerPoint presentation with specified dimensions
+
+    Returns a deep copy of a pristine presentation that is parsed and sized
+    once per process, instead of reopening python-pptx's default template
+    (theme, master and 11 layouts) for every deck.
+    """
+    return copy.deepcopy(_pristine_presentation(width, height))
+
+
+@lru_cache(maxsize=None)
+def _pristine_presentation(width, height):
+    # Never modified after creation; only ever deep-copied
     prs = Presentation()
     
     # Set slide dimensions (16:9 widescreen by default)
@@ -20,54 +55,181 @@ def create_presentation(width=Inches(13.33), height=Inches(7.5)):
     return prs
 
 
-def save_presentation(prs, output_file):
-    """Save presentation to file"""
-    prs.save(output_file)
-    return output_file
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def save_presentation(prs, output_file=None):
+    """Save presentation to a path or file-like object.
+
+    With no ``output_file`` the deck is written to memory and returned as bytes.
+    In the default "fast" SAVE_MODE media is stored uncompressed and XML is
+    deflated at SAVE_XML_LEVEL (see package.py); "standard" uses ``prs.save``.
+    """
+    count_slides(len(prs.slides))
+    target = io.BytesIO() if output_file is None else output_file
+    if config.SAVE_MODE == "standard":
+        prs.save(target)
+    else:
+        stats = write_package(prs, target)
+        record_parts({name: part.as_dict() for name, part in stats.items()})
+    return target.getvalue() if output_file is None else output_file
+
+
+def render_presentation(create_slides, *args, **kwargs):
+    """Run a ``create_*_slides`` function against an in-memory file and return the deck bytes.
+
+    Module level (and returning plain bytes) so it can be dispatched to the
+    worker pool, including a process pool.
+    """
+    buffer = io.BytesIO()
+    create_slides(*args, output_file=buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def render_timed(create_slides, *args, progress=None, **kwargs):
+    """``render_presentation`` that also returns the job's StageTimer.
+
+    The stage spans travel back with the bytes, so they reach the metrics
+    registry of the API process even from a process pool. Slide progress is
+    reported to ``progress`` (a jobs.JobProgress) when one is given.
+    """
+    with collect_stages() as timer, track_progress(progress):
+        pptx_data = render_presentation(create_slides, *args, **kwargs)
+    if progress is not None:
+        progress.finish(timer.slides)
+    return pptx_data, timer
+
+
+def content_disposition(filename):
+    """``attachment`` Content-Disposition for ``filename``
+
+    Names that need quoting (hymn numbers come from the client) are sent as
+    an RFC 5987 ``filename*``, with a slugged ASCII ``filename`` fallback.
+    """
+    encoded = quote(filename, safe="")
+    if encoded == filename:
+        return f'attachment; filename="{filename}"'
+    fallback = re.sub(r"[^A-Za-z0-9._-]+", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{encoded}"
+
+
+def pptx_response(data, filename, headers=None):
+    """Response serving generated deck bytes as a download"""
+    headers = dict(headers or {})
+    headers["Content-Disposition"] = content_disposition(filename)
+    return Response(content=data, media_type=PPTX_MEDIA_TYPE, headers=headers)
+
+
+async def deck_response(kind, params, filename, background, if_none_match,
+                        create_slides, *args, **kwargs):
+    """
+    Serve a generated deck, using the result cache where possible.
+
+    ``kind`` and ``params`` (the normalised request) plus the background
+    digest form the cache key, which is also sent as the ETag; a matching
+    If-None-Match gets a 304. On a miss ``create_slides(*args, **kwargs)``
+    runs on the worker pool and the bytes are cached for next time.
+    """
+    key = deck_key(kind, params, background)
+    headers = generation_headers(background) or {}
+    headers["ETag"] = f'"{key}"'
+    if etag_matches(if_none_match, headers["ETag"], key in deck_cache):
+        return Response(status_code=304, headers=headers)
+
+    pptx_data, timing = await render_deck(kind, key, create_slides, *args, **kwargs)
+    if timing is None:
+        headers["X-Deck-Cache"] = "hit"
+    else:
+        headers.update(timing.headers())
+        headers["X-Deck-Cache"] = "miss"
+    return pptx_response(pptx_data, filename, headers)
+
+
+async def render_deck(kind, key, create_slides, *args, progress=None, **kwargs):
+    """
+    Deck bytes for ``key``, from the deck cache or generated on the worker pool.
+
+    Returns (bytes, timing); timing is None when the deck came from the cache.
+    Generated decks are recorded in the metrics under ``kind``.
+    """
+    pptx_data = deck_cache.get(key)
+    if pptx_data is not None:
+        return pptx_data, None
+
+    (pptx_data, stages), timing = await generation_pool.run(
+        render_timed, create_slides, *args, progress=progress, **kwargs
+    )
+    observe_generation(kind, timing, stages)
+    deck_cache.put(key, pptx_data)
+    return pptx_data, timing
 
 
 def process_background_image(background_image_data):
     """
-    Process base64 background image data and save to temporary file.
-    Returns path to temporary image file.
+    Resolve a background image reference to a stored image.
+
+    Accepts base64 data (optionally as a data URL), a ``sha256:<digest>``
+    reference to an image already in the store, or a background id from
+    backgrounds.json. Decoded images are cached by content hash, so repeat
+    requests skip the decode entirely. The image is then downscaled and
+    re-encoded to the background profile (see config.BACKGROUND_*).
+    Returns None when no image was given; raises UnknownImageError for a
+    hash the store no longer holds or an image that cannot be read.
     """
     if not background_image_data:
         return None
     
+    start = time.perf_counter()
     try:
-        # Remove data URL prefix if present (data:image/jpeg;base64,...)
-        if ',' in background_image_data:
-            background_image_data = background_image_data.split(',')[1]
-        
-        # Decode base64 data
-        image_data = base64.b64decode(background_image_data)
-        
-        # Create temporary file for the image
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            tmp_file.write(image_data)
-            return tmp_file.name
-            
+        return image_store.normalize(image_store.resolve(background_image_data))
+    except UnknownImageError:
+        raise
     except Exception as e:
         print(f"Error processing background image: {e}")
-        return None
+        raise UnknownImageError(f"Could not read background image: {e}")
+    finally:
+        if not isinstance(background_image_data, StoredImage):
+            background_resolve_seconds.observe(time.perf_counter() - start)
+
+
+def generation_headers(background=None, timing=None):
+    """Response headers for a generated deck.
+
+    Includes the background's content hash, so the client can reference it
+    next time, and the worker pool's queue and generation times.
+    """
+    headers = {}
+    if background is not None:
+        headers["X-Background-Image"] = background.reference
+    if timing is not None:
+        headers.update(timing.headers())
+    return headers or None
 
 
 # Removed deprecated get_default_background_path function
 # Background images should always be sent from the frontend as base64
 
 
-def set_slide_background(slide, background_image_path=None):
-    """Set slide background to either an image or white"""
-    if background_image_path and os.path.exists(background_image_path):
+def set_slide_background(slide, background_image=None):
+    """Set slide background to either an image or white
+
+    ``background_image`` may be a StoredImage or a path to an image file.
+    """
+    if isinstance(background_image, StoredImage) or (
+            background_image and os.path.exists(background_image)):
         try:
             # Add background image
             left = 0
             top = 0
             # Access presentation through slide's parent
             prs = slide.part.package.presentation_part.presentation
-            slide.shapes.add_picture(background_image_path, left, top, 
-                                   prs.slide_width, 
-                                   prs.slide_height)
+            if isinstance(background_image, StoredImage):
+                add_stored_picture(slide, background_image, left, top,
+                                   prs.slide_width, prs.slide_height)
+            else:
+                slide.shapes.add_picture(background_image, left, top,
+                                         prs.slide_width,
+                                         prs.slide_height)
             return True
         except Exception as e:
             print(f"Error adding background image: {e}")
@@ -80,6 +242,66 @@ def set_slide_background(slide, background_image_path=None):
     return False
 
 
+def add_stored_picture(slide, image, left, top, width, height, filename=None):
+    """Add a StoredImage as a picture, reusing the package's part for that image.
+
+    Same result as ``slide.shapes.add_picture``, but python-pptx does not
+    re-hash the image and scan every part of the package to find a duplicate.
+    ``filename`` becomes the picture description (python-pptx uses the file
+    name when adding from a path). The parts already added, keyed by image
+    digest, are kept on the package itself, so they go away with the deck.
+    """
+    package = slide.part.package
+    parts = package.__dict__.setdefault("_stored_image_parts", {})
+    image_part = parts.get(image.digest)
+    if image_part is None:
+        image_part = ImagePart.new(package, PptxImage.from_blob(image.data, filename))
+        parts[image.digest] = image_part
+    rId = slide.part.relate_to(image_part, RT.IMAGE)
+    shapes = slide.shapes
+    pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+    shapes._recalculate_extents()
+    return shapes._shape_factory(pic)
+
+
+# Corner placeholder position (9.33in, 0.25in) and size (3.72in x 2in)
+PLACEHOLDER_BOX = (Inches(9.33), Inches(0.25), Inches(3.72), Inches(2))
+
+
+def add_placeholder_image(slide, name):
+    """Add the registered corner placeholder image for a slide kind, if it exists"""
+    placeholder = asset_registry.placeholder(name)
+    if placeholder is None:
+        return None
+    return add_stored_picture(slide, placeholder, *PLACEHOLDER_BOX, asset_registry.filename(name))
+
+
+def set_slide_backdrop(slide, background, placeholder_name):
+    """Set the background and add the corner placeholder of a content slide.
+
+    With config.COMPOSITE_PLACEHOLDERS the two images are merged with Pillow
+    into one cached full-slide picture, so the slide carries a single
+    picture shape instead of two. Otherwise (or without a background image)
+    this is set_slide_background followed by add_placeholder_image.
+    """
+    placeholder = asset_registry.placeholder(placeholder_name)
+    if (config.COMPOSITE_PLACEHOLDERS and isinstance(background, StoredImage)
+            and placeholder is not None):
+        prs = slide.part.package.presentation_part.presentation
+        left, top, width, height = PLACEHOLDER_BOX
+        box = (left / prs.slide_width, top / prs.slide_height,
+               width / prs.slide_width, height / prs.slide_height)
+        try:
+            composite = image_store.composite(background, placeholder, box)
+            add_stored_picture(slide, composite, 0, 0, prs.slide_width, prs.slide_height)
+            return
+        except Exception as e:
+            print(f"Error compositing background: {e}")
+
+    set_slide_background(slide, background)
+    add_placeholder_image(slide, placeholder_name)
+
+
 def cleanup_temp_file(file_path):
     """Clean up temporary file if it exists and is in temp directory"""
     if file_path and os.path.exists(file_path):
@@ -92,6 +314,78 @@ def cleanup_temp_file(file_path):
 
 
 # Text effect functions
+#
+# Effects are stored as parsed XML fragments keyed by (kind, parameters), so
+# each distinct glow/outline/highlight is parsed once per process and every
+# run receives a cheap deep copy instead of a fresh parse_xml call.
+
+_A_NS = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+_RPR_TAG = qn('a:rPr')
+
+_EFFECT_TEMPLATES = {
+    # (rad, color)
+    'glow': '<a:glow rad="{0}"><a:srgbClr val="{1}"><a:alpha val="100000"/></a:srgbClr></a:glow>',
+    # (rad, scheme)
+    'scheme_glow': '<a:glow rad="{0}"><a:schemeClr val="{1}"/></a:glow>',
+    # (blur, dist, dir, color)
+    'inner_shadow': '<a:innerShdw blurRad="{0}" dist="{1}" dir="{2}">'
+                    '<a:srgbClr val="{3}"><a:alpha val="100000"/></a:srgbClr></a:innerShdw>',
+    # (blur, dist, dir, color)
+    'outer_shadow': '<a:outerShdw blurRad="{0}" dist="{1}" dir="{2}" algn="ctr" rotWithShape="0">'
+                    '<a:srgbClr val="{3}"><a:alpha val="100000"/></a:srgbClr></a:outerShdw>',
+    # (color)
+    'highlight': '<a:highlight ' + _A_NS + '><a:srgbClr val="{0}"/></a:highlight>',
+    # (width, color)
+    'outline': '<a:ln ' + _A_NS + ' w="{0}"><a:solidFill><a:srgbClr val="{1}"/></a:solidFill></a:ln>',
+    # (color)
+    'fill': '<a:solidFill ' + _A_NS + '><a:srgbClr val="{0}"/></a:solidFill>',
+    'rpr': '<a:rPr ' + _A_NS + '/>',
+    'end_para_rpr': '<a:endParaRPr ' + _A_NS + '/>',
+    'no_autofit': '<a:noAutofit ' + _A_NS + '/>',
+}
+
+
+def _hex_color(color_rgb: tuple[int, int, int]) -> str:
+    return f"{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"
+
+
+@lru_cache(maxsize=512)
+def _compiled_effect_list(*effects: tuple) -> object:
+    """Parse an a:effectLst holding the given (kind, *params) effects"""
+    parts = ''.join(_EFFECT_TEMPLATES[kind].format(*params) for kind, *params in effects)
+    return parse_xml(f'<a:effectLst {_A_NS}>{parts}</a:effectLst>')
+
+
+@lru_cache(maxsize=512)
+def _compiled_effect(kind: str, *params) -> object:
+    """Parse a standalone effect fragment (highlight, outline, fill, ...)"""
+    return parse_xml(_EFFECT_TEMPLATES[kind].format(*params))
+
+
+def effect_element(kind: str, *params):
+    """Return a fresh copy of the precompiled fragment for ``kind``"""
+    return copy.deepcopy(_compiled_effect(kind, *params))
+
+
+def effect_list_element(*effects: tuple):
+    """Return a fresh a:effectLst copy containing ``effects``, e.g. ('glow', rad, 'FFFFFF')"""
+    return copy.deepcopy(_compiled_effect_list(*effects))
+
+
+def _run_properties(run):
+    """Return the run's a:rPr, adding it if needed.
+
+    Same result as ``run._r.get_or_add_rPr()`` but several times faster:
+    a:rPr is always the first child of a:r, and a new one is cloned from a
+    precompiled fragment instead of being built through python-pptx.
+    """
+    r = run._r
+    if len(r) and r[0].tag == _RPR_TAG:
+        return r[0]
+    rPr = effect_element('rpr')
+    r.insert(0, rPr)
+    return rPr
+
 
 def add_text_glow(paragraph, glow_radius: int = 6, color_rgb: tuple[int, int, int] = (255, 255, 255)) -> None:
     """Add a white (or provided color) glow effect to all runs in a paragraph.
@@ -104,18 +398,9 @@ def add_text_glow(paragraph, glow_radius: int = 6, color_rgb: tuple[int, int, in
         glow_radius: Glow radius in points.
         color_rgb: (R, G, B) color tuple for the glow.
     """
+    glow = ('glow', int(glow_radius * 12700), _hex_color(color_rgb))
     for run in paragraph.runs:
-        run_properties = run._r.get_or_add_rPr()
-        glow_effect = parse_xml(
-            f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:glow rad="{int(glow_radius * 12700)}">'
-            f'    <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}">'
-            f'      <a:alpha val="100000"/>'
-            f'    </a:srgbClr>'
-            f'  </a:glow>'
-            f'</a:effectLst>'
-        )
-        run_properties.append(glow_effect)
+        _run_properties(run).append(effect_list_element(glow))
 
 
 
@@ -125,14 +410,9 @@ def add_text_highlight(paragraph, color_rgb: tuple[int, int, int] = (255, 255, 0
     PowerPoint supports run highlighting using the <a:highlight> element under
     run properties (a:rPr). python-pptx does not expose this directly.
     """
+    color = _hex_color(color_rgb)
     for run in paragraph.runs:
-        run_properties = run._r.get_or_add_rPr()
-        highlight_xml = parse_xml(
-            f'<a:highlight xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/>'
-            f'</a:highlight>'
-        )
-        run_properties.append(highlight_xml)
+        _run_properties(run).append(effect_element('highlight', color))
 
 
 def set_hanging_indent(paragraph, left_inches: float = 2.2) -> None:
@@ -156,29 +436,16 @@ def add_text_outline(paragraph, color_rgb: tuple[int, int, int] = (255, 255, 255
     Outline helps the text stand out on colored backgrounds.
     """
     width = max(1, int(width_pt * 12700))
+    color = _hex_color(color_rgb)
     for run in paragraph.runs:
-        run_properties = run._r.get_or_add_rPr()
-        outline_xml = parse_xml(
-            f'<a:ln xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" w="{width}">'
-            f'  <a:solidFill><a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/></a:solidFill>'
-            f'</a:ln>'
-        )
-        run_properties.append(outline_xml)
+        _run_properties(run).append(effect_element('outline', width, color))
 
 
 def add_text_glow_scheme(paragraph, scheme: str = "bg1", glow_radius_pt: float = 10.0) -> None:
     """Add glow using a scheme color (e.g., bg1) for all runs in a paragraph."""
-    rad = max(1, int(glow_radius_pt * 12700))
+    glow = ('scheme_glow', max(1, int(glow_radius_pt * 12700)), scheme)
     for run in paragraph.runs:
-        run_properties = run._r.get_or_add_rPr()
-        glow_effect = parse_xml(
-            f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:glow rad="{rad}">'
-            f'    <a:schemeClr val="{scheme}"/>'
-            f'  </a:glow>'
-            f'</a:effectLst>'
-        )
-        run_properties.append(glow_effect)
+        _run_properties(run).append(effect_list_element(glow))
 
 
 def add_end_paragraph_glow_and_highlight(paragraph, scheme: str = "bg1", glow_radius_pt: float = 10.0,
@@ -193,24 +460,14 @@ def add_end_paragraph_glow_and_highlight(paragraph, scheme: str = "bg1", glow_ra
                 endRPr = child
                 break
         if endRPr is None:
-            endRPr = parse_xml('<a:endParaRPr xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"/>')
+            endRPr = effect_element('end_para_rpr')
             pPr.append(endRPr)
         # Add glow
         rad = max(1, int(glow_radius_pt * 12700))
-        effectLst = parse_xml(
-            f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:glow rad="{rad}"><a:schemeClr val="{scheme}"/></a:glow>'
-            f'</a:effectLst>'
-        )
-        endRPr.append(effectLst)
+        endRPr.append(effect_list_element(('scheme_glow', rad, scheme)))
         # Optional highlight
         if highlight_rgb is not None:
-            highlight = parse_xml(
-                f'<a:highlight xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-                f'  <a:srgbClr val="{highlight_rgb[0]:02X}{highlight_rgb[1]:02X}{highlight_rgb[2]:02X}"/>'
-                f'</a:highlight>'
-            )
-            endRPr.append(highlight)
+            endRPr.append(effect_element('highlight', _hex_color(highlight_rgb)))
     except Exception:
         pass
 
@@ -219,54 +476,27 @@ def add_run_glow(run, color_rgb: tuple[int, int, int] | None = (255, 255, 255),
                  glow_radius_pt: float = 10.0) -> None:
     """Add glow to a single run using either srgb color or scheme color."""
     rad = max(1, int(glow_radius_pt * 12700))
-    run_properties = run._r.get_or_add_rPr()
     if scheme:
-        glow_effect = parse_xml(
-            f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:glow rad="{rad}"><a:schemeClr val="{scheme}"/></a:glow>'
-            f'</a:effectLst>'
-        )
+        glow = ('scheme_glow', rad, scheme)
     else:
-        glow_effect = parse_xml(
-            f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-            f'  <a:glow rad="{rad}"><a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"><a:alpha val="100000"/></a:srgbClr></a:glow>'
-            f'</a:effectLst>'
-        )
-    run_properties.append(glow_effect)
+        glow = ('glow', rad, _hex_color(color_rgb))
+    _run_properties(run).append(effect_list_element(glow))
 
 
 def add_run_highlight(run, color_rgb: tuple[int, int, int] = (255, 255, 0)) -> None:
     """Add highlight to a single run via XML."""
-    run_properties = run._r.get_or_add_rPr()
-    highlight_xml = parse_xml(
-        f'<a:highlight xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-        f'  <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/>'
-        f'</a:highlight>'
-    )
-    run_properties.append(highlight_xml)
+    _run_properties(run).append(effect_element('highlight', _hex_color(color_rgb)))
 
 
 def add_run_outline(run, color_rgb: tuple[int, int, int] = (255, 255, 255), width_pt: float = 0.75) -> None:
     """Add a text outline to a single run via XML."""
     width = max(1, int(width_pt * 12700))
-    run_properties = run._r.get_or_add_rPr()
-    outline_xml = parse_xml(
-        f'<a:ln xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" w="{width}">'
-        f'  <a:solidFill><a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/></a:solidFill>'
-        f'</a:ln>'
-    )
-    run_properties.append(outline_xml)
+    _run_properties(run).append(effect_element('outline', width, _hex_color(color_rgb)))
 
 
 def add_run_fill(run, color_rgb: tuple[int, int, int] = (0, 0, 0)) -> None:
     """Set solid text fill color on a single run via XML."""
-    run_properties = run._r.get_or_add_rPr()
-    fill_xml = parse_xml(
-        f'<a:solidFill xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-        f'  <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/>'
-        f'</a:solidFill>'
-    )
-    run_properties.append(fill_xml)
+    _run_properties(run).append(effect_element('fill', _hex_color(color_rgb)))
 
 
 def add_run_outer_shadow(
@@ -283,15 +513,8 @@ def add_run_outer_shadow(
     blur = max(1, int(blur_radius_pt * 12700))
     dist = max(0, int(distance_pt * 12700))
     dir_ooxml = int(direction_degrees * 60000)
-    run_properties = run._r.get_or_add_rPr()
-    shadow_xml = parse_xml(
-        f'<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-        f'  <a:outerShdw blurRad="{blur}" dist="{dist}" dir="{dir_ooxml}" algn="ctr" rotWithShape="0">'
-        f'    <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"><a:alpha val="100000"/></a:srgbClr>'
-        f'  </a:outerShdw>'
-        f'</a:effectLst>'
-    )
-    run_properties.append(shadow_xml)
+    shadow = ('outer_shadow', blur, dist, dir_ooxml, _hex_color(color_rgb))
+    _run_properties(run).append(effect_list_element(shadow))
 
 
 def set_run_effects(
@@ -310,7 +533,7 @@ def set_run_effects(
 
     Order: glow first, then outerShdw inside the same a:effectLst.
     """
-    rPr = run._r.get_or_add_rPr()
+    rPr = _run_properties(run)
     # Remove existing effectLst children
     to_remove = []
     for child in list(rPr):
@@ -319,40 +542,27 @@ def set_run_effects(
     for node in to_remove:
         rPr.remove(node)
 
-    parts: list[str] = []
+    effects: list[tuple] = []
     if glow_rgb is not None:
         rad = max(1, int(glow_radius_pt * 12700))
-        parts.append(
-            f'<a:glow rad="{rad}"><a:srgbClr val="{glow_rgb[0]:02X}{glow_rgb[1]:02X}{glow_rgb[2]:02X}"><a:alpha val="100000"/></a:srgbClr></a:glow>'
-        )
+        effects.append(('glow', rad, _hex_color(glow_rgb)))
     if inner_shadow_rgb is not None:
         iblur = max(1, int(inner_blur_radius_pt * 12700))
         idist = max(0, int(inner_distance_pt * 12700))
         idir = int(direction_degrees * 60000)
-        parts.append(
-            f'<a:innerShdw blurRad="{iblur}" dist="{idist}" dir="{idir}">' 
-            f'  <a:srgbClr val="{inner_shadow_rgb[0]:02X}{inner_shadow_rgb[1]:02X}{inner_shadow_rgb[2]:02X}"><a:alpha val="100000"/></a:srgbClr>'
-            f'</a:innerShdw>'
-        )
+        effects.append(('inner_shadow', iblur, idist, idir, _hex_color(inner_shadow_rgb)))
     if outer_shadow_rgb is not None:
         blur = max(1, int(blur_radius_pt * 12700))
         dist = max(0, int(distance_pt * 12700))
         dir_ooxml = int(direction_degrees * 60000)
-        parts.append(
-            f'<a:outerShdw blurRad="{blur}" dist="{dist}" dir="{dir_ooxml}" algn="ctr" rotWithShape="0">'
-            f'  <a:srgbClr val="{outer_shadow_rgb[0]:02X}{outer_shadow_rgb[1]:02X}{outer_shadow_rgb[2]:02X}"><a:alpha val="100000"/></a:srgbClr>'
-            f'</a:outerShdw>'
-        )
-    if parts:
-        effect_xml = parse_xml(
-            '<a:effectLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">' + ''.join(parts) + '</a:effectLst>'
-        )
-        rPr.append(effect_xml)
+        effects.append(('outer_shadow', blur, dist, dir_ooxml, _hex_color(outer_shadow_rgb)))
+    if effects:
+        rPr.append(effect_list_element(*effects))
 
 
 def set_run_highlight(run, color_rgb: tuple[int, int, int] = (255, 255, 0)) -> None:
     """Replace any existing highlight on a run and append a new one (after effects)."""
-    rPr = run._r.get_or_add_rPr()
+    rPr = _run_properties(run)
     # Remove existing highlight children
     to_remove = []
     for child in list(rPr):
@@ -361,12 +571,7 @@ def set_run_highlight(run, color_rgb: tuple[int, int, int] = (255, 255, 0)) -> N
     for node in to_remove:
         rPr.remove(node)
     # Append new highlight
-    highlight_xml = parse_xml(
-        f'<a:highlight xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
-        f'  <a:srgbClr val="{color_rgb[0]:02X}{color_rgb[1]:02X}{color_rgb[2]:02X}"/>'
-        f'</a:highlight>'
-    )
-    rPr.append(highlight_xml)
+    rPr.append(effect_element('highlight', _hex_color(color_rgb)))
 
 
 def set_textframe_no_autofit(text_frame, left_inches: float | None = None, right_inches: float | None = None) -> None:
@@ -382,8 +587,7 @@ def set_textframe_no_autofit(text_frame, left_inches: float | None = None, right
                 # already present
                 pass
         # Add noAutofit
-        no_autofit = parse_xml('<a:noAutofit xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"/>')
-        bodyPr.append(no_autofit)
+        bodyPr.append(effect_element('no_autofit'))
         # Set insets
         if left_inches is not None:
             bodyPr.set('lIns', str(int(Inches(left_inches))))
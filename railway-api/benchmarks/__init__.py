@@ -0,0 +1 @@
+# Benchmarks for slide generation (run from railway-api/, e.g. python -m benchmarks.bench_prototypes)
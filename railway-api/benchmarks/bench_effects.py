@@ -0,0 +1,114 @@
+"""
+Micro-benchmark: per-run cost of the text-effect helpers
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_effects [--runs N]
+
+"parse" is the previous implementation (format an XML string and call
+parse_xml for every run); "clone" is the current one (deep-copy a fragment
+that was parsed once). Each case applies the effect to N fresh runs.
+"""
+import argparse
+import time
+
+from pptx.oxml import parse_xml
+
+from app.routers.slides.utils import (
+    create_presentation,
+    add_run_glow,
+    add_run_fill,
+    add_run_outline,
+    set_run_effects,
+    set_run_highlight,
+)
+
+_NS = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+
+
+def parse_glow(run):
+    run._r.get_or_add_rPr().append(parse_xml(
+        f'<a:effectLst {_NS}>'
+        f'  <a:glow rad="{int(10 * 12700)}"><a:srgbClr val="FFFFFF"><a:alpha val="100000"/></a:srgbClr></a:glow>'
+        f'</a:effectLst>'
+    ))
+
+
+def parse_fill(run):
+    run._r.get_or_add_rPr().append(parse_xml(
+        f'<a:solidFill {_NS}>'
+        f'  <a:srgbClr val="000000"/>'
+        f'</a:solidFill>'
+    ))
+
+
+def parse_outline(run):
+    run._r.get_or_add_rPr().append(parse_xml(
+        f'<a:ln {_NS} w="{int(1.0 * 12700)}">'
+        f'  <a:solidFill><a:srgbClr val="FFFFFF"/></a:solidFill>'
+        f'</a:ln>'
+    ))
+
+
+def parse_effects(run):
+    rPr = run._r.get_or_add_rPr()
+    for child in list(rPr):
+        if child.tag.endswith('effectLst'):
+            rPr.remove(child)
+    rPr.append(parse_xml(
+        f'<a:effectLst {_NS}>'
+        f'<a:glow rad="{int(10 * 12700)}"><a:srgbClr val="FFFFFF"><a:alpha val="100000"/></a:srgbClr></a:glow>'
+        f'</a:effectLst>'
+    ))
+
+
+def parse_highlight(run):
+    rPr = run._r.get_or_add_rPr()
+    for child in list(rPr):
+        if child.tag.endswith('highlight'):
+            rPr.remove(child)
+    rPr.append(parse_xml(
+        f'<a:highlight {_NS}>'
+        f'  <a:srgbClr val="FFFF00"/>'
+        f'</a:highlight>'
+    ))
+
+
+CASES = [
+    ("add_run_glow", parse_glow, lambda run: add_run_glow(run, color_rgb=(255, 255, 255), glow_radius_pt=10)),
+    ("add_run_fill", parse_fill, lambda run: add_run_fill(run, color_rgb=(0, 0, 0))),
+    ("add_run_outline", parse_outline, lambda run: add_run_outline(run, color_rgb=(255, 255, 255), width_pt=1.0)),
+    ("set_run_effects", parse_effects, lambda run: set_run_effects(run, glow_rgb=(255, 255, 255), glow_radius_pt=10)),
+    ("set_run_highlight", parse_highlight, lambda run: set_run_highlight(run, color_rgb=(255, 255, 0))),
+]
+
+
+def _make_runs(count):
+    prs = create_presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    frame = slide.shapes.add_textbox(0, 0, 100, 100).text_frame
+    paragraph = frame.paragraphs[0]
+    return [paragraph.add_run() for _ in range(count)]
+
+
+def _per_run_us(apply, count):
+    runs = _make_runs(count)
+    start = time.perf_counter()
+    for run in runs:
+        apply(run)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20000, help="runs per case")
+    args = parser.parse_args()
+
+    print(f"{'helper':<20}{'parse':>12}{'clone':>12}{'speedup':>10}")
+    for name, before, after in CASES:
+        before_us = _per_run_us(before, args.runs)
+        after_us = _per_run_us(after, args.runs)
+        print(f"{name:<20}{before_us:>10.2f}us{after_us:>10.2f}us{before_us / after_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
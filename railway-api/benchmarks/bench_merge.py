@@ -0,0 +1,66 @@
+"""
+Benchmark: merging section decks into one service deck
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_merge [--runs N] [--sections 2 4 8 16]
+
+Each service is N call to worship / hymn sections sharing one gallery
+background, plus the doxology and message-for-all-generations templates.
+The table shows the summed size of the section decks against the merged
+deck: with media de-duplicated by hash, the merged size stays flat as the
+number of sections (and copies of the background) grows.
+"""
+import argparse
+import time
+
+from app.core.hymns import hymn_store
+from app.core.images import image_store
+from app.routers.call_to_worship_slides import create_call_to_worship_slides_from_dict
+from app.routers.hymn_slides import create_hymn_slides
+from app.routers.slides.liturgy import create_liturgy_slides
+from app.routers.slides.merge import DeckMerger, merge_decks
+from app.routers.slides.utils import create_presentation, render_presentation
+
+PAIRS = [{"Leader": "Come, let us worship together.", "People": "We come to praise God's holy name."}]
+
+
+def section_decks(count, background):
+    decks = [render_presentation(create_liturgy_slides, "doxology")]
+    for i in range(count):
+        if i % 2:
+            hymn = hymn_store.get("umh", 57)
+            decks.append(render_presentation(create_hymn_slides, hymn, background_image=background))
+        else:
+            decks.append(render_presentation(create_call_to_worship_slides_from_dict, PAIRS,
+                                             background_image=background))
+    decks.append(render_presentation(create_liturgy_slides, "message-for-all-generations",
+                                     {"lead_pastor": "Pastor"}))
+    return decks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="runs per case")
+    parser.add_argument("--sections", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    background = image_store.normalize(image_store.resolve(image_store.background_ids()[0]))
+    print(f"{'sections':>8}{'input':>12}{'merged':>12}{'media':>8}{'reused':>8}{'time':>10}")
+    for count in args.sections:
+        decks = section_decks(count, background)
+        merger = DeckMerger(create_presentation())
+        for data in decks:
+            merger.append(data)
+
+        merge_decks(decks)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            merged = merge_decks(decks)
+        elapsed = (time.perf_counter() - start) / args.runs
+
+        print(f"{count:>8}{sum(map(len, decks)) / 1024:>10.0f}KB{len(merged) / 1024:>10.0f}KB"
+              f"{merger.media_added:>8}{merger.media_reused:>8}{elapsed * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
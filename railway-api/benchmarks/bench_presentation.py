@@ -0,0 +1,83 @@
+"""
+Benchmark: per-request presentation setup, fresh template vs pristine clone
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_presentation [--runs N]
+
+"fresh" is the previous create_presentation (python-pptx reopens and parses
+its default template, then the slide size is set); "clone" deep-copies the
+pristine presentation cached by the current create_presentation. The second
+table shows what that means for a whole two-slide call to worship deck,
+rendered to bytes.
+"""
+import argparse
+import io
+import time
+import zipfile
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.routers.slides import utils
+from app.routers import call_to_worship_slides as ctw
+
+PAIRS = [
+    {"Leader": "This is the day that the Lord has made.", "People": "Let us rejoice and be glad in it."},
+    {"Leader": "Come, let us worship together.", "People": "We come to praise God's holy name."},
+]
+
+
+def fresh_presentation(width=Inches(13.33), height=Inches(7.5)):
+    prs = Presentation()
+    prs.slide_width = width
+    prs.slide_height = height
+    return prs
+
+
+def _per_run(fn, runs):
+    fn()
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def _deck(create):
+    # call_to_worship_slides imported create_presentation by name; swap it there
+    original, ctw.create_presentation = ctw.create_presentation, create
+    try:
+        buffer = io.BytesIO()
+        ctw.create_call_to_worship_slides_from_dict(PAIRS, buffer, None)
+        return buffer.getvalue()
+    finally:
+        ctw.create_presentation = original
+
+
+def _parts(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return {name: z.read(name) for name in z.namelist()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200, help="runs per case")
+    args = parser.parse_args()
+
+    if _parts(_deck(fresh_presentation)) != _parts(_deck(utils.create_presentation)):
+        raise SystemExit("cloned presentation produces a different deck")
+
+    cases = [
+        ("setup only", lambda: fresh_presentation(), lambda: utils.create_presentation()),
+        ("2-slide call to worship", lambda: _deck(fresh_presentation),
+         lambda: _deck(utils.create_presentation)),
+    ]
+    print(f"{'case':<26}{'fresh':>10}{'clone':>10}{'saved':>10}")
+    for name, fresh, clone in cases:
+        fresh_time = _per_run(fresh, args.runs)
+        clone_time = _per_run(clone, args.runs)
+        print(f"{name:<26}{fresh_time * 1000:>8.2f}ms{clone_time * 1000:>8.2f}ms"
+              f"{(fresh_time - clone_time) * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
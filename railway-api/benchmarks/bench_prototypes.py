@@ -0,0 +1,113 @@
+"""
+Benchmark: prototype-cloned slides vs building every slide from scratch
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_prototypes [--repeat N]
+
+Cases are a 100-slide hymn (UMH 57 lyrics repeated) and Psalm 119 (176
+verses, NRSVUE), both on the golden-geometric background. Both paths
+produce identical slide XML; the script checks that before reporting
+timings.
+"""
+import argparse
+import json
+import time
+
+from lxml import etree
+
+from app.core import config
+from app.core.images import image_store
+from app.routers.slides.utils import create_presentation
+from app.routers.slides.prototypes import SlideFactory
+from app.routers.hymn_slides import add_hymn_slide
+from app.routers.scripture_slides import add_scripture_slide, _get_book_name, _verse_font_size
+
+
+def _hymn_slides(count):
+    hymn = json.loads((config.PUBLIC_DIR / "data" / "hymns" / "umh" / "57.json").read_text(encoding="utf-8"))
+    pages = []
+    for verse in hymn["lyrics"]:
+        for text in verse["text"].split("<br>"):
+            if text.strip():
+                pages.append((verse.get("page_name", ""), text.strip()))
+    hymn_data = {"title": hymn["title"], "hymnal": "umh", "hymn_number": 57}
+    return hymn_data, [pages[i % len(pages)] for i in range(count)]
+
+
+def _psalm_119():
+    chapter = json.loads((config.PUBLIC_DIR / "data" / "bibles" / "nrsvue" / "PSA_chapter_119.json").read_text(encoding="utf-8"))
+    return [(v["verse"], v["text"].strip()) for v in chapter["verses"]]
+
+
+def hymn_scratch(hymn_data, pages, background):
+    prs = create_presentation()
+    for i, (page_name, text) in enumerate(pages):
+        add_hymn_slide(prs, hymn_data, text, page_name, i + 1, 1, 1, background)
+    return prs
+
+
+def hymn_prototype(hymn_data, pages, background):
+    prs = create_presentation()
+    factory = SlideFactory(prs, lambda: add_hymn_slide(prs, hymn_data, "Lyrics", "Verse", 1, 1, 1, background))
+    title = hymn_data["title"].title()
+    for page_name, text in pages:
+        factory.add({"Title": [title, page_name] if page_name else [title], "Lyrics": text.split("\n")})
+    return prs
+
+
+def psalm_scratch(verses, background):
+    prs = create_presentation()
+    for verse_num, text in verses:
+        add_scripture_slide(prs, "PSA", 119, verse_num, text, None, background)
+    return prs
+
+
+def psalm_prototype(verses, background):
+    prs = create_presentation()
+    factory = SlideFactory(prs, lambda: add_scripture_slide(prs, "PSA", 119, 1, "Verse", "NRSVUE", background))
+    book_name = _get_book_name("PSA")
+    for verse_num, text in verses:
+        factory.add({"Title": [f"{book_name} 119:{verse_num}"], "Verse": [text]},
+                    sizes={"Verse": _verse_font_size(text)})
+    return prs
+
+
+def _slide_xml(prs):
+    return [etree.tostring(slide._element) for slide in prs.slides]
+
+
+def _time(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (best is reported)")
+    args = parser.parse_args()
+
+    background = image_store.normalize(image_store.from_background_id("golden-geometric"))
+    hymn_data, pages = _hymn_slides(100)
+    verses = _psalm_119()
+    cases = [
+        ("hymn, 100 slides", (hymn_scratch, hymn_prototype), (hymn_data, pages, background)),
+        ("Psalm 119, 176 verses", (psalm_scratch, psalm_prototype), (verses, background)),
+    ]
+
+    print(f"{'case':<24}{'scratch':>12}{'prototype':>12}{'speedup':>10}")
+    for name, (scratch, prototype), case_args in cases:
+        if _slide_xml(scratch(*case_args)) != _slide_xml(prototype(*case_args)):
+            raise SystemExit(f"{name}: prototype output differs from scratch output")
+        scratch_time = _time(scratch, *case_args, repeat=args.repeat)
+        prototype_time = _time(prototype, *case_args, repeat=args.repeat)
+        print(f"{name:<24}{scratch_time * 1000:>10.0f}ms{prototype_time * 1000:>10.0f}ms"
+              f"{scratch_time / prototype_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: saving decks with prs.save against the per-part fast writer
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_save [--runs N] [--levels 1 6 9]
+
+Each deck (a hymn, a combined NRSVUE/TMB chapter, a call to worship and a
+merged service) is built once, reopened, and then saved with ``prs.save``
+("standard") and with ``write_package`` at each XML deflate level, storing
+media uncompressed. The first table shows save time and output size; the
+second breaks the fast writer's output down by part type at the default
+level. Every fast output is checked to hold the same members, in the same
+order and with the same content, as the standard one.
+"""
+import argparse
+import io
+import time
+import zipfile
+
+from pptx import Presentation
+
+from app.core import config
+from app.core.hymns import hymn_store
+from app.core.images import image_store
+from app.routers.call_to_worship_slides import create_call_to_worship_slides_from_dict
+from app.routers.hymn_slides import create_hymn_slides
+from app.routers.scripture_slides import create_passage_slides
+from app.routers.slides.merge import merge_decks
+from app.routers.slides.package import SaveProfile, write_package
+from app.routers.slides.utils import render_presentation
+
+BACKGROUND = "golden-geometric"
+PAIRS = [{"Leader": "Come, let us worship together.", "People": "We come to praise God's holy name."}]
+PASSAGES = [{"book": "PSA", "chapter": 119, "start_verse": None, "end_chapter": None, "end_verse": None}]
+
+
+def decks(background):
+    hymn = render_presentation(create_hymn_slides, hymn_store.get("umh", 57), background_image=background)
+    scripture = render_presentation(create_passage_slides, PASSAGES, background_image=background,
+                                    versions=("nrsvue", "tmb"))
+    ctw = render_presentation(create_call_to_worship_slides_from_dict, PAIRS, background_image=background)
+    return {
+        "hymn umh 57": hymn,
+        "combined PSA 119": scripture,
+        "call to worship": ctw,
+        "service": merge_decks([ctw, hymn, scripture]),
+    }
+
+
+def timed(save, runs):
+    """Median seconds and the output of ``save(buffer)``"""
+    times = []
+    for _ in range(runs):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        result = save(buffer)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], buffer.getvalue(), result
+
+
+def check(fast, standard):
+    fast_zip, standard_zip = zipfile.ZipFile(io.BytesIO(fast)), zipfile.ZipFile(io.BytesIO(standard))
+    names = fast_zip.namelist()
+    assert names == standard_zip.namelist() and names[0] == "[Content_Types].xml"
+    assert fast_zip.testzip() is None
+    assert all(fast_zip.read(name) == standard_zip.read(name) for name in names)
+    Presentation(io.BytesIO(fast))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="saves per mode (median reported)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9], help="XML deflate levels")
+    args = parser.parse_args()
+
+    background = image_store.normalize(image_store.from_background_id(BACKGROUND))
+    print(f"{'deck':<20}{'mode':<10}{'time':>10}{'size':>12}{'speedup':>9}")
+    breakdowns = {}
+    for name, data in decks(background).items():
+        prs = Presentation(io.BytesIO(data))
+        base_time, standard, _ = timed(prs.save, args.runs)
+        print(f"{name:<20}{'standard':<10}{base_time * 1000:>8.1f}ms{len(standard) / 1024:>10.0f}KB")
+        for level in args.levels:
+            profile = SaveProfile(level, store_media=True)
+            elapsed, fast, stats = timed(lambda f: write_package(prs, f, profile), args.runs)
+            check(fast, standard)
+            if level == config.SAVE_XML_LEVEL:
+                breakdowns[name] = stats
+            print(f"{'':<20}{f'fast -{level}':<10}{elapsed * 1000:>8.1f}ms{len(fast) / 1024:>10.0f}KB"
+                  f"{base_time / elapsed:>8.1f}x")
+
+    print(f"\nFast writer, level {config.SAVE_XML_LEVEL}, by part type:")
+    print(f"{'deck':<20}{'part':<8}{'parts':>6}{'raw':>12}{'stored':>12}{'time':>10}")
+    for name, stats in breakdowns.items():
+        for part, part_stats in sorted(stats.items(), key=lambda item: -item[1].stored):
+            print(f"{name:<20}{part:<8}{part_stats.parts:>6}{part_stats.raw / 1024:>10.0f}KB"
+                  f"{part_stats.stored / 1024:>10.0f}KB{part_stats.seconds * 1000:>8.2f}ms")
+            name = ""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: sizing verse and lyric text with the text-fit engine
+
+Usage (from railway-api/):
+    python -m benchmarks.bench_textfit [--runs N]
+
+Sizes Psalm 119 (176 verses) for the verse box, first with an empty word
+memo and then warm, and then every hymn in the three hymnals for the lyrics
+box, reporting the spread of chosen sizes and how many slides had to be split.
+"""
+import argparse
+import collections
+import time
+
+from app.core import config
+from app.core.bible import bible_store
+from app.core.hymns import HYMNALS, hymn_store
+from app.core.textfit import TextFitter, load_metrics
+from app.routers.hymn_slides import LYRICS_BOX, LYRICS_MAX_SIZE, LYRICS_MIN_SIZE
+from app.routers.scripture_slides import VERSE_BOX, VERSE_MAX_SIZE, VERSE_MIN_SIZE
+
+
+def hymn_slide_texts():
+    for hymnal in HYMNALS:
+        for path in sorted((config.HYMNS_DIR / hymnal).glob("*.json")):
+            hymn = hymn_store.get(hymnal, path.stem)
+            texts = [
+                text.strip()
+                for verse in hymn.get("lyrics", [])
+                for text in verse.get("text", "").split("<br>")
+                if text.strip()
+            ]
+            if texts:
+                yield texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="warm runs for the chapter")
+    args = parser.parse_args()
+
+    metrics = load_metrics()
+    print(f"metrics: {metrics.source}")
+
+    verses = [v["text"] for v in bible_store.verses("nrsvue", "PSA", 119, [(1, 176)])]
+    fitter = TextFitter(metrics)
+    start = time.perf_counter()
+    fitter.pages(verses, VERSE_BOX, VERSE_MAX_SIZE, VERSE_MIN_SIZE)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        pages = fitter.pages(verses, VERSE_BOX, VERSE_MAX_SIZE, VERSE_MIN_SIZE)
+    warm = (time.perf_counter() - start) / args.runs
+    sizes = collections.Counter(size for verse in pages for size, _ in verse)
+    print(f"Psalm 119 ({len(verses)} verses): cold {cold * 1000:.1f}ms, warm {warm * 1000:.1f}ms, "
+          f"sizes {dict(sorted(sizes.items()))}")
+
+    hymn_sizes = collections.Counter()
+    hymns = split = 0
+    start = time.perf_counter()
+    for texts in hymn_slide_texts():
+        pages = fitter.pages(texts, LYRICS_BOX, LYRICS_MAX_SIZE, LYRICS_MIN_SIZE)
+        hymn_sizes[min(size for slide in pages for size, _ in slide)] += 1
+        split += sum(len(slide) > 1 for slide in pages)
+        hymns += 1
+    elapsed = time.perf_counter() - start
+    print(f"{hymns} hymns: {elapsed / hymns * 1000:.2f}ms per hymn, {split} slides split, "
+          f"hymn sizes {dict(sorted(hymn_sizes.items()))}")
+
+
+if __name__ == "__main__":
+    main()
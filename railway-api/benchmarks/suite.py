@@ -0,0 +1,221 @@
+"""
+Benchmark suite over the shipped hymnal and Bible data
+
+Usage (from railway-api/):
+    python -m benchmarks.suite [--cases PATTERN ...] [--repeat N]
+                               [--output PATH] [--compare PATH] [--threshold F]
+
+Cases:
+    hymns-umh               every hymn in public/data/hymns/umh, one deck each
+    scripture-<BOOK>-<N>    PSA 119, NUM 7, 1CH 6 and LUK 1 in NRSVUE
+    combined-<BOOK>-<N>     the same chapters, NRSVUE and TMB alternating
+    ctw-<background>        a call to worship deck on each background in backgrounds.json
+
+Hymns and scripture use the golden-geometric background. Each case runs in
+a fresh process, so its peak RSS is its own, and is timed over --repeat
+runs after setup. Reported per case: decks, slides, output size, wall time
+(min and median), peak RSS, the time per generation stage and, in the fast
+SAVE_MODE, the saved size and write time per part type.
+
+Results are written as JSON (default benchmarks/results/<commit>.json).
+With --compare, each case is checked against an earlier results file, and
+the exit status is 1 when a case is slower by more than --threshold.
+"""
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+CHAPTERS = [("PSA", 119), ("NUM", 7), ("1CH", 6), ("LUK", 1)]
+BACKGROUND = "golden-geometric"
+PAIRS = [
+    {"Leader": "This is the day that the Lord has made.", "People": "Let us rejoice and be glad in it."},
+    {"Leader": "Come, let us worship together.", "People": "We come to praise God's holy name."},
+    {"Leader": "Lift up your hearts.", "People": "We lift them up to the Lord."},
+]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def case_names():
+    from app.core.images import image_store
+
+    names = ["hymns-umh"]
+    names += [f"scripture-{book}-{chapter}" for book, chapter in CHAPTERS]
+    names += [f"combined-{book}-{chapter}" for book, chapter in CHAPTERS]
+    names += [f"ctw-{background_id}" for background_id in image_store.background_ids()]
+    return names
+
+
+def _background(background_id):
+    from app.core.images import image_store
+    return image_store.normalize(image_store.from_background_id(background_id))
+
+
+def _jobs(name):
+    """(create_slides, args, kwargs) for each deck of a case"""
+    from app.core import config
+    from app.core.hymns import hymn_store
+    from app.routers.call_to_worship_slides import create_call_to_worship_slides_from_dict
+    from app.routers.hymn_slides import create_hymn_slides
+    from app.routers.scripture_slides import create_passage_slides
+
+    kind, _, rest = name.partition("-")
+    if kind == "hymns":
+        background = _background(BACKGROUND)
+        paths = sorted((config.HYMNS_DIR / rest).glob("*.json"))
+        return [
+            (create_hymn_slides, (hymn_store.get(rest, path.stem),), {"background_image": background})
+            for path in paths
+        ]
+    if kind in ("scripture", "combined"):
+        book, chapter = rest.rsplit("-", 1)
+        passages = [{"book": book, "chapter": int(chapter), "start_verse": None,
+                     "end_chapter": None, "end_verse": None}]
+        versions = ("nrsvue", "tmb") if kind == "combined" else ("nrsvue",)
+        return [(create_passage_slides, (passages,),
+                 {"background_image": _background(BACKGROUND), "versions": versions})]
+    if kind == "ctw":
+        return [(create_call_to_worship_slides_from_dict, (PAIRS,),
+                 {"background_image": _background(rest)})]
+    raise ValueError(f"Unknown case {name}")
+
+
+def _rss_mb(usage):
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_case(name, repeat):
+    """Run one case in this (fresh) process and return its measurements"""
+    from app.routers.slides.utils import render_timed
+
+    jobs = _jobs(name)
+    rss_start = _rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+    walls = []
+    for _ in range(repeat):
+        stages, parts, slides, size = {}, {}, 0, 0
+        start = time.perf_counter()
+        for create_slides, args, kwargs in jobs:
+            data, timer = render_timed(create_slides, *args, **kwargs)
+            size += len(data)
+            slides += timer.slides or 0
+            for stage, seconds in timer.stages.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            for part, stats in timer.parts.items():
+                totals = parts.setdefault(part, dict.fromkeys(stats, 0))
+                for field, value in stats.items():
+                    totals[field] += value
+        walls.append(time.perf_counter() - start)
+
+    return {
+        "case": name,
+        "decks": len(jobs),
+        "slides": slides,
+        "output_bytes": size,
+        "wall_s": {"min": min(walls), "median": statistics.median(walls), "runs": walls},
+        "stages_s": stages,
+        "parts": parts,
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": _rss_mb(resource.getrusage(resource.RUSAGE_SELF)),
+    }
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline, threshold):
+    """Print changes against an earlier results file; returns the regressed cases"""
+    previous = {case["case"]: case for case in baseline["cases"]}
+    regressions = []
+    print(f"\nAgainst {baseline['commit']} ({baseline['timestamp']}):")
+    print(f"{'case':<28}{'wall':>10}{'size':>10}{'peak rss':>12}")
+    for case in results["cases"]:
+        old = previous.get(case["case"])
+        if old is None:
+            continue
+        wall = case["wall_s"]["median"] / old["wall_s"]["median"] - 1
+        size = case["output_bytes"] / old["output_bytes"] - 1 if old["output_bytes"] else 0
+        rss = case["peak_rss_mb"] - old["peak_rss_mb"]
+        flag = ""
+        if wall > threshold:
+            regressions.append(case["case"])
+            flag = "  slower"
+        print(f"{case['case']:<28}{wall:>+9.1%}{size:>+9.1%}{rss:>+9.1f}MB{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", default=["*"], help="case names or glob patterns")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="median wall-time increase counted as a regression")
+    args = parser.parse_args()
+
+    from app.core import config
+
+    names = [n for n in case_names() if any(fnmatch.fnmatch(n, p) for p in args.cases)]
+    if not names:
+        raise SystemExit("No cases match")
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": multiprocessing.cpu_count(),
+        "repeat": args.repeat,
+        "config": {
+            "composite_placeholders": config.COMPOSITE_PLACEHOLDERS,
+            "background_format": config.BACKGROUND_FORMAT,
+            "text_fit_font": config.TEXT_FIT_FONT,
+            "save_mode": config.SAVE_MODE,
+            "save_xml_level": config.SAVE_XML_LEVEL,
+        },
+        "cases": [],
+    }
+
+    print(f"{'case':<28}{'decks':>6}{'slides':>8}{'output':>10}{'min':>10}{'median':>10}{'peak rss':>10}")
+    spawn = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            case = executor.submit(run_case, name, args.repeat).result()
+        results["cases"].append(case)
+        print(f"{name:<28}{case['decks']:>6}{case['slides']:>8}"
+              f"{case['output_bytes'] / 1024 / 1024:>8.1f}MB"
+              f"{case['wall_s']['min']:>9.2f}s{case['wall_s']['median']:>9.2f}s"
+              f"{case['peak_rss_mb']:>8.0f}MB")
+
+    output = args.output or RESULTS_DIR / f"{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
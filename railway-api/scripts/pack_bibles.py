@@ -0,0 +1,89 @@
+"""
+Pack the Bible chapter JSON files into one memory-mappable file per translation
+
+Usage (from railway-api/):
+    python -m scripts.pack_bibles [--out DIR] [--index PATH] [--versions nrsv tmb ...]
+
+Writes ``<version>.bible`` into config.BIBLE_PACK_DIR (read by
+app.core.bible.BibleStore), the phrase search index ``<version>.search``
+next to it (read by app.core.search.BibleSearch), and a JSON index of
+books, chapters and verse numbers for the Next.js list-books/list-chapters/
+list-verses routes.
+
+With --if-stale a translation is skipped when its pack and search index
+are newer than every one of its chapter files, so the Procfile can run
+this on each boot and only pay for it after the Bible data changes.
+A translation without chapter files (e.g. config.PUBLIC_DIR not shipped)
+is an error: nothing is written and the script exits non-zero, so the
+API does not start on empty packs.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from app.core import config
+from app.core.bible import BIBLE_VERSIONS, PACK_SUFFIX, BibleStore, BibleVersion, write_pack
+from app.core.search import SEARCH_SUFFIX, BibleSearchIndex
+
+
+def chapter_files(version: str):
+    """The chapter JSON files of ``version``"""
+    return list((config.BIBLES_DIR / version).glob("*_chapter_*.json"))
+
+
+def is_fresh(version: str, out: Path) -> bool:
+    """Whether the pack and search index of ``version`` are newer than its sources"""
+    outputs = [out / f"{version}{PACK_SUFFIX}", out / f"{version}{SEARCH_SUFFIX}"]
+    if not all(path.exists() for path in outputs):
+        return False
+    newest = max((path.stat().st_mtime for path in chapter_files(version)), default=0.0)
+    return min(path.stat().st_mtime for path in outputs) >= newest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=config.BIBLE_PACK_DIR,
+                        help="directory for the packed files")
+    parser.add_argument("--index", default=str(config.BIBLES_DIR / "index.json"),
+                        help="where to write the JSON index ('' to skip)")
+    parser.add_argument("--versions", nargs="+", default=list(BIBLE_VERSIONS))
+    parser.add_argument("--if-stale", action="store_true",
+                        help="skip translations whose outputs are newer than their chapter files")
+    args = parser.parse_args()
+
+    missing = [version for version in args.versions if not chapter_files(version)]
+    if missing:
+        raise SystemExit(f"No chapter files for {', '.join(missing)} in {config.BIBLES_DIR}; "
+                         f"set PUBLIC_DIR to the directory holding data/bibles")
+
+    store = BibleStore(config.BIBLES_DIR, args.out, args.versions)
+    index = {}
+    for version in args.versions:
+        if args.if_stale and is_fresh(version, args.out):
+            if args.index:
+                index[version] = store.export_index(version)
+            print(f"{version}: up to date")
+            continue
+
+        start = time.perf_counter()
+        source = BibleVersion(version).load(config.BIBLES_DIR / version)
+        size = write_pack(source, args.out / f"{version}{PACK_SUFFIX}")
+        index[version] = store.export_index(version)
+        print(f"{version}: {len(source.chapters)} chapters, {size / 1024:.0f} KB "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        search_index = BibleSearchIndex.build(source)
+        size = search_index.write(args.out / f"{version}{SEARCH_SUFFIX}")
+        print(f"{version}: search index of {len(search_index.terms)} terms, {size / 1024:.0f} KB "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    if args.index:
+        with open(args.index, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        print(f"Wrote index to {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Pre-render hymnals into the deck cache's on-disk tier
+
+Usage (from railway-api/):
+    python -m scripts.prerender_hymns [--hymnals umh thb fws] [--backgrounds ocean-sunrise ...]
+                                      [--out DIR] [--workers N]
+
+Renders every hymn in the chosen hymnals on each chosen background
+(``all`` for every background in backgrounds.json) across a process pool.
+Decks are written as ``<deck_key>.pptx``, the same content-addressed layout
+as DECK_CACHE_DIR, so an API started with DECK_CACHE_DIR pointing at the
+output serves them as cache hits. Keys are built from the request the
+frontend sends for a hymn, and include DECK_FORMAT_VERSION,
+COMPOSITE_PLACEHOLDERS, the SAVE_* options and the text-fit font's
+metrics, so run with the same settings and fonts as the API.
+
+Decks already in the output directory are skipped, so an interrupted run
+can simply be restarted.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.core import config
+from app.core.decks import DeckCache, deck_key
+from app.core.hymns import HYMNALS, hymn_store
+from app.core.images import image_store
+from app.routers.hymn_slides import build_hymn_info, create_hymn_slides
+from app.routers.slides.utils import process_background_image, render_presentation
+
+DEFAULT_BACKGROUND = "ocean-sunrise"
+
+# Per worker process: background id -> normalised StoredImage, and the output cache
+_backgrounds = {}
+_output = None
+
+
+def hymn_request(hymnal, number):
+    """The normalised hymn_info for the request the frontend sends for this hymn"""
+    data = hymn_store.get(hymnal, number)
+    # Mirrors the request body built in src/app/page.tsx
+    return build_hymn_info({
+        'hymn': {
+            'number': data.get('hymn_number') or number,
+            'title': data.get('title', 'Hymn'),
+            'hymnal': hymnal,
+            'lyrics': data.get('lyrics', []),
+            'author': data.get('author') or '',
+            'composer': data.get('composer') or '',
+            'tune_name': data.get('tune_name') or '',
+            'text_copyright': data.get('text_copyright') or '',
+            'tune_copyright': data.get('tune_copyright') or '',
+        }
+    })
+
+
+def resolve_backgrounds(background_ids):
+    backgrounds = {}
+    for background_id in background_ids:
+        background = process_background_image(background_id)
+        if background is None:
+            raise SystemExit(f"Unknown background '{background_id}'")
+        backgrounds[background_id] = background
+    return backgrounds
+
+
+def _init_worker(background_ids, out_dir):
+    global _output
+    _backgrounds.update(resolve_backgrounds(background_ids))
+    # Disk only: nothing is kept in the worker's memory
+    _output = DeckCache(0, out_dir)
+
+
+def render_hymn(hymnal, number, background_id, key):
+    """Render one deck into the output directory; returns (bytes written, seconds)"""
+    start = time.perf_counter()
+    hymn_info = hymn_request(hymnal, number)
+    data = render_presentation(create_hymn_slides, hymn_info,
+                               background_image=_backgrounds[background_id])
+    _output.put(key, data)
+    return len(data), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hymnals", nargs="+", default=list(HYMNALS), choices=HYMNALS)
+    parser.add_argument("--backgrounds", nargs="+", default=[DEFAULT_BACKGROUND],
+                        help="background ids from backgrounds.json, or 'all'")
+    parser.add_argument("--out", default=config.DECK_CACHE_DIR,
+                        help="output directory (default DECK_CACHE_DIR)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if not args.out:
+        parser.error("--out is required when DECK_CACHE_DIR is not set")
+    background_ids = image_store.background_ids() if args.backgrounds == ["all"] else args.backgrounds
+    backgrounds = resolve_backgrounds(background_ids)
+    output = DeckCache(0, args.out)
+
+    jobs, failures = [], []
+    skipped = 0
+    for hymnal in args.hymnals:
+        for path in sorted((config.HYMNS_DIR / hymnal).glob("*.json"), key=lambda p: (len(p.stem), p.stem)):
+            try:
+                hymn_info = hymn_request(hymnal, path.stem)
+            except Exception as e:
+                failures.append((f"{hymnal} {path.stem}", str(e)))
+                continue
+            for background_id, background in backgrounds.items():
+                key = deck_key("hymn", hymn_info, background)
+                if key in output:
+                    skipped += 1
+                else:
+                    jobs.append((hymnal, path.stem, background_id, key))
+
+    print(f"{len(jobs)} decks to render, {skipped} already in {args.out} "
+          f"({', '.join(args.hymnals)} on {', '.join(background_ids)}, {args.workers} workers)")
+
+    done = rendered = written = 0
+    start = time.perf_counter()
+    every = max(1, len(jobs) // 100)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(background_ids, args.out)) as executor:
+        futures = {executor.submit(render_hymn, *job): job for job in jobs}
+        try:
+            for future in as_completed(futures):
+                hymnal, number, background_id, _ = futures[future]
+                try:
+                    size, _ = future.result()
+                    rendered += 1
+                    written += size
+                except Exception as e:
+                    failures.append((f"{hymnal} {number} on {background_id}", str(e)))
+                done += 1
+                if done % every == 0 or done == len(jobs):
+                    elapsed = time.perf_counter() - start
+                    print(f"[{done:>{len(str(len(jobs)))}}/{len(jobs)}] "
+                          f"{done / elapsed:.1f} decks/s, {len(failures)} failed")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("Interrupted; rerun to resume")
+
+    elapsed = time.perf_counter() - start
+    print(f"\nRendered {rendered} decks ({written / 1024 / 1024:.1f} MB) in {elapsed:.1f}s, "
+          f"{rendered / elapsed if elapsed else 0:.1f} decks/s; {skipped} skipped, {len(failures)} failed")
+    for name, error in failures:
+        print(f"  failed: {name}: {error}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { getIndexedBooks } from '@/lib/bibleIndex';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
@@ -10,6 +11,13 @@ export async function GET(request: NextRequest) {
     const { searchParams } = new URL(request.url);
     const version = (searchParams.get('version') || 'nrsvue').toLowerCase();
 
+    const indexed = getIndexedBooks(version);
+    if (indexed) {
+      const books = indexed.map(({ code, name }) => ({ code, name }));
+      books.sort((a, b) => a.name.localeCompare(b.name));
+      return NextResponse.json(books);
+    }
+
     const dirPath = path.join(process.cwd(), 'public', 'data', 'bibles', version);
     if (!fs.existsSync(dirPath)) {
       return NextResponse.json([], { status: 200 });
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { getIndexedBooks } from '@/lib/bibleIndex';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
@@ -12,6 +13,14 @@ export async function GET(request: NextRequest) {
     const book = (searchParams.get('book') || '').toUpperCase();
     if (!book) return NextResponse.json([], { status: 200 });
 
+    const indexed = getIndexedBooks(version);
+    if (indexed) {
+      const entry = indexed.find((b) => b.code === book);
+      const chapters = entry ? Object.keys(entry.chapters).map((n) => parseInt(n, 10)) : [];
+      chapters.sort((a, b) => a - b);
+      return NextResponse.json(chapters);
+    }
+
     const dirPath = path.join(process.cwd(), 'public', 'data', 'bibles', version);
     if (!fs.existsSync(dirPath)) return NextResponse.json([], { status: 200 });
 
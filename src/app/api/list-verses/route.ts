@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { getIndexedBooks, verseNumbers } from '@/lib/bibleIndex';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
@@ -13,6 +14,12 @@ export async function GET(request: NextRequest) {
     const chapter = parseInt(searchParams.get('chapter') || '1', 10);
     if (!book || !chapter) return NextResponse.json([], { status: 200 });
 
+    const indexed = getIndexedBooks(version);
+    if (indexed) {
+      const entry = indexed.find((b) => b.code === book)?.chapters[String(chapter)];
+      return NextResponse.json(entry === undefined ? [] : verseNumbers(entry));
+    }
+
     const filePath = path.join(process.cwd(), 'public', 'data', 'bibles', version, `${book}_chapter_${chapter}.json`);
     if (!fs.existsSync(filePath)) return NextResponse.json([], { status: 200 });
 
@@ -3,6 +3,7 @@
 import { useState, useEffect, useMemo } from 'react';
 import Image from 'next/image';
 import CallToWorshipTab from '@/components/slides/CallToWorshipTab';
+import { generateRequestInit } from '@/lib/generateRequest';
 
 interface Hymn {
   number: string;
@@ -68,17 +69,6 @@ export default function Home() {
   const [hymnSuccess, setHymnSuccess] = useState<string | null>(null);
   const [isGeneratingHymn, setIsGeneratingHymn] = useState(false);
 
-  // Helper function to convert image path to base64
-  const fetchImageAsBase64 = async (imagePath: string): Promise<string> => {
-    const response = await fetch(imagePath);
-    const blob = await response.blob();
-    return new Promise((resolve) => {
-      const reader = new FileReader();
-      reader.onload = () => resolve(reader.result as string);
-      reader.readAsDataURL(blob);
-    });
-  };
-
   // Function to open background selector
   const openBackgroundSelector = () => {
     setShowBackgroundSelector(true);
@@ -278,32 +268,20 @@ export default function Home() {
         }
       };
 
-      // Add background image if provided
-      if (backgroundImage) {
-        const base64Image = await new Promise<string>((resolve) => {
-          const reader = new FileReader();
-          reader.onload = () => resolve(reader.result as string);
-          reader.readAsDataURL(backgroundImage);
-        });
-        requestBody.background_image = base64Image;
-      } else if (selectedBackground) {
-        // Convert selected background to base64
-        const base64Image = await fetchImageAsBase64(selectedBackground.path);
-        requestBody.background_image = base64Image;
-      } else {
-        // Use default ocean-sunrise background
-        const base64Image = await fetchImageAsBase64('/images/ocean-sunrise-golden-worship-background.jpg');
-        requestBody.background_image = base64Image;
+      // An uploaded background is sent as a file part (see generateRequestInit)
+      if (!backgroundImage) {
+        if (selectedBackground) {
+          // Gallery backgrounds are stored server-side; send the id only
+          requestBody.background_image = selectedBackground.id;
+        } else {
+          // Use default ocean-sunrise background
+          requestBody.background_image = 'ocean-sunrise';
+        }
       }
 
       const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-      const response = await fetch(`${apiUrl}/api/generate-hymn-slides`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(requestBody),
-      });
+      const response = await fetch(`${apiUrl}/api/generate-hymn-slides`,
+        generateRequestInit(requestBody, backgroundImage));
 
       if (response.ok) {
         const blob = await response.blob();
@@ -710,74 +688,26 @@ export default function Home() {
                 setScriptureError(null);
                 setScriptureSuccess(null);
                 try {
-                  let verses: any[] = [];
-                  let verses_alt: any[] | undefined = undefined;
-
-                  if (scriptureVersion === 'combined') {
-                    // Fetch both NRSVUE and TMB for combined mode
-                    const nrsvuePath = `/data/bibles/nrsvue/${scriptureBook}_chapter_${scriptureChapter}.json`;
-                    const tmbPath = `/data/bibles/tmb/${scriptureBook}_chapter_${scriptureChapter}.json`;
-
-                    const [nrsvueRes, tmbRes] = await Promise.all([
-                      fetch(nrsvuePath),
-                      fetch(tmbPath)
-                    ]);
-
-                    if (!nrsvueRes.ok || !tmbRes.ok) throw new Error('Chapter not found');
-
-                    const [nrsvueChapter, tmbChapter] = await Promise.all([
-                      nrsvueRes.json(),
-                      tmbRes.json()
-                    ]);
-
-                    verses = (nrsvueChapter.verses || [])
-                      .filter((v: any) => typeof v.verse === 'number' && v.verse >= scriptureStartVerse && v.verse <= scriptureEndVerse)
-                      .map((v: any) => ({ verse: v.verse, text: v.text }));
-
-                    verses_alt = (tmbChapter.verses || [])
-                      .filter((v: any) => typeof v.verse === 'number' && v.verse >= scriptureStartVerse && v.verse <= scriptureEndVerse)
-                      .map((v: any) => ({ verse: v.verse, text: v.text }));
-
-                    if (!verses.length && !verses_alt?.length) throw new Error('No verses in range');
-                  } else {
-                    // Single translation mode
-                    const chapterPath = `/data/bibles/${scriptureVersion}/${scriptureBook}_chapter_${scriptureChapter}.json`;
-                    const res = await fetch(chapterPath);
-                    if (!res.ok) throw new Error('Chapter not found');
-                    const chapter = await res.json();
-                    verses = (chapter.verses || [])
-                      .filter((v: any) => typeof v.verse === 'number' && v.verse >= scriptureStartVerse && v.verse <= scriptureEndVerse)
-                      .map((v: any) => ({ verse: v.verse, text: v.text }));
-                    if (!verses.length) throw new Error('No verses in range');
-                  }
-
-                  const body: any = { reference: { book: scriptureBook, chapter: scriptureChapter }, verses };
-                  if (verses_alt) {
-                    body.verses_alt = verses_alt;
-                  }
-                  if (backgroundImage) {
-                    const base64Image = await new Promise<string>((resolve) => {
-                      const reader = new FileReader();
-                      reader.onload = () => resolve(reader.result as string);
-                      reader.readAsDataURL(backgroundImage);
-                    });
-                    body.background_image = base64Image;
-                  } else if (selectedBackground) {
-                    // Convert selected background to base64
-                    const base64Image = await fetchImageAsBase64(selectedBackground.path);
-                    body.background_image = base64Image;
-                  } else {
-                    // Use default ocean-sunrise background
-                    const base64Image = await fetchImageAsBase64('/images/ocean-sunrise-golden-worship-background.jpg');
-                    body.background_image = base64Image;
+                  // The API looks the verse text up itself; send only the reference
+                  const versions = scriptureVersion === 'combined' ? ['nrsvue', 'tmb'] : [scriptureVersion];
+                  const body: any = {
+                    reference: { book: scriptureBook, chapter: scriptureChapter },
+                    verse_ranges: [{ start: scriptureStartVerse, end: scriptureEndVerse }],
+                    versions
+                  };
+                  if (!backgroundImage) {
+                    if (selectedBackground) {
+                      // Gallery backgrounds are stored server-side; send the id only
+                      body.background_image = selectedBackground.id;
+                    } else {
+                      // Use default ocean-sunrise background
+                      body.background_image = 'ocean-sunrise';
+                    }
                   }
 
                   const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-                  const resp = await fetch(`${apiUrl}/api/generate-scripture-slides`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(body)
-                  });
+                  const resp = await fetch(`${apiUrl}/api/generate-scripture-slides`,
+                    generateRequestInit(body, backgroundImage));
                   if (!resp.ok) {
                     try {
                       const err = await resp.json();
@@ -2,6 +2,7 @@
 
 import { useState, useEffect, useMemo } from 'react';
 import Image from 'next/image';
+import { generateRequestInit } from '@/lib/generateRequest';
 
 interface CallToWorshipPair {
   Leader: string;
@@ -15,17 +16,6 @@ interface BackgroundData {
   type: string;
 }
 
-// Helper function to convert image to base64
-async function fetchImageAsBase64(imagePath: string): Promise<string> {
-  const response = await fetch(imagePath);
-  const blob = await response.blob();
-  return new Promise((resolve) => {
-    const reader = new FileReader();
-    reader.onloadend = () => resolve(reader.result as string);
-    reader.readAsDataURL(blob);
-  });
-}
-
 export default function CallToWorshipTab() {
   const [text, setText] = useState(`Leader: O Lord, our Lord
 People: how majestic is your name in all the earth!
@@ -114,32 +104,20 @@ People: how majestic is your name in all the earth.`);
         pairs: pairs
       };
 
-      // Add background image if provided
-      if (backgroundImage) {
-        const base64Image = await new Promise<string>((resolve) => {
-          const reader = new FileReader();
-          reader.onload = () => resolve(reader.result as string);
-          reader.readAsDataURL(backgroundImage);
-        });
-        requestBody.background_image = base64Image;
-      } else if (selectedBackground) {
-        // Convert selected background to base64
-        const base64Image = await fetchImageAsBase64(selectedBackground.path);
-        requestBody.background_image = base64Image;
-      } else {
-        // Use default ocean-sunrise background
-        const base64Image = await fetchImageAsBase64('/images/ocean-sunrise-golden-worship-background.jpg');
-        requestBody.background_image = base64Image;
+      // An uploaded background is sent as a file part (see generateRequestInit)
+      if (!backgroundImage) {
+        if (selectedBackground) {
+          // Gallery backgrounds are stored server-side; send the id only
+          requestBody.background_image = selectedBackground.id;
+        } else {
+          // Use default ocean-sunrise background
+          requestBody.background_image = 'ocean-sunrise';
+        }
       }
 
       const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'https://church-documentation-automation-production.up.railway.app';
-      const response = await fetch(`${apiUrl}/api/generate-call-to-worship`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(requestBody)
-      });
+      const response = await fetch(`${apiUrl}/api/generate-call-to-worship`,
+        generateRequestInit(requestBody, backgroundImage));
 
       if (!response.ok) {
         throw new Error('Failed to generate slides');
@@ -0,0 +1,33 @@
+import fs from 'fs';
+import path from 'path';
+
+// Written by `python -m scripts.pack_bibles` (railway-api). A chapter maps to
+// its verse count when verses run 1..n, otherwise to its verse numbers.
+export type BibleIndexBook = {
+  code: string;
+  name: string;
+  chapters: Record<string, number | number[]>;
+};
+
+type BibleIndex = Record<string, BibleIndexBook[]>;
+
+const indexPath = path.join(process.cwd(), 'public', 'data', 'bibles', 'index.json');
+let cached: { mtimeMs: number; index: BibleIndex } | null = null;
+
+// Returns the books of a version from the index, or null when there is no
+// index (callers fall back to scanning the chapter files).
+export function getIndexedBooks(version: string): BibleIndexBook[] | null {
+  try {
+    const { mtimeMs } = fs.statSync(indexPath);
+    if (!cached || cached.mtimeMs !== mtimeMs) {
+      cached = { mtimeMs, index: JSON.parse(fs.readFileSync(indexPath, 'utf8')) };
+    }
+    return cached.index[version] || null;
+  } catch {
+    return null;
+  }
+}
+
+export function verseNumbers(entry: number | number[]): number[] {
+  return Array.isArray(entry) ? entry : Array.from({ length: entry }, (_, i) => i + 1);
+}
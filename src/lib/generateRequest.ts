@@ -0,0 +1,16 @@
+// Fetch options for a railway-api generate endpoint. An uploaded background
+// goes as a raw file part (multipart/form-data) next to the JSON request,
+// instead of as a base64 string inside it.
+export function generateRequestInit(body: Record<string, unknown>, backgroundImage?: File | null): RequestInit {
+  if (!backgroundImage) {
+    return {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(body),
+    };
+  }
+  const form = new FormData();
+  form.append('request', JSON.stringify(body));
+  form.append('background_image', backgroundImage);
+  return { method: 'POST', body: form };
+}